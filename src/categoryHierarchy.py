@@ -0,0 +1,270 @@
+"""
+categoryHierarchy.py
+
+Configurable crime category groups with precomputed bitmasks.
+
+The hierarchy is read from a JSON config file mapping group names (e.g. 'Violent', 'Property') to the
+raw Category values of the crime data; a category may belong to several groups. Every group gets one
+bit, and each distinct category gets the mask of the groups it belongs to. The Category column of a
+DataFrame is encoded once into integer codes, so selecting a group is a bitwise AND over an integer
+array and rolling up all groups is one matrix product, instead of repeated isin scans over strings.
+Encodings are cached per hierarchy and DataFrame, and dropped as soon as the DataFrame is freed.
+
+Config format (data/category_groups.json):
+    {"groups": {"Violent": ["Assault (Non-domestic)", ...], "Property": [...]}}
+"""
+import json
+import os
+import re
+import weakref
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_CONFIG = 'data/category_groups.json'
+
+# a uint64 mask holds one bit per group
+MAX_GROUPS = 64
+
+# (absolute config path, modified time) -> CategoryHierarchy
+_HIERARCHY_CACHE = {}
+# CategoryHierarchy -> {id of DataFrame: (weak reference to the DataFrame, codes, categories, masks)}, keyed
+# on the hierarchy object itself so a reloaded config never reuses the encodings of the previous one
+_ENCODING_CACHE = weakref.WeakKeyDictionary()
+
+
+def _category_key(category):
+    """
+    Returns the matching key of a category name, case and whitespace insensitive (the crime data
+    contains non-breaking spaces in some names).
+    """
+    return re.sub(r'\s+', ' ', str(category)).strip().casefold()
+
+
+class CategoryHierarchy:
+    """
+    Groups of raw crime categories, one bit per group.
+
+    Instance variables:
+        groups (list): group names in config order, group i uses bit 1 << i
+        members (dict): group name -> list of raw category names in the group
+    """
+
+    def __init__(self, groups):
+        if len(groups) > MAX_GROUPS:
+            raise ValueError(f"At most {MAX_GROUPS} category groups are supported, got {len(groups)}")
+        self.groups = list(groups)
+        self.members = {group: list(categories) for group, categories in groups.items()}
+        # category key -> mask of every group containing it
+        self._key_masks = {}
+        for bit, group in enumerate(self.groups):
+            for category in self.members[group]:
+                key = _category_key(category)
+                self._key_masks[key] = self._key_masks.get(key, 0) | (1 << bit)
+
+    def bit(self, group):
+        """
+        Returns the bitmask of one group.
+
+        Parameters:
+            group (str): group name, case insensitive
+
+        Returns:
+            (np.uint64): mask with the bit of the group set
+        """
+        for idx, name in enumerate(self.groups):
+            if name.casefold() == str(group).strip().casefold():
+                return np.uint64(1 << idx)
+        raise KeyError(f"Invalid category group: {group}")
+
+    def group_name(self, group):
+        """
+        Returns the group name as written in the config for a case insensitive group name.
+        """
+        return self.groups[int(self.bit(group)).bit_length() - 1]
+
+    def category_masks(self, categories):
+        """
+        Returns the group mask of each category name, 0 for categories that are in no group.
+
+        Parameters:
+            categories (list): raw category names
+
+        Returns:
+            (np.ndarray): uint64 mask per category
+        """
+        return np.array([self._key_masks.get(_category_key(c), 0) for c in categories], dtype=np.uint64)
+
+    def membership(self, categories):
+        """
+        Returns a (categories x groups) 0/1 matrix of which group each category belongs to.
+        """
+        masks = self.category_masks(categories)
+        bits = np.uint64(1) << np.arange(len(self.groups), dtype=np.uint64)
+        return ((masks[:, None] & bits[None, :]) != 0).astype(np.float64)
+
+
+def load_category_hierarchy(config_file=CATEGORY_CONFIG):
+    """
+    Loads the category hierarchy config, parsing it again only after the file has changed.
+
+    Parameters:
+        config_file (str): path of the JSON config file
+
+    Returns:
+        (CategoryHierarchy): the configured groups
+    """
+    path = os.path.abspath(config_file)
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _HIERARCHY_CACHE:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        _HIERARCHY_CACHE.clear()
+        _HIERARCHY_CACHE[key] = CategoryHierarchy(config['groups'])
+    return _HIERARCHY_CACHE[key]
+
+
+def encode_categories(final_df, hierarchy=None, cache=True):
+    """
+    Encodes the Category column of a DataFrame into integer codes and a group mask per row, cached
+    for the DataFrame so it is only done once.
+
+    Parameters:
+        final_df (pd.DataFrame): DataFrame with a Category column
+        hierarchy (CategoryHierarchy): groups to use, loaded from CATEGORY_CONFIG if None
+        cache (bool): False for short lived frames (e.g. a filtered subset) that are encoded only once
+
+    Returns:
+        (np.ndarray): category code of each row, -1 for a missing category
+        (pd.Index): category name of each code
+        (np.ndarray): uint64 group mask of each row
+    """
+    hierarchy = load_category_hierarchy() if hierarchy is None else hierarchy
+    encodings = _ENCODING_CACHE.setdefault(hierarchy, {})
+    key = id(final_df)
+    cached = encodings.get(key)
+    # the weak reference guards against a new DataFrame reusing the id of a freed one
+    if cached is not None and cached[0]() is final_df:
+        return cached[1:]
+
+    codes, categories = pd.factorize(final_df['Category'])
+    categories = pd.Index(categories)
+    category_masks = hierarchy.category_masks(categories)
+    # code -1 (missing category) takes the appended 0 mask
+    row_masks = np.append(category_masks, np.uint64(0))[codes]
+    if cache:
+        # the entry is removed as soon as the DataFrame is freed, instead of holding its arrays until a swap
+        ref = weakref.ref(final_df, lambda ref: _drop_encoding(encodings, key, ref))
+        encodings[key] = (ref, codes, categories, row_masks)
+    return codes, categories, row_masks
+
+
+def _drop_encoding(encodings, key, ref):
+    """
+    Removes the cached encoding of a freed DataFrame, unless the entry already belongs to a newer one.
+    """
+    cached = encodings.get(key)
+    if cached is not None and cached[0] is ref:
+        del encodings[key]
+
+
+def group_mask(final_df, group, hierarchy=None):
+    """
+    Returns which rows belong to a category group.
+
+    Parameters:
+        final_df (pd.DataFrame): DataFrame with a Category column
+        group (str): group name from the config
+        hierarchy (CategoryHierarchy): groups to use, loaded from CATEGORY_CONFIG if None
+
+    Returns:
+        (np.ndarray): boolean array, True for rows whose category is in the group
+    """
+    hierarchy = load_category_hierarchy() if hierarchy is None else hierarchy
+    _, _, row_masks = encode_categories(final_df, hierarchy)
+    return (row_masks & hierarchy.bit(group)) != 0
+
+
+def filter_group(final_df, group, hierarchy=None):
+    """
+    Returns the rows of a category group, or final_df unchanged if group is None.
+    """
+    if group is None:
+        return final_df
+    return final_df[group_mask(final_df, group, hierarchy)]
+
+
+def group_rollup(final_df, by, value='Crime Count', hierarchy=None, cache=True, rows=None):
+    """
+    Sums a value per category group for every combination of the by columns. The value is first
+    summed per category code, then spread to the groups with one matrix product.
+
+    Parameters:
+        final_df (pd.DataFrame): DataFrame with a Category column and the value column
+        by (list): grouping columns, e.g. ['Ward Number', 'Year'], an empty list for overall totals
+        value (str): column to sum
+        hierarchy (CategoryHierarchy): groups to use, loaded from CATEGORY_CONFIG if None
+        cache (bool): passed on to encode_categories()
+        rows (np.ndarray): optional boolean mask of the rows of final_df to sum, applied to the cached
+                           encoding of the whole DataFrame instead of encoding a filtered copy
+
+    Returns:
+        (pd.DataFrame): the by columns followed by one column per group
+    """
+    hierarchy = load_category_hierarchy() if hierarchy is None else hierarchy
+    codes, categories, _ = encode_categories(final_df, hierarchy, cache)
+    values = np.nan_to_num(final_df[value].to_numpy(dtype=float))
+    valid = codes >= 0
+    if rows is not None:
+        valid = valid & np.asarray(rows, dtype=bool)
+
+    if by:
+        keys = final_df.loc[valid, by].reset_index(drop=True)
+        # missing keys (e.g. communities without a ward) are kept as their own group
+        key_codes, key_index = pd.MultiIndex.from_frame(keys).factorize(use_na_sentinel=False) if len(by) > 1 \
+            else pd.factorize(keys[by[0]], use_na_sentinel=False)
+        n_keys = len(key_index)
+    else:
+        key_codes, key_index, n_keys = np.zeros(valid.sum(), dtype=np.int64), None, 1
+
+    # (keys x categories) totals, then (keys x categories) @ (categories x groups)
+    flat = key_codes * len(categories) + codes[valid]
+    totals = np.bincount(flat, weights=values[valid], minlength=n_keys * len(categories))
+    rollup = totals.reshape(n_keys, len(categories)) @ hierarchy.membership(categories)
+
+    result = pd.DataFrame(rollup, columns=hierarchy.groups)
+    if by:
+        key_frame = key_index.to_frame(index=False) if len(by) > 1 else pd.DataFrame({by[0]: key_index})
+        result = pd.concat([key_frame.set_axis(by, axis=1), result], axis=1).sort_values(by).reset_index(drop=True)
+    return result
+
+
+def export_group_rollup(final_df, by=('Community', 'Year', 'Month'), filename='data/crime_category_groups.csv'):
+    """
+    Saves the crime count per category group for every combination of the by columns to a csv file.
+
+    Parameters:
+        final_df (pd.DataFrame): merged DataFrame returned by create_dataframe()
+        by (tuple): grouping columns
+        filename (str): path of the csv file
+
+    Returns:
+        (str): the path of the written file
+    """
+    group_rollup(final_df, list(by)).to_csv(filename, index=False)
+    print(f"Category group totals saved to {filename}")
+    return filename
+
+
+def hierarchy_available(config_file=CATEGORY_CONFIG):
+    """
+    Returns True if the category hierarchy config file exists.
+    """
+    return os.path.exists(config_file)
+
+
+def clear_category_cache():
+    """
+    Removes every cached category encoding, e.g. after the dataset has been reloaded.
+    """
+    _ENCODING_CACHE.clear()
@@ -0,0 +1,200 @@
+"""
+columnarStore.py
+
+Read-only columnar store for the merged crime dataset.
+
+The merged DataFrame produced by create_dataframe() is written once as one .npy file per column,
+with string columns (Community, Sector, Category, ...) dictionary encoded into integer codes plus
+a small JSON dictionary file. Any process can then open the store with memory mapping, so N worker
+processes share the same pages of the operating system's file cache instead of each holding its
+own copy of the dataframe.
+
+Example:
+    df = create_dataframe()
+    write_columnar_store(df)
+    ...
+    df = ColumnarStore().frame()   # in any process, zero-copy
+    location_year_summary(df, 'CENTRE', '2020', 'Sector')
+
+Usage (from the project root):
+    python src/columnarStore.py --build
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from dataLoader import create_dataframe
+
+STORE_DIR = 'data/columnar_store'
+MANIFEST_FILE = 'manifest.json'
+
+
+def write_columnar_store(final_df, store_dir=STORE_DIR):
+    """
+    Writes the merged DataFrame to a columnar store directory, one memory-mappable file per column.
+
+    Numeric columns are saved as-is. Every other column is dictionary encoded: the unique values are
+    saved to a JSON dictionary file and the rows are saved as the smallest integer code array that fits
+    (-1 marks a missing value). The store is written to a temporary directory first and then renamed
+    into place, so readers never see a partially written store.
+
+    Parameters:
+        final_df (pd.DataFrame): The merged DataFrame returned by create_dataframe().
+        store_dir (str): Directory to write the store to. Replaced if it already exists.
+
+    Returns:
+        (str): the path of the written store directory
+    """
+    tmp_dir = store_dir.rstrip('/\\') + '.tmp'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    manifest = {'rows': len(final_df), 'columns': []}
+    for idx, col in enumerate(final_df.columns):
+        series = final_df[col]
+        entry = {'name': col, 'file': f"col_{idx:02d}.npy"}
+
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            # numeric columns are stored directly, nullable dtypes become float with nan
+            values = series.to_numpy(dtype=np.float64 if series.hasnans else None)
+            entry['kind'] = 'numeric'
+        else:
+            # string dimensions are stored as integer codes plus a dictionary of the unique values
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            values = codes.astype(_code_dtype(len(uniques)))
+            entry['kind'] = 'dictionary'
+            entry['dictionary'] = f"col_{idx:02d}.dict.json"
+            with open(os.path.join(tmp_dir, entry['dictionary']), 'w', encoding='utf-8') as f:
+                json.dump([str(u) for u in uniques], f)
+
+        np.save(os.path.join(tmp_dir, entry['file']), np.ascontiguousarray(values), allow_pickle=False)
+        manifest['columns'].append(entry)
+
+    # manifest is written last so a store is only valid once every column file exists
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+    return store_dir
+
+
+def _code_dtype(n_categories):
+    """
+    Chooses the integer dtype pandas uses for categorical codes, so codes can be wrapped without a copy.
+
+    Parameters:
+        n_categories (int): number of unique values in the dictionary
+
+    Returns:
+        (np.dtype): int8, int16, int32 or int64
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class ColumnarStore:
+    """
+    Read-only accessor for a store written by write_columnar_store(). Column files are opened with
+    numpy memory mapping, so opening the store is cheap and the data pages are shared between processes.
+    Instances only hold the store path and manifest, so they can be pickled and sent to worker processes.
+
+    Instance variables:
+        store_dir (str): directory containing the store
+        manifest (dict): row count and per-column file information read from the manifest file
+        n_rows (int): number of rows in the stored DataFrame
+        columns (list): column names in their original order
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No columnar store found at '{store_dir}'. Run write_columnar_store() first.")
+        with open(manifest_path, encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.store_dir = store_dir
+        self.n_rows = self.manifest['rows']
+        self.columns = [entry['name'] for entry in self.manifest['columns']]
+        self._entries = {entry['name']: entry for entry in self.manifest['columns']}
+
+    def column(self, name):
+        """
+        Returns a single column as a pandas Series backed by the memory-mapped file.
+
+        Parameters:
+            name (str): column name as it appears in the merged DataFrame
+
+        Returns:
+            (pd.Series): float/int Series for numeric columns, categorical Series for string columns
+        """
+        if name not in self._entries:
+            raise KeyError(f"Column '{name}' is not in the columnar store.")
+        entry = self._entries[name]
+        values = np.load(os.path.join(self.store_dir, entry['file']), mmap_mode='r', allow_pickle=False)
+
+        if entry['kind'] == 'dictionary':
+            with open(os.path.join(self.store_dir, entry['dictionary']), encoding='utf-8') as f:
+                dictionary = json.load(f)
+            dtype = pd.CategoricalDtype(pd.Index(dictionary, dtype=object))
+            # the codes were written by write_columnar_store(), so they are not validated again: validating
+            # reads every page, and pandas copies codes whose dtype differs from the one it would choose
+            if values.dtype != _code_dtype(len(dictionary)):
+                raise ValueError(f"Column '{name}' has {values.dtype} codes, rewrite the store with write_columnar_store().")
+            # codes stay memory mapped, only the small dictionary is held per process
+            values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        return pd.Series(values, name=name, copy=False)
+
+    def frame(self, columns=None):
+        """
+        Returns the stored data as a DataFrame of views over the memory-mapped columns. The result can be
+        passed directly to the functions in dataPrintAndSave and dataVisualizer. The numeric columns are
+        read-only; functions that need to change a column should assign a new one.
+
+        Parameters:
+            columns (list): optional subset of columns to load, defaults to all columns
+
+        Returns:
+            (pd.DataFrame): DataFrame with the same columns and order as the stored DataFrame
+        """
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({col: self.column(col) for col in columns}, copy=False)
+
+
+def load_columnar_dataframe(store_dir=STORE_DIR, columns=None):
+    """
+    Convenience wrapper returning ColumnarStore(store_dir).frame(columns).
+
+    Parameters:
+        store_dir (str): directory containing the store
+        columns (list): optional subset of columns to load
+
+    Returns:
+        (pd.DataFrame): memory-mapped view of the stored DataFrame
+    """
+    return ColumnarStore(store_dir).frame(columns)
+
+
+def main():
+    """
+    Command line entry point, builds the store from the source files in the data folder.
+    """
+    parser = argparse.ArgumentParser(description='Build the memory-mapped columnar store of the merged crime dataset.')
+    parser.add_argument('--build', action='store_true', help='load the source files and write the store')
+    parser.add_argument('--data-dir', default='data', help='directory of the source files used by --build')
+    parser.add_argument('--store', default=STORE_DIR, help='store directory')
+    args = parser.parse_args()
+
+    if args.build:
+        print(f"Written {write_columnar_store(create_dataframe(data_dir=args.data_dir), store_dir=args.store)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+communityBoundaries.py
+
+Community boundary polygons for the choropleth map.
+
+Boundaries are read from a local GeoJSON file of community districts (one Polygon or MultiPolygon
+feature per community, longitude/latitude coordinates). The coordinates are projected once to
+kilometres with a local equirectangular projection and turned into one compound matplotlib Path per
+community. The result is cached per file, so drawing the map again for another year or metric never
+parses or projects the geometry a second time.
+"""
+import json
+import os
+
+import numpy as np
+from matplotlib.path import Path
+
+BOUNDARY_FILE = 'Community_District_Boundaries.geojson'
+# feature property holding the community code, the first one present is used
+CODE_PROPERTIES = ('comm_code', 'COMM_CODE', 'Community Code')
+
+EARTH_RADIUS_KM = 6371.0
+
+# (absolute file path, modified time) -> CommunityBoundaries
+_BOUNDARY_CACHE = {}
+
+
+class CommunityBoundaries:
+    """
+    Projected boundary paths of every community in a GeoJSON file.
+
+    Instance variables:
+        codes (list): upper case community code of each path
+        paths (list): one compound matplotlib Path per community, in kilometres
+        bounds (tuple): (min x, min y, max x, max y) of all paths
+    """
+
+    def __init__(self, codes, paths):
+        self.codes = codes
+        self.paths = paths
+        vertices = np.concatenate([path.vertices for path in paths]) if paths else np.zeros((1, 2))
+        self.bounds = (*vertices.min(axis=0), *vertices.max(axis=0))
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def load_boundaries(data_dir='data', file_name=BOUNDARY_FILE):
+    """
+    Returns the projected community boundaries of a GeoJSON file, parsing it only the first time or
+    after the file has changed.
+
+    Parameters:
+        data_dir (str): directory containing the GeoJSON file
+        file_name (str): name of the GeoJSON file
+
+    Returns:
+        (CommunityBoundaries): projected paths per community code
+    """
+    file_path = os.path.abspath(os.path.join(data_dir, file_name))
+    key = (file_path, os.stat(file_path).st_mtime_ns)
+    if key not in _BOUNDARY_CACHE:
+        with open(file_path, encoding='utf-8') as f:
+            features = json.load(f)['features']
+        _BOUNDARY_CACHE.clear()
+        _BOUNDARY_CACHE[key] = _build_boundaries(features)
+    return _BOUNDARY_CACHE[key]
+
+
+def boundaries_available(data_dir='data', file_name=BOUNDARY_FILE):
+    """
+    Returns True if the boundary GeoJSON file exists.
+    """
+    return os.path.exists(os.path.join(data_dir, file_name))
+
+
+def _build_boundaries(features):
+    """
+    Projects every feature and merges the polygons of features sharing a community code into one path.
+    """
+    polygons = {}
+    for feature in features:
+        properties = feature.get('properties') or {}
+        code = next((properties[p] for p in CODE_PROPERTIES if properties.get(p)), None)
+        geometry = feature.get('geometry') or {}
+        if code is None or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+            continue
+        rings = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        polygons.setdefault(str(code).strip().upper(), []).extend(rings)
+
+    # a single reference latitude keeps the projection consistent across every community
+    latitudes = [ring[0][1] for rings in polygons.values() for polygon in rings for ring in polygon if ring]
+    lat0 = np.radians(np.mean(latitudes)) if latitudes else 0.0
+
+    codes = sorted(polygons)
+    paths = [_polygon_path(polygons[code], lat0) for code in codes]
+    return CommunityBoundaries(codes, paths)
+
+
+def _polygon_path(polygons, lat0):
+    """
+    Builds one compound Path from a list of GeoJSON polygons (exterior ring followed by holes).
+    Exterior rings are made counter clockwise and holes clockwise, so holes stay unfilled.
+    """
+    vertices, codes = [], []
+    for polygon in polygons:
+        for ring_idx, ring in enumerate(polygon):
+            ring = np.asarray(ring, dtype=float)[:, :2]
+            if len(ring) < 3:
+                continue
+            xy = np.column_stack([
+                EARTH_RADIUS_KM * np.radians(ring[:, 0]) * np.cos(lat0),
+                EARTH_RADIUS_KM * np.radians(ring[:, 1]),
+            ])
+            # shoelace formula, positive area is counter clockwise
+            area = np.sum(xy[:-1, 0] * xy[1:, 1] - xy[1:, 0] * xy[:-1, 1])
+            if (area < 0) == (ring_idx == 0):
+                xy = xy[::-1]
+            ring_codes = np.full(len(xy), Path.LINETO, dtype=Path.code_type)
+            ring_codes[0] = Path.MOVETO
+            vertices.append(np.vstack([xy, xy[:1]]))
+            codes.append(np.append(ring_codes, Path.CLOSEPOLY))
+    if not vertices:
+        return Path(np.zeros((1, 2)))
+    return Path(np.concatenate(vertices), np.concatenate(codes))
@@ -0,0 +1,221 @@
+"""
+crimeDiff.py
+
+Fast diff between two Community Crime Statistics extracts.
+
+Both extracts are split into partitions, one per (Community, Category, Year, Month). The partition keys
+of both files are encoded together into one integer per partition, every row is hashed with
+pd.util.hash_pandas_object, and the row hashes of a partition are combined into a single order
+independent fingerprint. The two partition tables are then joined on the integer key, so the whole
+diff is a few vectorized passes no matter how many months were revised.
+
+The report lists added, removed and revised partitions and the communities and months they touch.
+update_annual_facts() uses it to rebuild only the affected (Community, Year) rows of the annual fact
+table instead of the whole table.
+
+Usage (from the project root):
+    python src/crimeDiff.py old_extract.csv data/Community_Crime_Statistics_20250611.csv --out data/crime_diff.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from dataLoader import create_annual_facts
+
+PARTITION_KEYS = ['Community', 'Category', 'Year', 'Month']
+STATUSES = ('added', 'removed', 'revised', 'unchanged')
+
+
+def diff_extracts(old_crime, new_crime):
+    """
+    Compares two crime statistics extracts partition by partition.
+
+    Parameters:
+        old_crime (pd.DataFrame): previous extract, columns Community, Category, Crime Count, Year, Month
+        new_crime (pd.DataFrame): new extract with the same columns
+
+    Returns:
+        (dict): report with keys
+                'added', 'removed', 'revised', 'unchanged' (int): number of partitions of each status
+                'partitions' (pd.DataFrame): one row per changed partition with the key columns, Status,
+                                             Old Crime Count and New Crime Count
+                'communities' (list): sorted communities with at least one changed partition
+                'months' (list): sorted (Year, Month) pairs with at least one changed partition
+                'community_years' (pd.DataFrame): distinct Community and Year of the changed partitions
+    """
+    old_crime = _normalize(old_crime)
+    new_crime = _normalize(new_crime)
+
+    # ----- vectorized key encoding shared by both extracts -----
+    old_codes = np.zeros(len(old_crime), dtype=np.int64)
+    new_codes = np.zeros(len(new_crime), dtype=np.int64)
+    uniques = {}
+    for col in PARTITION_KEYS:
+        old_col, new_col, uniques[col] = _shared_codes(old_crime[col], new_crime[col])
+        # mixed radix: every key column becomes one digit of a single integer partition key
+        old_codes = old_codes * (len(uniques[col]) + 1) + old_col
+        new_codes = new_codes * (len(uniques[col]) + 1) + new_col
+
+    # ----- one fingerprint per partition, joined on the integer key -----
+    old_parts = _partition_fingerprints(old_crime, old_codes)
+    new_parts = _partition_fingerprints(new_crime, new_codes)
+    joined = pd.merge(old_parts, new_parts, how='outer', on='Partition', suffixes=(' Old', ' New'))
+
+    in_old = joined['Rows Old'].notna()
+    in_new = joined['Rows New'].notna()
+    same = in_old & in_new & (joined['Fingerprint Old'] == joined['Fingerprint New']) \
+                           & (joined['Rows Old'] == joined['Rows New'])
+    joined['Status'] = np.select([in_old & ~in_new, ~in_old & in_new, same], ['removed', 'added', 'unchanged'], 'revised')
+
+    # decode the partition keys of the changed partitions back to their values
+    changed = joined[joined['Status'] != 'unchanged'].sort_values('Partition')
+    remaining = changed['Partition'].to_numpy()
+    decoded = {}
+    for col in reversed(PARTITION_KEYS):
+        remaining, col_codes = np.divmod(remaining, len(uniques[col]) + 1)
+        decoded[col] = uniques[col].take(col_codes)
+
+    partitions = pd.DataFrame({col: decoded[col] for col in PARTITION_KEYS})
+    partitions['Status'] = changed['Status'].to_numpy()
+    partitions['Old Crime Count'] = changed['Crime Count Old'].to_numpy()
+    partitions['New Crime Count'] = changed['Crime Count New'].to_numpy()
+
+    counts = joined['Status'].value_counts()
+    months = partitions[['Year', 'Month']].drop_duplicates().sort_values(['Year', 'Month'])
+    return {
+        **{status: int(counts.get(status, 0)) for status in STATUSES},
+        'partitions': partitions,
+        'communities': sorted(partitions['Community'].unique()),
+        'months': list(months.itertuples(index=False, name=None)),
+        'community_years': partitions[['Community', 'Year']].drop_duplicates().reset_index(drop=True),
+    }
+
+
+def print_diff_summary(report):
+    """
+    Prints the partition counts and the affected communities and months of a diff report.
+
+    Parameters:
+        report (dict): report returned by diff_extracts()
+    """
+    print(f"Crime extract diff: {report['added']} added, {report['removed']} removed, "
+          f"{report['revised']} revised, {report['unchanged']} unchanged partitions")
+    if report['communities']:
+        print(f"  Communities affected ({len(report['communities'])}): {', '.join(map(str, report['communities']))}")
+        print(f"  Months affected ({len(report['months'])}): "
+              f"{', '.join(f'{year}-{month:02d}' for year, month in report['months'])}")
+
+
+def update_annual_facts(annual_df, final_df, report):
+    """
+    Rebuilds only the rows of the annual fact table whose (Community, Year) has a changed partition.
+
+    Parameters:
+        annual_df (pd.DataFrame): fact table from create_annual_facts() built from the old extract
+        final_df (pd.DataFrame): merged DataFrame from create_dataframe() built with the new extract
+        report (dict): report returned by diff_extracts() for the two extracts
+
+    Returns:
+        (pd.DataFrame): annual_df with the affected rows replaced, same row order as create_annual_facts()
+    """
+    affected = report['community_years']
+    if affected.empty:
+        return annual_df
+    affected_keys = pd.MultiIndex.from_arrays([affected['Community'].str.upper(), affected['Year'].astype(str)])
+
+    def affected_rows(df):
+        keys = pd.MultiIndex.from_arrays([df['Community'].astype(str).str.upper(), df['Year'].astype(str)])
+        return keys.isin(affected_keys)
+
+    # fact rows are independent per community and year, so the affected slice can be rebuilt on its own
+    rebuilt = create_annual_facts(final_df[affected_rows(final_df)])
+    kept = annual_df[~affected_rows(annual_df)]
+    updated = pd.concat([kept, rebuilt], ignore_index=True)
+    return updated.sort_values(['Year', 'Community']).reset_index(drop=True)
+
+
+def _normalize(crime):
+    """
+    Brings the key columns of an extract to one type so both extracts encode the same way.
+    """
+    crime = crime.dropna(subset=PARTITION_KEYS).copy()
+    crime['Community'] = _clean_text(crime['Community'], upper=True)
+    crime['Category'] = _clean_text(crime['Category'])
+    crime['Year'] = pd.to_numeric(crime['Year']).astype(np.int64)
+    crime['Month'] = pd.to_numeric(crime['Month']).astype(np.int64)
+    return crime
+
+
+def _clean_text(series, upper=False):
+    """
+    Strips (and upper cases) a text column into a categorical, cleaning each distinct value once
+    instead of every row.
+    """
+    codes, uniques = pd.factorize(series.astype(str))
+    cleaned = pd.Index(uniques).str.strip()
+    if upper:
+        cleaned = cleaned.str.upper()
+    # values that only differed by case or spaces share one category after cleaning
+    cleaned_codes, categories = pd.factorize(cleaned)
+    return pd.Series(pd.Categorical.from_codes(cleaned_codes[codes], categories), index=series.index)
+
+
+def _shared_codes(old_values, new_values):
+    """
+    Encodes a key column of both extracts against one sorted set of values. Categorical columns are
+    encoded through their categories, so the rows themselves are never hashed again.
+
+    Returns:
+        (np.ndarray): codes of old_values
+        (np.ndarray): codes of new_values
+        (pd.Index): sorted distinct values, position = code
+    """
+    if isinstance(old_values.dtype, pd.CategoricalDtype):
+        uniques = old_values.cat.categories.union(new_values.cat.categories).sort_values()
+        old_codes = uniques.get_indexer(old_values.cat.categories)[old_values.cat.codes.to_numpy()]
+        new_codes = uniques.get_indexer(new_values.cat.categories)[new_values.cat.codes.to_numpy()]
+        return old_codes.astype(np.int64), new_codes.astype(np.int64), uniques
+    codes, uniques = pd.factorize(pd.concat([old_values, new_values], ignore_index=True), sort=True)
+    return codes[:len(old_values)].astype(np.int64), codes[len(old_values):].astype(np.int64), pd.Index(uniques)
+
+
+def _partition_fingerprints(crime, codes):
+    """
+    Returns one row per partition code with its row count, summed crime count and combined row hash.
+    """
+    row_hashes = pd.util.hash_pandas_object(crime[sorted(crime.columns)], index=False).to_numpy()
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(codes) else np.array([], dtype=int)
+
+    # the sum of the row hashes (wrapping at 2**64) does not depend on row order within a partition
+    fingerprints = np.add.reduceat(row_hashes[order], starts) if len(codes) else np.array([], dtype=np.uint64)
+    crime_counts = np.add.reduceat(crime['Crime Count'].to_numpy(dtype=float)[order], starts) if len(codes) else np.array([])
+    return pd.DataFrame({
+        'Partition': sorted_codes[starts],
+        'Rows': np.diff(np.r_[starts, len(codes)]),
+        'Crime Count': crime_counts,
+        'Fingerprint': fingerprints,
+    })
+
+
+def main():
+    """
+    Command line entry point, diffs two extracts and optionally saves the changed partitions.
+    """
+    parser = argparse.ArgumentParser(description='Compare two Community Crime Statistics extracts.')
+    parser.add_argument('old', help='previous extract csv')
+    parser.add_argument('new', help='new extract csv')
+    parser.add_argument('--out', help='csv file to save the changed partitions to')
+    args = parser.parse_args()
+
+    report = diff_extracts(pd.read_csv(args.old), pd.read_csv(args.new))
+    print_diff_summary(report)
+    if args.out:
+        report['partitions'].to_csv(args.out, index=False)
+        print(f"Changed partitions saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+crimeForecast.py
+
+Batched next-12-month crime forecasts for every community, ward and sector.
+
+The monthly crime counts of one level are packed into a dense (locations x months) matrix, with
+months a location has no crime rows for counted as zero. Three seasonal baselines are then fitted to
+every row of the matrix at once with NumPy, instead of one model per location in a Python loop:
+
+    seasonal_naive      each month repeats the same month of the last year
+    exp_smoothing       simple exponential smoothing of the deseasonalized series, the smoothing
+                        factor of each series chosen from a grid by one step ahead squared error
+    linear_trend        least squares fit of a linear trend plus one term per calendar month, solved
+                        for all series with a single lstsq call
+
+Every forecast comes with a normal approximation prediction interval from the in-sample residuals.
+
+Usage (from the project root, e.g. as a nightly job after a new extract is dropped into /data):
+    python src/crimeForecast.py --out data/crime_forecasts.csv
+"""
+import argparse
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from categoryHierarchy import filter_group
+from dataLoader import create_dataframe
+
+FORECAST_MODELS = ('seasonal_naive', 'exp_smoothing', 'linear_trend')
+
+# level name -> grouping column in the merged DataFrame, None for the whole city
+FORECAST_LEVELS = {
+    'City': None,
+    'Sector': 'Sector',
+    'Ward Number': 'Ward Number',
+    'Community': 'Community',
+}
+
+CITY_NAME = 'CALGARY'
+HORIZON = 12
+
+# smoothing factors tried by exp_smoothing for every series
+SMOOTHING_GRID = np.linspace(0.05, 0.95, 19)
+
+
+def dataset_periods(final_df):
+    """
+    Returns the first and last month of a dataset as year * 12 + month - 1 periods, the range every
+    series is aligned to so a forecast always starts the month after the dataset ends.
+
+    Parameters:
+        final_df (pd.DataFrame): rows with 'Year' and 'Month'
+
+    Returns:
+        (tuple): (first period, last period), None if there are no dated rows
+    """
+    df = final_df.dropna(subset=['Year', 'Month'])
+    if df.empty:
+        return None
+    period = pd.to_numeric(df['Year']).to_numpy(dtype=np.int64) * 12 + df['Month'].to_numpy(dtype=np.int64) - 1
+    return int(period.min()), int(period.max())
+
+
+def monthly_matrix(monthly_df, key_col=None, periods=None):
+    """
+    Packs monthly crime counts into a dense (locations x months) matrix.
+
+    Parameters:
+        monthly_df (pd.DataFrame): rows with 'Year', 'Month', 'Crime Count' and the key column
+        key_col (str): column identifying the series, a single series named CITY_NAME if None
+        periods (tuple): (first, last) period of the matrix columns from dataset_periods(), months of a
+                         series without rows are zero. Defaults to the range of monthly_df itself.
+
+    Returns:
+        (list): location of each matrix row
+        (int): first period of the matrix as year * 12 + month - 1
+        (np.ndarray): float matrix of crime counts, one column per consecutive month
+    """
+    df = monthly_df.dropna(subset=['Year', 'Month'])
+    if key_col is not None:
+        df = df.dropna(subset=[key_col])
+    if df.empty:
+        return [], 0, np.zeros((0, 0))
+
+    period = pd.to_numeric(df['Year']).to_numpy(dtype=np.int64) * 12 + df['Month'].to_numpy(dtype=np.int64) - 1
+    first, last = (int(period.min()), int(period.max())) if periods is None else periods
+    inside = (period >= first) & (period <= last)
+    df, period = df[inside], period[inside]
+    if df.empty:
+        return [], 0, np.zeros((0, 0))
+    n_months = last - first + 1
+    if key_col is None:
+        codes, keys = np.zeros(len(df), dtype=np.int64), np.array([CITY_NAME])
+    else:
+        codes, keys = pd.factorize(df[key_col].astype(str), sort=True)
+
+    # one flat bincount fills every cell, months without rows stay zero
+    flat = codes * n_months + (period - first)
+    counts = np.nan_to_num(df['Crime Count'].to_numpy(dtype=float))
+    matrix = np.bincount(flat, weights=counts, minlength=len(keys) * n_months).reshape(len(keys), n_months)
+    return list(keys), first, matrix
+
+
+def location_month_matrix(final_df, level, periods=None):
+    """
+    Builds the dense (locations x months) crime count matrix of one level from the merged DataFrame.
+
+    Parameters:
+        final_df (pd.DataFrame): merged DataFrame returned by create_dataframe()
+        level (str): one of FORECAST_LEVELS
+        periods (tuple): see monthly_matrix(), defaults to dataset_periods(final_df)
+
+    Returns:
+        see monthly_matrix()
+    """
+    key_col = FORECAST_LEVELS[level]
+    group_cols = ['Year', 'Month'] if key_col is None else [key_col, 'Year', 'Month']
+    monthly_df = final_df.groupby(group_cols, observed=True)['Crime Count'].sum().reset_index()
+    return monthly_matrix(monthly_df, key_col, dataset_periods(final_df) if periods is None else periods)
+
+
+def fit_forecasts(matrix, first_period, horizon=HORIZON, models=None, ci=0.95):
+    """
+    Fits the forecast models to every row of a (series x months) matrix at once.
+
+    Parameters:
+        matrix (np.ndarray): crime counts, one row per series and one column per consecutive month
+        first_period (int): period of the first column as year * 12 + month - 1
+        horizon (int): number of months to forecast
+        models (list): model names from FORECAST_MODELS, defaults to all
+        ci (float): coverage of the prediction intervals
+
+    Returns:
+        (dict): model name -> (forecast, lower, upper) arrays of shape (series, horizon). Models that
+                need more history than the matrix has are left out.
+    """
+    models = FORECAST_MODELS if models is None else models
+    y = np.asarray(matrix, dtype=float)
+    n_months = y.shape[1]
+    z = NormalDist().inv_cdf(0.5 + ci / 2)
+    steps = np.arange(1, horizon + 1)
+    # calendar month (0-11) of every history and forecast column
+    months = (first_period + np.arange(n_months)) % 12
+    future_months = (first_period + n_months - 1 + steps) % 12
+
+    results = {}
+    for model in models:
+        if model == 'seasonal_naive' and n_months > 12:
+            forecast = y[:, n_months - 12 + (steps - 1) % 12]
+            sigma = np.std(y[:, 12:] - y[:, :-12], axis=1, ddof=1) if n_months > 13 else np.zeros(len(y))
+            # every full year ahead adds one more season of error
+            spread = sigma[:, None] * np.sqrt((steps - 1) // 12 + 1)
+        elif model == 'exp_smoothing' and n_months > 12:
+            forecast, spread = _exp_smoothing(y, months, future_months, steps)
+        elif model == 'linear_trend' and n_months > 13:
+            forecast, spread = _linear_trend(y, months, future_months, steps)
+        else:
+            continue
+        # crime counts cannot be negative
+        results[model] = tuple(np.clip(values, 0, None) for values in (forecast, forecast - z * spread, forecast + z * spread))
+    return results
+
+
+def forecast_all(final_df, levels=None, horizon=HORIZON, models=None, ci=0.95, category_group=None):
+    """
+    Forecasts the next months of crime for every location of every level.
+
+    Parameters:
+        final_df (pd.DataFrame): merged DataFrame returned by create_dataframe()
+        levels (list): level names from FORECAST_LEVELS, defaults to all
+        horizon (int): number of months to forecast
+        models (list): model names from FORECAST_MODELS, defaults to all
+        ci (float): coverage of the prediction intervals
+        category_group (str): optional category group from categoryHierarchy, only its crimes are forecast
+
+    Returns:
+        (pd.DataFrame): one row per (Level, Location, Model, Year, Month) with Forecast, Lower and Upper
+    """
+    levels = list(FORECAST_LEVELS) if levels is None else levels
+    # every series ends at the last month of the whole dataset, even if a location or group has no crime then
+    dataset_range = dataset_periods(final_df)
+    final_df = filter_group(final_df, category_group)
+    frames = []
+    for level in levels:
+        locations, first_period, matrix = location_month_matrix(final_df, level, dataset_range)
+        if not locations:
+            continue
+        periods = first_period + matrix.shape[1] + np.arange(horizon)
+        for model, (forecast, lower, upper) in fit_forecasts(matrix, first_period, horizon, models, ci).items():
+            frames.append(pd.DataFrame({
+                'Level': level,
+                'Location': np.repeat(locations, horizon),
+                'Model': model,
+                'Year': np.tile(periods // 12, len(locations)).astype(str),
+                'Month': np.tile(periods % 12 + 1, len(locations)),
+                'Forecast': forecast.ravel(),
+                'Lower': lower.ravel(),
+                'Upper': upper.ravel(),
+            }))
+    if not frames:
+        return pd.DataFrame(columns=['Level', 'Location', 'Model', 'Year', 'Month', 'Forecast', 'Lower', 'Upper'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_forecasts(forecast_df, filename='data/crime_forecasts.csv'):
+    """
+    Saves the forecasts from forecast_all() to a csv file.
+
+    Parameters:
+        forecast_df (pd.DataFrame): forecasts to save
+        filename (str): path of the csv file
+
+    Returns:
+        (str): the path of the written file
+    """
+    forecast_df.to_csv(filename, index=False)
+    print(f"Forecasts saved to {filename}")
+    return filename
+
+
+# -------------------- Models --------------------
+
+def _seasonal_profile(y, months):
+    """
+    Returns the additive seasonal effect of each calendar month for every series, (series x 12).
+    """
+    one_hot = np.eye(12)[months]
+    month_counts = one_hot.sum(axis=0)
+    month_means = (y @ one_hot) / np.where(month_counts > 0, month_counts, 1)
+    month_means[:, month_counts == 0] = np.nan
+    profile = month_means - np.nanmean(month_means, axis=1, keepdims=True)
+    return np.nan_to_num(profile)
+
+
+def _exp_smoothing(y, months, future_months, steps):
+    """
+    Simple exponential smoothing of the deseasonalized series, with the smoothing factor of each series
+    picked from SMOOTHING_GRID. All series and all grid values are smoothed together, one month at a time.
+    """
+    profile = _seasonal_profile(y, months)
+    adjusted = y - profile[:, months]
+
+    alphas = SMOOTHING_GRID[None, :]
+    level = np.repeat(adjusted[:, :1], len(SMOOTHING_GRID), axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, adjusted.shape[1]):
+        error = adjusted[:, t:t + 1] - level
+        sse += error ** 2
+        level = level + alphas * error
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(len(y))
+    alpha = SMOOTHING_GRID[best]
+    sigma = np.sqrt(sse[rows, best] / max(adjusted.shape[1] - 1, 1))
+
+    forecast = level[rows, best][:, None] + profile[:, future_months]
+    spread = sigma[:, None] * np.sqrt(1 + (steps[None, :] - 1) * alpha[:, None] ** 2)
+    return forecast, spread
+
+
+def _linear_trend(y, months, future_months, steps):
+    """
+    Least squares fit of intercept, linear trend and eleven month terms, shared design matrix for all series.
+    """
+    n_months = y.shape[1]
+    t = np.arange(n_months)
+    design = np.column_stack([np.ones(n_months), t, np.eye(12)[months][:, 1:]])
+    coefs, _, rank, _ = np.linalg.lstsq(design, y.T, rcond=None)
+
+    residuals = y - (design @ coefs).T
+    dof = max(n_months - rank, 1)
+    sigma = np.sqrt(np.sum(residuals ** 2, axis=1) / dof)
+
+    future = np.column_stack([np.ones(len(steps)), n_months - 1 + steps, np.eye(12)[future_months][:, 1:]])
+    forecast = (future @ coefs).T
+    # parameter uncertainty grows the interval further away from the data
+    leverage = np.einsum('ij,jk,ik->i', future, np.linalg.pinv(design.T @ design), future)
+    spread = sigma[:, None] * np.sqrt(1 + leverage)[None, :]
+    return forecast, spread
+
+
+def main():
+    """
+    Command line entry point, forecasts every location of every level from the source files and saves
+    the result with export_forecasts().
+    """
+    parser = argparse.ArgumentParser(description='Forecast the monthly crime count of every community, ward and sector.')
+    parser.add_argument('--data-dir', default='data', help='directory of the source files')
+    parser.add_argument('--out', default='data/crime_forecasts.csv', help='csv file the forecasts are saved to')
+    parser.add_argument('--levels', nargs='+', choices=list(FORECAST_LEVELS), default=list(FORECAST_LEVELS),
+                        help='levels to forecast, all by default')
+    parser.add_argument('--models', nargs='+', choices=FORECAST_MODELS, default=list(FORECAST_MODELS),
+                        help='models to fit, all by default')
+    parser.add_argument('--horizon', type=int, default=HORIZON, help='number of months to forecast')
+    parser.add_argument('--category-group', help='only forecast the crimes of this category group')
+    args = parser.parse_args()
+
+    final_df = create_dataframe(data_dir=args.data_dir)
+    forecasts = forecast_all(final_df, args.levels, args.horizon, args.models, category_group=args.category_group)
+    export_forecasts(forecasts, filename=args.out)
+
+
+if __name__ == "__main__":
+    main()
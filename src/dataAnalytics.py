@@ -0,0 +1,285 @@
+"""
+dataAnalytics.py
+
+Correlation and regression analytics across all communities.
+
+For every relationship shown by the scatter plots (crime per capita vs median assessed value, and
+crime count vs business count), relationship_report() computes Pearson and Spearman correlations,
+an OLS fit with residuals, and bootstrap confidence intervals for every year and every level
+(the whole city, each sector and each ward) at once. Groups are packed into padded NumPy arrays so
+each statistic is a handful of array operations over all groups, including the bootstrap, which
+draws every resample of every group in a few batched blocks in-process. A process pool is not used:
+its workers would re-import the caller's __main__ (the default on macOS and Windows), and the
+batched resamples of a Calgary sized dataset take about a second.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# relationship name -> (x column, y column) in the annual fact table, named after the scatter plots
+RELATIONSHIPS = {
+    'cc_vs_mdv': ('Median Assessed Value', 'Crime per Capita 1000'),
+    'cc_vs_bc': ('Community Businesses Opened TD Total', 'Crime Count'),
+}
+
+# level name -> grouping column in the annual fact table, None for the whole city
+LEVELS = {
+    'City': None,
+    'Sector': 'Sector',
+    'Ward Number': 'Ward Number',
+}
+
+CITY_NAME = 'CALGARY'
+
+# smallest number of communities in a group for correlations and fits to be reported
+MIN_POINTS = 3
+
+# upper bound on the number of resampled values held in memory at once by the bootstrap
+BOOTSTRAP_BLOCK_ELEMENTS = 2_000_000
+
+
+def relationship_report(annual_df, relationships=None, levels=None, n_boot=2000, ci=0.95, seed=0):
+    """
+    Computes correlation, regression and bootstrap statistics for every relationship, level and year.
+
+    Parameters:
+        annual_df (pd.DataFrame): per community and year fact table from create_annual_facts()
+        relationships (list): relationship names from RELATIONSHIPS, defaults to all
+        levels (list): level names from LEVELS, defaults to all
+        n_boot (int): number of bootstrap resamples per group, 0 to skip the bootstrap
+        ci (float): confidence level of the bootstrap intervals
+        seed (int): random seed for the bootstrap
+
+    Returns:
+        (pd.DataFrame): one row per (Relationship, Level, Location, Year) with columns n, Pearson r,
+                        Spearman rho, Slope, Intercept, R Squared, Slope SE and the bootstrap
+                        intervals of Pearson r and Slope
+    """
+    relationships = list(RELATIONSHIPS) if relationships is None else relationships
+    levels = list(LEVELS) if levels is None else levels
+
+    reports = []
+    for relationship in relationships:
+        for level in levels:
+            long_df = _long_frame(annual_df, relationship, level)
+            if long_df.empty:
+                continue
+            reports.append(_group_statistics(long_df, relationship, level, n_boot, ci, seed))
+
+    if not reports:
+        return pd.DataFrame()
+    return pd.concat(reports, ignore_index=True)
+
+
+def community_residuals(annual_df, relationship, level='City'):
+    """
+    Returns the OLS fitted values and residuals of every community within its level group and year.
+
+    Parameters:
+        annual_df (pd.DataFrame): per community and year fact table from create_annual_facts()
+        relationship (str): relationship name from RELATIONSHIPS
+        level (str): level name from LEVELS
+
+    Returns:
+        (pd.DataFrame): Community Code, Community, Location, Year, the relationship's x and y columns,
+                        Fitted and Residual
+    """
+    long_df = _long_frame(annual_df, relationship, level)
+    if long_df.empty:
+        return long_df
+    X, Y = _padded_arrays(long_df)
+    stats = _batched_ols(X, Y)
+
+    group = long_df['group'].to_numpy()
+    fitted = stats['intercept'][group] + stats['slope'][group] * long_df['x'].to_numpy()
+    long_df = long_df.assign(Fitted=fitted, Residual=long_df['y'].to_numpy() - fitted)
+    x_col, y_col = RELATIONSHIPS[relationship]
+    long_df = long_df.rename(columns={'x': x_col, 'y': y_col})
+    return long_df.drop(columns=['group', 'position']).reset_index(drop=True)
+
+
+def fit_line(x, y):
+    """
+    Fits a single OLS line and Pearson correlation, used to overlay a fit on a scatter plot.
+
+    Parameters:
+        x (array-like): x values, non finite pairs are ignored
+        y (array-like): y values
+
+    Returns:
+        (dict): 'slope', 'intercept', 'r' and 'n', or None if there are fewer than MIN_POINTS points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y)
+    if valid.sum() < MIN_POINTS:
+        return None
+    stats = _batched_ols(x[valid][None, :], y[valid][None, :])
+    return {'slope': float(stats['slope'][0]), 'intercept': float(stats['intercept'][0]),
+            'r': float(stats['r'][0]), 'n': int(valid.sum())}
+
+
+def export_relationship_report(report, filename='relationship_report.csv'):
+    """
+    Writes a relationship report to a csv file for batch reporting.
+
+    Parameters:
+        report (pd.DataFrame): DataFrame returned by relationship_report()
+        filename (str): path of the csv file to write
+    """
+    report.to_csv(filename, index=False)
+    print(f"Relationship report saved as: {filename}")
+
+
+# -------------------- Array building --------------------
+
+def _long_frame(annual_df, relationship, level):
+    """
+    Selects the finite (x, y) pairs of a relationship and numbers the (Location, Year) groups.
+    """
+    x_col, y_col = RELATIONSHIPS[relationship]
+    group_col = LEVELS[level]
+
+    long_df = pd.DataFrame({
+        'Community Code': annual_df['Community Code'].to_numpy(),
+        'Community': annual_df['Community'].to_numpy(),
+        'Location': CITY_NAME if group_col is None else annual_df[group_col].to_numpy(),
+        'Year': annual_df['Year'].to_numpy(),
+        'x': pd.to_numeric(annual_df[x_col], errors='coerce').to_numpy(dtype=float),
+        'y': pd.to_numeric(annual_df[y_col], errors='coerce').to_numpy(dtype=float),
+    })
+    valid = np.isfinite(long_df['x'].to_numpy()) & np.isfinite(long_df['y'].to_numpy())
+    valid &= long_df['Location'].notna().to_numpy() & (long_df['Location'].astype(str).str.strip() != '').to_numpy()
+    long_df = long_df[valid].sort_values(['Location', 'Year'], kind='stable').reset_index(drop=True)
+
+    grouped = long_df.groupby(['Location', 'Year'], sort=False)
+    long_df['group'] = grouped.ngroup()
+    long_df['position'] = grouped.cumcount()
+    return long_df
+
+
+def _padded_arrays(long_df, columns=('x', 'y')):
+    """
+    Packs the long frame into (groups x max group size) arrays padded with nan.
+    """
+    n_groups = int(long_df['group'].max()) + 1
+    width = int(long_df['position'].max()) + 1
+    group = long_df['group'].to_numpy()
+    position = long_df['position'].to_numpy()
+    arrays = []
+    for col in columns:
+        array = np.full((n_groups, width), np.nan)
+        array[group, position] = long_df[col].to_numpy(dtype=float)
+        arrays.append(array)
+    return arrays
+
+
+# -------------------- Batched statistics --------------------
+
+def _batched_ols(X, Y):
+    """
+    Pearson r and OLS fit of Y on X along the last axis, ignoring nan padding. Works for any leading
+    shape, e.g. (groups, n) or (groups, resamples, n).
+    """
+    mask = np.isfinite(X) & np.isfinite(Y)
+    n = mask.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = np.where(mask, X, 0).sum(axis=-1) / n
+        y_mean = np.where(mask, Y, 0).sum(axis=-1) / n
+        dx = np.where(mask, X - x_mean[..., None], 0)
+        dy = np.where(mask, Y - y_mean[..., None], 0)
+        sxx = (dx * dx).sum(axis=-1)
+        syy = (dy * dy).sum(axis=-1)
+        sxy = (dx * dy).sum(axis=-1)
+
+        slope = sxy / sxx
+        intercept = y_mean - slope * x_mean
+        r = sxy / np.sqrt(sxx * syy)
+        # residual variance with n - 2 degrees of freedom for the slope standard error
+        sse = np.clip(syy - slope * sxy, 0, None)
+        slope_se = np.sqrt(sse / (n - 2) / sxx)
+
+    too_small = n < MIN_POINTS
+    for array in (slope, intercept, r, slope_se):
+        array[too_small] = np.nan
+    return {'n': n, 'slope': slope, 'intercept': intercept, 'r': r, 'slope_se': slope_se}
+
+
+def _bootstrap(X, Y, n_boot, seed):
+    """
+    Bootstrap Pearson r and OLS slope for all groups. Each resample draws n indices with
+    replacement from the n valid points of its group, for every group and resample at once.
+
+    Returns:
+        (tuple): (r, slope) arrays of shape (groups, n_boot)
+    """
+    rng = np.random.default_rng(seed)
+    n = np.isfinite(X).sum(axis=1)
+    width = X.shape[1]
+    rows = np.arange(X.shape[0])[:, None, None]
+    # positions beyond the group size are padding
+    padding = np.arange(width)[None, None, :] >= n[:, None, None]
+
+    # resamples are drawn in blocks to bound memory use
+    block = max(1, BOOTSTRAP_BLOCK_ELEMENTS // max(1, X.shape[0] * width))
+    r_blocks, slope_blocks = [], []
+    for start in range(0, n_boot, block):
+        size = min(block, n_boot - start)
+        # valid points are packed at the start of each row, so index k < n picks a valid point
+        draws = np.floor(rng.random((X.shape[0], size, width)) * n[:, None, None]).astype(np.int64)
+        Xb = X[rows, draws]
+        Yb = Y[rows, draws]
+        Xb[np.broadcast_to(padding, Xb.shape)] = np.nan
+        Yb[np.broadcast_to(padding, Yb.shape)] = np.nan
+
+        stats = _batched_ols(Xb, Yb)
+        r_blocks.append(stats['r'])
+        slope_blocks.append(stats['slope'])
+    return np.concatenate(r_blocks, axis=1), np.concatenate(slope_blocks, axis=1)
+
+
+def _group_statistics(long_df, relationship, level, n_boot, ci, seed):
+    """
+    Computes every statistic for all (Location, Year) groups of one relationship and level.
+    """
+    X, Y = _padded_arrays(long_df)
+    stats = _batched_ols(X, Y)
+
+    # Spearman rho is the Pearson r of the average ranks within each group
+    ranks = long_df.groupby('group')[['x', 'y']].rank(method='average')
+    RX, RY = _padded_arrays(long_df.assign(x=ranks['x'], y=ranks['y']))
+    rho = _batched_ols(RX, RY)['r']
+
+    keys = long_df.drop_duplicates('group').sort_values('group')
+    report = pd.DataFrame({
+        'Relationship': relationship,
+        'Level': level,
+        'Location': keys['Location'].to_numpy(),
+        'Year': keys['Year'].to_numpy(),
+        'n': stats['n'],
+        'Pearson r': stats['r'],
+        'Spearman rho': rho,
+        'Slope': stats['slope'],
+        'Intercept': stats['intercept'],
+        'R Squared': stats['r'] ** 2,
+        'Slope SE': stats['slope_se'],
+    })
+
+    if n_boot > 0:
+        boot_r, boot_slope = _bootstrap(X, Y, n_boot, seed)
+        tail = (1 - ci) / 2 * 100
+        with warnings.catch_warnings():
+            # groups too small to fit give all nan resamples
+            warnings.simplefilter('ignore', RuntimeWarning)
+            r_low, r_high = np.nanpercentile(boot_r, [tail, 100 - tail], axis=1)
+            slope_low, slope_high = np.nanpercentile(boot_slope, [tail, 100 - tail], axis=1)
+        small = stats['n'] < MIN_POINTS
+        for array in (r_low, r_high, slope_low, slope_high):
+            array[small] = np.nan
+        report['Pearson r CI Low'] = r_low
+        report['Pearson r CI High'] = r_high
+        report['Slope CI Low'] = slope_low
+        report['Slope CI High'] = slope_high
+
+    return report
@@ -1,31 +1,101 @@
 import numpy as np
 import pandas as pd
 import os
+import re
 import pandas as pd
 import openpyxl
 
-def create_dataframe():
+from dataValidator import validate_dataframe
+
+# Source data files read by create_dataframe(), relative to the data directory
+DATA_FILES = {
+    'census2016': 'Census_by_Community_2016_20250617.csv',
+    'census2017': 'Census_by_Community_2017_20250617.csv',
+    'census2019': 'Census_by_Community_2019_20250617.csv',
+    'census2021': '2021_Federal_Census_Population_and_Dwellings_by_Community_20250611.csv',
+    'assessment': 'Assessments_by_Community_20250609.csv',
+    'business': 'Calgary_Business_Licences_20250611.csv',
+    'wards': 'Communities_by_Ward_20250609.csv',
+    'crime': 'Community_Crime_Statistics_20250611.csv',
+}
+
+# first and last year of crime data kept by create_dataframe(), the census data only covers these years
+YEAR_RANGE = (2018, 2024)
+
+# date stamp at the end of a source file name, e.g. Community_Crime_Statistics_20250611.csv
+DATE_STAMP = re.compile(r'^(?P<prefix>.+)_(?P<stamp>\d{8})\.csv$')
+
+# name columns upper cased and stripped at load time, so lookups never have to change the DataFrame
+NAME_COLUMNS = ['Community Code', 'Community', 'Sector']
+
+
+def resolve_data_files(data_dir='data'):
+    """
+    Summary: Finds the file of every source in the data directory. A newer extract of a source, the
+    same name as in DATA_FILES with a later date stamp (e.g. Community_Crime_Statistics_20250711.csv),
+    is used instead of the listed one, so a new monthly extract only has to be dropped into the folder.
+
+    Parameters:
+        data_dir (str): directory containing the source files.
+
+    Returns:
+        (dict): key of DATA_FILES -> file name, the DATA_FILES name if no dated version is present
+    """
+    try:
+        stamped = [DATE_STAMP.match(name) for name in os.listdir(data_dir)]
+    except FileNotFoundError:
+        stamped = []
+    stamped = [match for match in stamped if match is not None]
+
+    files = {}
+    for key, file_name in DATA_FILES.items():
+        prefix = DATE_STAMP.match(file_name).group('prefix')
+        versions = [match for match in stamped if match.group('prefix') == prefix]
+        files[key] = max(versions, key=lambda match: match.group('stamp')).string if versions else file_name
+    return files
+
+
+def _normalize_names(df):
+    """
+    Strips and upper cases the community, code and sector names, the format the prompts compare against.
+    """
+    for col in NAME_COLUMNS:
+        df[col] = df[col].str.strip().str.upper()
+    return df
+
+
+def create_dataframe(data_dir='data', strict=False, return_report=False):
     """
     Summary: This functions imports multiple data files, cleans them, and merges them into a single DataFrame.
+    The merged DataFrame is then checked by the validation stage in dataValidator. The report is returned
+    next to the DataFrame rather than stored in final_df.attrs, which pandas copies into every derived frame.
+
+    Parameters:
+        data_dir (str): directory containing the files listed in DATA_FILES, see resolve_data_files().
+        strict (bool): if True, raise DataValidationError when an error level validation rule fails.
+        return_report (bool): if True, return (final_df, report) with the validate_dataframe() report.
 
     Returns: 
         final_df: A cleaned and merged DataFrame with the following columns:
          - Community Code, Community, Year, Month, Sector, Ward Number
          - Category, Crime Count, Community Crime MTD Total
          - Businesses Opened, Community Businesses Opened TD Total
-         - Taxable Accounts, Median Assessed Value, Population Household
+         - Taxable Accounts, Median Assessed Value (latest assessment as of the row's Year and Month), Population Household
          - Crime per Capita 1000
+        report (dict): the validation report, only if return_report is True
     """
     # ----------- Importing Data Files ------------
-        
-    census2016_init = pd.read_csv('data/Census_by_Community_2016_20250617.csv')
-    census2017_init = pd.read_csv('data/Census_by_Community_2017_20250617.csv')
-    census2019_init = pd.read_csv('data/Census_by_Community_2019_20250617.csv')
-    census2021_init = pd.read_csv('data/2021_Federal_Census_Population_and_Dwellings_by_Community_20250611.csv')
-    assessment_init = pd.read_csv('data/Assessments_by_Community_20250609.csv')
-    business_init = pd.read_csv('data/Calgary_Business_Licences_20250611.csv')
-    wards_init = pd.read_csv('data/Communities_by_Ward_20250609.csv')
-    crime_init = pd.read_csv('data/Community_Crime_Statistics_20250611.csv')
+    # latest extract of each source, see resolve_data_files()
+    files = resolve_data_files(data_dir)
+
+    census2016_init = pd.read_csv(os.path.join(data_dir, files['census2016']))
+    census2017_init = pd.read_csv(os.path.join(data_dir, files['census2017']))
+    census2019_init = pd.read_csv(os.path.join(data_dir, files['census2019']))
+    census2021_init = pd.read_csv(os.path.join(data_dir, files['census2021']))
+    assessment_init = pd.read_csv(os.path.join(data_dir, files['assessment']))
+    business_init = pd.read_csv(os.path.join(data_dir, files['business']))
+    wards_init = pd.read_csv(os.path.join(data_dir, files['wards']))
+    crime_init = pd.read_csv(os.path.join(data_dir, files['crime']))
 
     # ----------- Clean Data Files ------------
     
@@ -46,6 +116,7 @@ def create_dataframe():
     # convert years into columns for each year
     census = census.set_index(['COMM_CODE', 'Year'])
     census = census['Population Household'].unstack()
+    census_rows = len(census)
     census.dropna(inplace=True)
     # add columns for interpolated and extrapolated extra years needed and ordering columns based on year
     census[['2018', '2020', '2022', '2023', '2024']] = np.nan
@@ -89,13 +160,9 @@ def create_dataframe():
     business['Community Businesses Opened TD Total'] = business.groupby('COMDISTCD')['BUSINESS_COUNT'].cumsum()
 
     ## Cleaning Assessment data ----------
-    assessment = assessment_init
-
-    # Instead of taking data by year, take the average of the two years. When using data, will include a disclaimer
-    assessment = assessment.groupby('COMM_CODE', as_index=False)[[
-        'Number of taxable accounts',
-        'Median assessed value',
-    ]].mean()
+    # Assessments are kept per year and joined as of each crime year and month further below
+    assessment = assessment_init[['COMM_CODE', 'date', 'Number of taxable accounts', 'Median assessed value']]
+    assessment = assessment.rename(columns={'date': 'Assessment Year'})
 
     ## Cleaning Wards data ----------
     wards = wards_init.drop(['CLASS', 'CLASS_CODE', 'SRG', 'COMM_STRUCTURE'], axis=1)
@@ -125,7 +192,10 @@ def create_dataframe():
                         right_on = ['COMM_CODE', 'WARD_NUM', 'SECTOR', 'Community', 'Year', 'Month'])
 
     ## Merge 3 plus assessment --------------------
-    merge3_df = pd.merge(merge2_df, assessment, how='outer', left_on='COMM_CODE', right_on='COMM_CODE')
+    # latest assessment of the community as of each row's year and month
+    merge3_df = asof_join(merge2_df, assessment, by='COMM_CODE',
+                          columns=['Number of taxable accounts', 'Median assessed value'],
+                          dim_year_col='Assessment Year')
 
     ## Merge 4 plus census --------------------
     merge4_df = pd.merge(merge3_df, census, how='outer', left_on=['COMM_CODE', 'Year'], right_on=['COMM_CODE', 'Year'])
@@ -136,7 +206,7 @@ def create_dataframe():
     # Create Crime per capita 1000 date
     final_df['Crime per Capita 1000'] = (final_df['Community Crime MTD Total'] / final_df['TOTAL_POP_HOUSEHOLD']) * 1000
     # filter data to 2018 and after and before 2025
-    final_df = final_df[(final_df['Year'] > 2017) & (final_df['Year'] < 2025)]
+    final_df = final_df[(final_df['Year'] >= YEAR_RANGE[0]) & (final_df['Year'] <= YEAR_RANGE[1])]
     final_df['Year'] = final_df['Year'].astype(int).astype(str)
     final_df['WARD_NUM'] = final_df['WARD_NUM'].apply(lambda x: str(int(x)) if pd.notna(x) else "")
 
@@ -157,6 +227,7 @@ def create_dataframe():
         'Businesses Opened', 'Community Businesses Opened TD Total',
         'Taxable Accounts', 'Median Assessed Value',
         'Population Household', 'Crime per Capita 1000']]
+    final_df = _normalize_names(final_df)
 
     # final sort of year and month columns
     final_df = final_df.sort_values(['Year', 'Month'], ascending=[True, True])
@@ -164,9 +235,171 @@ def create_dataframe():
 
     # final_df.to_excel("final_dataframe.xlsx", index=True, header=True)
 
+    ### -------------------- VALIDATION OF DATA --------------------
+    # join keys of each source and row counts of cleaning steps, checked against the merged data
+    source_keys = {
+        'wards_name': wards_init['NAME'],
+        'wards_code': wards_init['COMM_CODE'],
+        'crime_community': crime_init['Community'],
+        'business_code': business['COMDISTCD'],
+        'assessment_code': assessment_init['COMM_CODE'],
+        'census_code': census['COMM_CODE'],
+    }
+    source_counts = {'census_rows': census_rows, 'census_rows_complete': census['COMM_CODE'].nunique()}
+    report = validate_dataframe(final_df, source_keys, source_counts, strict=strict)
+
+    if return_report:
+        return final_df, report
     return final_df
 
 
+def load_dimensions(data_dir='data'):
+    """
+    Summary: Loads only the small dimension tables needed by the location and year prompts, without
+    the crime, business and census merge of create_dataframe(). Communities come from the wards file,
+    plus communities that only appear in the crime data, and the years are the crime years that
+    create_dataframe() keeps (2018-2024). Values use the same formats as the merged DataFrame.
+
+    Parameters:
+        data_dir (str): directory containing the files listed in DATA_FILES, see resolve_data_files().
+
+    Returns:
+        (pd.DataFrame): one row per community and year with columns Community Code, Community, Year,
+                        Sector, Ward Number
+    """
+    files = resolve_data_files(data_dir)
+    wards = pd.read_csv(os.path.join(data_dir, files['wards']), usecols=['COMM_CODE', 'NAME', 'SECTOR', 'WARD_NUM'])
+    crime = pd.read_csv(os.path.join(data_dir, files['crime']), usecols=['Community', 'Year'])
+
+    # communities of the crime data that are not in the wards file have no code, sector or ward
+    crime_only = pd.Series(crime['Community'].dropna().unique())
+    crime_only = crime_only[~crime_only.isin(wards['NAME'])]
+    communities = pd.concat([wards, pd.DataFrame({'NAME': crime_only})], ignore_index=True)
+    communities['WARD_NUM'] = communities['WARD_NUM'].apply(lambda x: str(int(x)) if pd.notna(x) else "")
+    communities = communities.rename(columns={
+        'COMM_CODE': 'Community Code',
+        'NAME': 'Community',
+        'SECTOR': 'Sector',
+        'WARD_NUM': 'Ward Number',
+    }).drop_duplicates()
+
+    years = crime['Year'].dropna().astype(int)
+    years = sorted(years[(years >= YEAR_RANGE[0]) & (years <= YEAR_RANGE[1])].unique())
+    dimensions = communities.merge(pd.DataFrame({'Year': [str(year) for year in years]}), how='cross')
+    return _normalize_names(dimensions[['Community Code', 'Community', 'Year', 'Sector', 'Ward Number']])
+
+
+def asof_join(facts_df, dimension_df, by, columns, year_col='Year', month_col='Month',
+              dim_year_col='Year', dim_month_col=None, fill_before_first=True):
+    """
+    Summary: Time-aware join of a slowly changing dimension onto fact rows. Each fact row gets the
+    dimension values of the latest dimension row for the same key that took effect on or before the
+    fact's (Year, Month). Both sides are sorted once on an integer month key and joined with
+    pd.merge_asof, so the cost stays linear in the number of rows. Works for any dimension with an
+    effective year (and optionally month), e.g. yearly assessments or ward boundaries that change over time.
+
+    Parameters:
+        facts_df (pd.DataFrame): fact rows with year_col and month_col columns and the key column
+        dimension_df (pd.DataFrame): dimension rows with the key column, dim_year_col and the value columns
+        by (str): key column present in both DataFrames (e.g. 'COMM_CODE')
+        columns (list): dimension value columns to attach
+        year_col (str): year column of the facts
+        month_col (str): month column of the facts
+        dim_year_col (str): year the dimension row takes effect
+        dim_month_col (str): month the dimension row takes effect, January if None
+        fill_before_first (bool): if True, fact rows earlier than the first dimension row of their key
+                                  get that first row instead of nan
+
+    Returns:
+        (pd.DataFrame): facts_df with the value columns added, in the original row order. Rows with a
+                        missing key, year or month get nan values.
+    """
+    facts = facts_df.reset_index(drop=True)
+    period = facts[year_col] * 12 + (facts[month_col] - 1)
+    valid = period.notna() & facts[by].notna()
+
+    dim = dimension_df[[by] + list(columns)].copy()
+    dim_month = 1 if dim_month_col is None else dimension_df[dim_month_col]
+    dim['_period'] = (dimension_df[dim_year_col] * 12 + (dim_month - 1))
+    dim = dim.dropna(subset=[by, '_period'])
+    dim['_period'] = dim['_period'].astype('int64')
+    # period the matched row took effect, nan only when there is no matching row at all
+    dim['_effective'] = dim['_period']
+    dim = dim.sort_values('_period', kind='stable')
+
+    # only key and period columns take part in the join, the result is aligned back by row number
+    left = pd.DataFrame({'_row': np.flatnonzero(valid.to_numpy()),
+                         by: facts.loc[valid, by].to_numpy(),
+                         '_period': period[valid].astype('int64').to_numpy()})
+    left = left.sort_values('_period', kind='stable')
+
+    joined = pd.merge_asof(left, dim, on='_period', by=by, direction='backward')
+    if fill_before_first:
+        forward = pd.merge_asof(left, dim, on='_period', by=by, direction='forward')
+        # rows before the first dimension row have no backward match, a matched row may itself hold nan values
+        before_first = joined['_effective'].isna().to_numpy()
+        joined.loc[before_first, list(columns)] = forward.loc[before_first, list(columns)].to_numpy()
+
+    joined = joined.set_index('_row')[list(columns)].reindex(range(len(facts)))
+    return pd.concat([facts, joined.reset_index(drop=True)], axis=1)
+
+
+def create_annual_facts(final_df):
+    """
+    Summary: Builds a per (Community, Year) fact table from the merged DataFrame. This is computed once
+    and shared by the summary table and the scatter plots so they all use the same annual numbers.
+
+    Crime Count is summed over every category row for the year, and Crime per Capita 1000 is the annual
+    crime total over the population, rather than one month's rate. Businesses Opened is taken once per
+    month before summing, since the monthly value is repeated on each category row.
+
+    Parameters:
+        final_df (pd.DataFrame): The merged DataFrame returned by create_dataframe().
+
+    Returns:
+        annual_df: DataFrame with one row per community and year and the following columns:
+         - Community Code, Community, Year, Sector, Ward Number
+         - Crime Count, Population Household, Crime per Capita 1000
+         - Businesses Opened, Community Businesses Opened TD Total
+         - Taxable Accounts, Median Assessed Value
+    """
+    # values that are repeated on every category row of a month are taken once per month
+    monthly = final_df.groupby(['Community', 'Year', 'Month'], as_index=False, sort=False, observed=True).agg({
+        'Crime Count': 'sum',
+        'Businesses Opened': 'first',
+        'Community Businesses Opened TD Total': 'first',
+    })
+    monthly = monthly.groupby(['Community', 'Year'], as_index=False, sort=False, observed=True).agg({
+        'Crime Count': 'sum',
+        'Businesses Opened': 'sum',
+        'Community Businesses Opened TD Total': 'max',
+    })
+
+    # values that do not change within a community and year
+    static = final_df.groupby(['Community', 'Year'], as_index=False, sort=False, observed=True).agg({
+        'Community Code': 'first',
+        'Sector': 'first',
+        'Ward Number': 'first',
+        'Population Household': 'first',
+        'Taxable Accounts': 'first',
+        'Median Assessed Value': 'first',
+    })
+
+    annual_df = pd.merge(static, monthly, how='inner', on=['Community', 'Year'])
+
+    # annual crime per 1000 residents, communities without residents get nan instead of inf
+    population = annual_df['Population Household'].where(annual_df['Population Household'] > 0)
+    annual_df['Crime per Capita 1000'] = annual_df['Crime Count'] / population * 1000
+
+    annual_df = annual_df[['Community Code', 'Community', 'Year', 'Sector', 'Ward Number',
+        'Crime Count', 'Population Household', 'Crime per Capita 1000',
+        'Businesses Opened', 'Community Businesses Opened TD Total',
+        'Taxable Accounts', 'Median Assessed Value']]
+
+    annual_df = annual_df.sort_values(['Year', 'Community']).reset_index(drop=True)
+    return annual_df
+
+
 def export_to_excel(df, filename='output.xlsx', sheet_name='Sheet1'):
     """
     Exports a DataFrame to an Excel file.
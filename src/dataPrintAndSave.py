@@ -3,6 +3,9 @@ import pandas as pd
 from matplotlib import pyplot as plt
 import os
 
+from dataLoader import create_annual_facts
+from categoryHierarchy import group_rollup, hierarchy_available
+
 def save_plot(location_type, year, plot_name, location):
     """
     Saves the current matplotlib plot to the 'images' directory as a png.
@@ -30,26 +33,59 @@ def save_plot(location_type, year, plot_name, location):
     print(f"Plot saved as: {filepath}")
 
 
-def print_describe(df):
+def print_describe(df, describe_stats=None):
     """
     Prints overall statistics of the final dataset, specifically for Crime Count, 
     Crime per Capita 1000, Businesses Opened, and Median Assessed Value if applicable
 
     Parameters:
         df (pd.DataFrame): The DataFrame containing the final crime data.
+        describe_stats (pd.DataFrame): Optional result of describe_dataframe(), computed here if not given.
 
     Returns:
         Prints the describe method statistics directly to the console.
     """
+    if describe_stats is None:
+        describe_stats = describe_dataframe(df)
+
+    # Print final table
+    print("================ Overall Stats of the dataset oganized by Months ==================" \
+    "\n===================================================================================")
+    print(describe_stats)
+    print("===================================================================================")
+
+
+def describe_dataframe(df, annual_df=None):
+    """
+    Computes the overall statistics printed by print_describe() without printing anything, so it can
+    run in a background worker.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame containing the final crime data.
+        annual_df (pd.DataFrame): Optional per community and year fact table from create_annual_facts(),
+                                  built from df if not given.
+
+    Returns:
+        (pd.DataFrame): describe() statistics of the monthly totals and the median assessed values
+    """
+    if annual_df is None:
+        annual_df = create_annual_facts(df)
+
     # removal of any inf values with nan
     describe_df = df.replace([np.inf, -np.inf], np.nan)
     
     # grouping data by main indices and chooses sum or first as required
     describe_df = describe_df.groupby(['Year', 'Month', 'Community'], as_index=False).agg({
         'Crime Count': 'sum',
-        'Crime per Capita 1000': 'first',  # these don't change within community/month
-        'Businesses Opened': 'first',
+        'Businesses Opened': 'first',  # this doesn't change within community/month
     })
+
+    # the merged rows carry the rate of a single category, so the monthly rate of each community is
+    # its total crime over the population of the annual fact table, the same way as the annual rate
+    population = annual_df.set_index(['Community', 'Year'])['Population Household']
+    population = population.reindex(pd.MultiIndex.from_frame(describe_df[['Community', 'Year']])).to_numpy()
+    population = np.where(population > 0, population, np.nan)
+    describe_df['Crime per Capita 1000'] = describe_df['Crime Count'].to_numpy() / population * 1000
     
     # grouping data to produce 1 row for each month
     describe_df = describe_df.groupby(['Year', 'Month'], as_index=False).agg({
@@ -81,31 +117,55 @@ def print_describe(df):
     describe_stats_final['Median Assessed Value'] = describe_stats_final['Median Assessed Value'].apply(
         lambda x: f"{x:,.2f}" if pd.notna(x) else x
     )
-    
-    # Print final table
-    print("================ Overall Stats of the dataset oganized by Months ==================" \
-    "\n===================================================================================")
-    print(describe_stats_final)
-    print("===================================================================================")
+    return describe_stats_final
+
 
+def location_year_summary(df, location, year, location_type, annual_df=None):
+    """
+    Prints the summary of crime statistics for the user specified location and year built by
+    summarize_location_year().
 
-def location_year_summary(df, location, year, location_type):
+    Parameters:
+        df (pd.DataFrame): The DataFrame containing the final dataset
+        location (str): The name of the location to analyze (e.g., community name, ward number, or sector).
+        year (int): The year of the data to analyze. (2018-2024)
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        annual_df (pd.DataFrame): Optional per community and year fact table from create_annual_facts(),
+                                  built from df if not given.
+
+    Returns:
+        Prints a short table of statistics directly to the console.
+    """
+    print(summarize_location_year(df, location, year, location_type, annual_df))
+
+
+def summarize_location_year(df, location, year, location_type, annual_df=None, category_group=None, group_totals=None):
     """
     Generates a summary of crime statistics for the user specified location and year, including total population,
     median assessed value, number of businesses, total crime incidents, crime per 1000 residents, and business 
-    density per 1000 residents.
+    density per 1000 residents, followed by the incidents of each category group from categoryHierarchy and the
+    rank of the chosen group. Nothing is printed, so the summary can be built in a worker thread.
 
     Parameters:
         df (pd.DataFrame): The DataFrame containing the final dataset
         location (str): The name of the location to analyze (e.g., community name, ward number, or sector).
         year (int): The year of the data to analyze. (2018-2024)
         location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        annual_df (pd.DataFrame): Optional per community and year fact table from create_annual_facts(),
+                                  built from df if not given.
+        category_group (str): Optional category group chosen by the user, ranked against the other locations.
+        group_totals (pd.DataFrame): Optional crime count per category group of every location of the type in
+                                     the year, the location_type column followed by one column per group.
+                                     Rolled up from df if not given, no group lines without df or a config.
 
     Returns:
-        Prints a short table of statistics directly to the console.
+        (str): the summary table text, or a short message if there is no data for the location and year
     """
+    if annual_df is None:
+        annual_df = create_annual_facts(df)
+
     # Filter by year
-    year_df = df[df['Year'] == year]
+    year_df = annual_df[annual_df['Year'] == year]
 
     # Special handling for blank/NaN wards
     if location_type == 'Ward Number':
@@ -113,35 +173,24 @@ def location_year_summary(df, location, year, location_type):
 
     # Case for non matching location
     if year_df.empty or location not in year_df[location_type].unique():
-        print(f"No data found for {location_type}: {location} in {year}.")
-        return
+        return f"No data found for {location_type}: {location} in {year}."
 
-    # Aggregate stats, groupby differently depending on location type to get proper desired stats
+    # Fact table is already one row per community, sectors and wards are rolled up from their communities
     if (location_type == 'Community'):
-        grouped = year_df.groupby(location_type).agg({
-            'Population Household': 'first',
-            'Median Assessed Value': 'first',
-            'Community Businesses Opened TD Total': 'max',
-            'Crime Count': 'sum'
-        }).reset_index()
+        grouped = year_df[[location_type, 'Population Household', 'Median Assessed Value',
+                           'Community Businesses Opened TD Total', 'Crime Count']].reset_index(drop=True)
     else:
-        grouped = year_df.groupby('Community').agg({
-            location_type: 'first',
-            'Population Household': 'first',
-            'Median Assessed Value': 'first',
-            'Community Businesses Opened TD Total': 'max',
-            'Crime Count': 'sum'
-        }).reset_index()
-        grouped = grouped.groupby(location_type).agg({
+        grouped = year_df.groupby(location_type, observed=True).agg({
             'Population Household': 'sum',
             'Median Assessed Value': 'mean',
             'Community Businesses Opened TD Total': 'sum',
             'Crime Count': 'sum'
         }).reset_index()
 
-    # Calculate per capita for the year
-    grouped['Crime per 1000'] = grouped['Crime Count'] / grouped['Population Household'] * 1000
-    grouped['Business Density'] = grouped['Community Businesses Opened TD Total'] / grouped['Population Household'] * 1000
+    # Calculate per capita for the year, regions without residents get nan instead of inf
+    population = grouped['Population Household'].where(grouped['Population Household'] > 0)
+    grouped['Crime per 1000'] = grouped['Crime Count'] / population * 1000
+    grouped['Business Density'] = grouped['Community Businesses Opened TD Total'] / population * 1000
 
     # Rank each column, skipping NaNs
     stat_cols = [
@@ -162,9 +211,8 @@ def location_year_summary(df, location, year, location_type):
 
     row = grouped[grouped[location_type] == location].iloc[0]
 
-    # Printing of the summary table
-    print(f"\nSummary for {location_type}: {location} ({year})")
-    print("-" * 60)
+    # Building of the summary table
+    lines = [f"\nSummary for {location_type}: {location} ({year})", "-" * 60]
 
     for col, label in zip(stat_cols, [
         "Total Population",
@@ -178,12 +226,29 @@ def location_year_summary(df, location, year, location_type):
         average = grouped[col].mean()
         rank = row[f'{col} Rank']
         total = grouped[col].notna().sum()
-        print(format_line(label, round(value, 2) if pd.notna(value) else value, average, rank, total))
+        lines.append(format_line(label, round(value, 2) if pd.notna(value) else value, average, rank, total))
+
+    # Crime incidents of each category group, from the cached category encoding of the whole DataFrame
+    if group_totals is None and df is not None and hierarchy_available():
+        group_totals = group_rollup(df, [location_type], rows=(df['Year'] == year).to_numpy())
+    if group_totals is not None:
+        # one row per location of the summary, locations without crime rows count zero
+        group_totals = group_totals.set_index(location_type).reindex(grouped[location_type]).fillna(0)
+        all_crime = row['Crime Count']
+        lines.append("-" * 60)
+        for group, count in group_totals.loc[location].items():
+            share = f"{count / all_crime:.1%}" if all_crime > 0 else "n/a"
+            lines.append(f"{group + ' Crime':<30}: {count:,.0f} ({share} of incidents)")
+        if category_group is not None:
+            counts = group_totals[category_group]
+            rank = counts.rank(ascending=False, method='min')[location]
+            lines.append(format_line(f"{category_group} Crime Incidents", counts[location], counts.mean(), rank, len(counts)))
 
-    print("-" * 60)
-    print("*Note: The larger the value, the higher the rank" \
+    lines.append("-" * 60)
+    lines.append("*Note: The larger the value, the higher the rank" \
     "\n**Notes: If the location type is a sector or ward, the Median Assessed Value"
     "\n         is an average of the communities within these regions")
+    return "\n".join(lines)
     
 
 def format_line(label, val, avg, rank, total):
@@ -0,0 +1,226 @@
+"""
+dataRefresh.py
+
+Background data-refresh watcher with atomic dataset swap.
+
+A DatasetHolder owns the current merged DataFrame and its annual fact table as one immutable
+DatasetSnapshot. A DataRefresher thread polls the source files in the data directory and, when one
+of them changes, rebuilds a complete new snapshot in the background while the current one keeps
+serving. The new snapshot replaces the old one in a single reference assignment between queries, so
+callers never see a half-built frame, and registered callbacks clear any derived caches. A new extract
+is picked up by replacing a source file or by dropping in a version with a later date stamp, see
+dataLoader.resolve_data_files(). A failed rebuild is queued for the caller to report between prompts.
+
+Example:
+    holder = DatasetHolder(build_snapshot())
+    holder.add_swap_listener(lambda snapshot: clear_region_cache())
+    refresher = DataRefresher(holder)
+    refresher.start()
+    ...
+    snapshot = holder.current()     # once per query
+    errors = refresher.pop_errors() # failed rebuilds since the last query
+"""
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from dataLoader import create_dataframe, create_annual_facts, resolve_data_files
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """
+    One fully built version of the dataset. Snapshots are never modified after they are created.
+
+    Instance variables:
+        df (pd.DataFrame): merged DataFrame returned by create_dataframe()
+        annual_df (pd.DataFrame): per community and year fact table from create_annual_facts(), or None
+                                  if the caller builds it separately
+        version (int): increases by one with every swap
+        signature (tuple): (file name, modified time, size) of each source file the snapshot was built from
+        validation_report (dict): dataValidator report of the build, None if it was not kept
+        loaded_at (float): time.time() when the build finished
+    """
+    df: pd.DataFrame
+    annual_df: pd.DataFrame = None
+    version: int = 0
+    signature: tuple = ()
+    validation_report: dict = None
+    loaded_at: float = field(default_factory=time.time)
+
+
+def source_signature(data_dir='data'):
+    """
+    Returns the modified time and size of every source file read by create_dataframe(). A newly
+    dropped extract with a later date stamp changes the file name of its source, and so the signature.
+
+    Parameters:
+        data_dir (str): directory containing the source files, see dataLoader.resolve_data_files()
+
+    Returns:
+        (tuple): (file name, modified time in ns, size) per file, None values for a missing file
+    """
+    signature = []
+    for file_name in sorted(resolve_data_files(data_dir).values()):
+        try:
+            stat = os.stat(os.path.join(data_dir, file_name))
+            signature.append((file_name, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((file_name, None, None))
+    return tuple(signature)
+
+
+def build_snapshot(data_dir='data', version=0):
+    """
+    Loads the source files and builds a complete DatasetSnapshot.
+
+    Parameters:
+        data_dir (str): directory containing the source files
+        version (int): version number given to the snapshot
+
+    Returns:
+        (DatasetSnapshot): the new snapshot
+    """
+    # the signature is read first, so a file changing during the build triggers another rebuild
+    signature = source_signature(data_dir)
+    df, report = create_dataframe(data_dir=data_dir, return_report=True)
+    return DatasetSnapshot(df=df, annual_df=create_annual_facts(df), version=version, signature=signature,
+                           validation_report=report)
+
+
+class DatasetHolder:
+    """
+    Holds the current DatasetSnapshot and swaps in new ones atomically.
+
+    Instance variables:
+        data_dir (str): directory the snapshots are built from
+    """
+
+    def __init__(self, snapshot, data_dir='data'):
+        self.data_dir = data_dir
+        self._snapshot = snapshot
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def current(self):
+        """
+        Returns the current snapshot. Callers should take one snapshot per query and use it throughout,
+        so a swap in the middle of a query does not mix two versions of the data.
+
+        Returns:
+            (DatasetSnapshot): the snapshot currently being served
+        """
+        return self._snapshot
+
+    def add_swap_listener(self, callback):
+        """
+        Registers a function called with the new snapshot after every swap, e.g. to clear caches
+        derived from the previous DataFrame.
+
+        Parameters:
+            callback (function): function taking the new DatasetSnapshot
+        """
+        self._listeners.append(callback)
+
+    def swap(self, df, annual_df, signature=(), validation_report=None):
+        """
+        Replaces the current snapshot with a new, fully built one and notifies the swap listeners.
+
+        Parameters:
+            df (pd.DataFrame): new merged DataFrame
+            annual_df (pd.DataFrame): new annual fact table built from df
+            signature (tuple): source signature the new data was built from
+            validation_report (dict): dataValidator report of the new data
+
+        Returns:
+            (DatasetSnapshot): the new snapshot
+        """
+        with self._lock:
+            snapshot = DatasetSnapshot(df=df, annual_df=annual_df,
+                                       version=self._snapshot.version + 1, signature=signature,
+                                       validation_report=validation_report)
+            # a single reference assignment, readers see either the old or the new snapshot
+            self._snapshot = snapshot
+        for callback in self._listeners:
+            callback(snapshot)
+        return snapshot
+
+
+class DataRefresher(threading.Thread):
+    """
+    Daemon thread that polls the source files and rebuilds the dataset in the background when one of
+    them changes. The current snapshot keeps serving after a failed rebuild, and the error is queued
+    for pop_errors() instead of being printed over whatever prompt the user is answering.
+
+    Instance variables:
+        holder (DatasetHolder): holder whose snapshot is replaced after a rebuild
+        interval (float): seconds between polls of the source files
+        last_error (Exception): error raised by the last failed rebuild, None after a successful one
+    """
+
+    def __init__(self, holder, interval=30.0):
+        super().__init__(name='data-refresher', daemon=True)
+        self.holder = holder
+        self.interval = interval
+        self.last_error = None
+        self._errors = queue.Queue()
+        self._failed_signature = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """
+        Polls until stop() is called.
+        """
+        while not self._stop_event.wait(self.interval):
+            self.check_now()
+
+    def check_now(self):
+        """
+        Rebuilds and swaps the dataset if the source files changed since the current snapshot was built.
+
+        Returns:
+            (bool): True if a new snapshot was swapped in
+        """
+        current = self.holder.current()
+        signature = source_signature(self.holder.data_dir)
+        if signature == current.signature:
+            return False
+        # skip while a file is missing, e.g. part way through being replaced, or files that already failed
+        if any(mtime is None for _, mtime, _ in signature) or signature == self._failed_signature:
+            return False
+
+        try:
+            snapshot = build_snapshot(self.holder.data_dir)
+        except Exception as e:
+            self.last_error = e
+            self._failed_signature = signature
+            self._errors.put(e)
+            return False
+
+        self.last_error = None
+        self.holder.swap(snapshot.df, snapshot.annual_df, snapshot.signature, snapshot.validation_report)
+        return True
+
+    def pop_errors(self):
+        """
+        Returns the errors of the rebuilds that failed since the last call, oldest first.
+
+        Returns:
+            (list): exceptions raised by the failed rebuilds
+        """
+        errors = []
+        while True:
+            try:
+                errors.append(self._errors.get_nowait())
+            except queue.Empty:
+                return errors
+
+    def stop(self):
+        """
+        Asks the thread to stop after the current poll.
+        """
+        self._stop_event.set()
@@ -0,0 +1,283 @@
+"""
+dataValidator.py
+
+Validation and reconciliation stage for the merged crime dataset.
+
+Checks are declared as rules in VALIDATION_RULES and run as vectorized pandas/NumPy operations over
+the merged DataFrame and the join keys of each source file. The result is a plain dict report that
+can be printed, written to JSON, or used by strict mode to stop the load.
+"""
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class DataValidationError(Exception):
+    """
+    Raised by validate_dataframe() in strict mode when one or more error level rules fail.
+
+    Instance variables:
+        report (dict): the full validation report that caused the failure
+    """
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+# Each rule is a dict with a unique name, the check type, a severity ('error' or 'warning') and the
+# parameters of that check. Thresholds are fractions between 0 and 1 unless noted otherwise.
+VALIDATION_RULES = [
+    # ----- key coverage of each source against the wards table -----
+    {'name': 'crime_communities_in_wards', 'type': 'key_coverage', 'severity': 'error',
+     'source': 'crime_community', 'reference': 'wards_name', 'min_coverage': 0.95},
+    {'name': 'business_communities_in_wards', 'type': 'key_coverage', 'severity': 'warning',
+     'source': 'business_code', 'reference': 'wards_code', 'min_coverage': 0.95},
+    {'name': 'assessment_communities_in_wards', 'type': 'key_coverage', 'severity': 'warning',
+     'source': 'assessment_code', 'reference': 'wards_code', 'min_coverage': 0.95},
+    {'name': 'census_communities_in_wards', 'type': 'key_coverage', 'severity': 'warning',
+     'source': 'census_code', 'reference': 'wards_code', 'min_coverage': 0.95},
+
+    # ----- rows lost while cleaning sources -----
+    {'name': 'census_rows_kept_after_dropna', 'type': 'row_retention', 'severity': 'warning',
+     'before': 'census_rows', 'after': 'census_rows_complete', 'min_retention': 0.90},
+
+    # ----- null and inf rates per column of the merged frame -----
+    {'name': 'sector_null_rate', 'type': 'null_rate', 'severity': 'error',
+     'column': 'Sector', 'max_rate': 0.05},
+    {'name': 'community_code_null_rate', 'type': 'null_rate', 'severity': 'error',
+     'column': 'Community Code', 'max_rate': 0.05},
+    {'name': 'population_null_rate', 'type': 'null_rate', 'severity': 'warning',
+     'column': 'Population Household', 'max_rate': 0.10},
+    {'name': 'assessed_value_null_rate', 'type': 'null_rate', 'severity': 'warning',
+     'column': 'Median Assessed Value', 'max_rate': 0.20},
+    {'name': 'crime_per_capita_inf_rate', 'type': 'inf_rate', 'severity': 'warning',
+     'column': 'Crime per Capita 1000', 'max_rate': 0.0},
+
+    # ----- month completeness per community and year -----
+    {'name': 'community_month_completeness', 'type': 'month_completeness', 'severity': 'warning',
+     'max_incomplete_rate': 0.25},
+
+    # ----- population sanity -----
+    {'name': 'population_not_negative', 'type': 'population_sanity', 'severity': 'error',
+     'column': 'Population Household', 'check': 'negative', 'max_rate': 0.0},
+    {'name': 'crime_with_zero_population', 'type': 'population_sanity', 'severity': 'warning',
+     'column': 'Population Household', 'check': 'zero_with_crime', 'max_rate': 0.02},
+]
+
+# number of example keys kept in the report for each failing check
+MAX_EXAMPLES = 20
+
+
+def validate_dataframe(final_df, source_keys=None, source_counts=None, rules=None, strict=False):
+    """
+    Runs every validation rule against the merged DataFrame and source keys and returns a report.
+
+    Parameters:
+        final_df (pd.DataFrame): The merged DataFrame produced by create_dataframe().
+        source_keys (dict): name -> array of join keys for each source, used by 'key_coverage' rules.
+        source_counts (dict): name -> row count, used by 'row_retention' rules.
+        rules (list): rule dicts to run, defaults to VALIDATION_RULES.
+        strict (bool): if True, raise DataValidationError when an error level rule fails.
+
+    Returns:
+        (dict): machine readable report with an overall 'passed' flag, counts by outcome and one
+                entry per rule with its measured value, threshold and example keys.
+    """
+    source_keys = source_keys or {}
+    source_counts = source_counts or {}
+    rules = VALIDATION_RULES if rules is None else rules
+
+    start = time.perf_counter()
+    results = []
+    for rule in rules:
+        check = _RULE_CHECKS.get(rule['type'])
+        if check is None:
+            raise ValueError(f"Unknown validation rule type: {rule['type']}")
+        try:
+            result = check(final_df, rule, source_keys, source_counts)
+        except KeyError as e:
+            # a missing column or source is reported as a skipped rule instead of stopping validation
+            result = {'passed': None, 'value': None, 'threshold': None, 'details': {'skipped': f"missing {e}"}}
+        results.append({'name': rule['name'], 'type': rule['type'], 'severity': rule['severity'], **result})
+
+    errors = [r for r in results if r['passed'] is False and r['severity'] == 'error']
+    warnings = [r for r in results if r['passed'] is False and r['severity'] == 'warning']
+    report = {
+        'passed': not errors,
+        'strict': strict,
+        'rows': int(len(final_df)),
+        'errors': len(errors),
+        'warnings': len(warnings),
+        'skipped': sum(r['passed'] is None for r in results),
+        'elapsed_seconds': round(time.perf_counter() - start, 4),
+        'rules': results,
+    }
+
+    if strict and errors:
+        names = ', '.join(r['name'] for r in errors)
+        raise DataValidationError(f"Data validation failed ({len(errors)} error(s)): {names}", report)
+    return report
+
+
+def print_validation_summary(report):
+    """
+    Prints a short summary of a validation report, listing any rule that did not pass.
+
+    Parameters:
+        report (dict): report returned by validate_dataframe()
+
+    Returns:
+        Prints the summary directly to the console.
+    """
+    print(f"Data validation: {report['errors']} error(s), {report['warnings']} warning(s), "
+          f"{report['skipped']} skipped ({report['elapsed_seconds']:.3f}s)")
+    for result in report['rules']:
+        if result['passed'] is False:
+            print(f"  [{result['severity'].upper()}] {result['name']}: {result['value']} "
+                  f"(threshold {result['threshold']})")
+
+
+def write_validation_report(report, filename='validation_report.json'):
+    """
+    Writes a validation report to a JSON file.
+
+    Parameters:
+        report (dict): report returned by validate_dataframe()
+        filename (str): path of the JSON file to write
+    """
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Validation report saved as: {filename}")
+
+
+# -------------------- Rule checks --------------------
+# Every check takes (final_df, rule, source_keys, source_counts) and returns a dict with
+# 'passed', 'value', 'threshold' and 'details'.
+
+def _check_key_coverage(final_df, rule, source_keys, source_counts):
+    """
+    Fraction of the distinct keys of one source that are found in a reference source.
+    """
+    keys = pd.Index(source_keys[rule['source']]).dropna().unique()
+    reference = pd.Index(source_keys[rule['reference']]).dropna().unique()
+    matched = keys.isin(reference)
+    coverage = float(matched.mean()) if len(keys) else 1.0
+    missing = keys[~matched]
+    return {
+        'passed': coverage >= rule['min_coverage'],
+        'value': round(coverage, 4),
+        'threshold': rule['min_coverage'],
+        'details': {'keys': int(len(keys)), 'unmatched': int(len(missing)),
+                    'unmatched_examples': _examples(missing)},
+    }
+
+
+def _check_row_retention(final_df, rule, source_keys, source_counts):
+    """
+    Fraction of rows of a source that were kept by a cleaning step.
+    """
+    before = source_counts[rule['before']]
+    after = source_counts[rule['after']]
+    retention = after / before if before else 1.0
+    return {
+        'passed': retention >= rule['min_retention'],
+        'value': round(float(retention), 4),
+        'threshold': rule['min_retention'],
+        'details': {'before': int(before), 'after': int(after), 'dropped': int(before - after)},
+    }
+
+
+def _check_null_rate(final_df, rule, source_keys, source_counts):
+    """
+    Fraction of merged rows with a missing (nan or blank) value in a column.
+    """
+    column = final_df[rule['column']]
+    missing = column.isna().to_numpy()
+    if column.dtype == object or isinstance(column.dtype, pd.StringDtype):
+        missing = missing | column.astype(str).str.strip().eq('').to_numpy()
+    rate = float(missing.mean()) if len(column) else 0.0
+    return {
+        'passed': rate <= rule['max_rate'],
+        'value': round(rate, 4),
+        'threshold': rule['max_rate'],
+        'details': {'missing_rows': int(missing.sum()),
+                    'community_examples': _examples(final_df.loc[missing, 'Community'].dropna().unique())},
+    }
+
+
+def _check_inf_rate(final_df, rule, source_keys, source_counts):
+    """
+    Fraction of merged rows with an infinite value in a numeric column.
+    """
+    values = pd.to_numeric(final_df[rule['column']], errors='coerce').to_numpy(dtype=float)
+    infinite = np.isinf(values)
+    rate = float(infinite.mean()) if len(values) else 0.0
+    return {
+        'passed': rate <= rule['max_rate'],
+        'value': round(rate, 4),
+        'threshold': rule['max_rate'],
+        'details': {'inf_rows': int(infinite.sum()),
+                    'community_examples': _examples(final_df.loc[infinite, 'Community'].dropna().unique())},
+    }
+
+
+def _check_month_completeness(final_df, rule, source_keys, source_counts):
+    """
+    Fraction of (Community, Year) pairs with crime data that are missing one or more months. The last
+    year in the data is only expected to have the months that appear anywhere in that year.
+    """
+    crime_rows = final_df[final_df['Category'].notna()]
+    months = crime_rows.groupby(['Community', 'Year'], observed=True)['Month'].nunique()
+    expected = crime_rows.groupby('Year', observed=True)['Month'].nunique()
+    expected = expected.reindex(months.index.get_level_values('Year')).to_numpy()
+    incomplete = months.to_numpy() < expected
+    rate = float(incomplete.mean()) if len(months) else 0.0
+    return {
+        'passed': rate <= rule['max_incomplete_rate'],
+        'value': round(rate, 4),
+        'threshold': rule['max_incomplete_rate'],
+        'details': {'community_years': int(len(months)), 'incomplete': int(incomplete.sum()),
+                    'incomplete_examples': _examples([f"{c} {y}" for c, y in months.index[incomplete]])},
+    }
+
+
+def _check_population_sanity(final_df, rule, source_keys, source_counts):
+    """
+    Fraction of merged rows with an impossible or suspicious population value.
+    """
+    population = pd.to_numeric(final_df[rule['column']], errors='coerce').to_numpy(dtype=float)
+    if rule['check'] == 'negative':
+        flagged = population < 0
+    elif rule['check'] == 'zero_with_crime':
+        crime = pd.to_numeric(final_df['Crime Count'], errors='coerce').to_numpy(dtype=float)
+        flagged = (population == 0) & (crime > 0)
+    else:
+        raise ValueError(f"Unknown population check: {rule['check']}")
+    rate = float(flagged.mean()) if len(population) else 0.0
+    return {
+        'passed': rate <= rule['max_rate'],
+        'value': round(rate, 4),
+        'threshold': rule['max_rate'],
+        'details': {'flagged_rows': int(flagged.sum()),
+                    'community_examples': _examples(final_df.loc[flagged, 'Community'].dropna().unique())},
+    }
+
+
+def _examples(values):
+    """
+    Returns up to MAX_EXAMPLES values as a JSON friendly list of strings.
+    """
+    return [str(v) for v in list(values)[:MAX_EXAMPLES]]
+
+
+_RULE_CHECKS = {
+    'key_coverage': _check_key_coverage,
+    'row_retention': _check_row_retention,
+    'null_rate': _check_null_rate,
+    'inf_rate': _check_inf_rate,
+    'month_completeness': _check_month_completeness,
+    'population_sanity': _check_population_sanity,
+}
@@ -2,58 +2,80 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
+from matplotlib import _pylab_helpers
+from matplotlib.figure import Figure
+from matplotlib.backend_bases import key_press_handler
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import tkinter as tk
 from tkinter import ttk
+from matplotlib.collections import PathCollection
+
+from dataLoader import create_annual_facts
+from dataAnalytics import RELATIONSHIPS, fit_line
+from regionIndex import get_region_index
+from communityBoundaries import load_boundaries
+from crimeForecast import HORIZON, dataset_periods, monthly_matrix, fit_forecasts
+from categoryHierarchy import filter_group, group_mask, group_rollup, hierarchy_available
+
+# hidden Tk root of the region picker, created on first use so the module can be imported without a display
+_root = None
+
+# number of rows inserted into the region picker at a time, more are added while scrolling
+PICKER_BATCH_SIZE = 50
+
+# metrics the choropleth map can shade communities by, cycled with the 'm' key
+CHOROPLETH_METRICS = ['Crime Count', 'Crime per Capita 1000', 'Business Density']
+
+# keys used by the choropleth map, kept away from matplotlib's default bindings (left/right step the view history)
+CHOROPLETH_KEYS = ('left', 'right', 'm')
+
+
+def _tk_root():
+    """
+    Returns the hidden Tk root window, creating it the first time a Tk window is opened.
+    """
+    global _root
+    if _root is None:
+        _root = tk.Tk()
+        _root.withdraw()
+    return _root
 
-root = tk.Tk()
-root.withdraw()
 
 def show_regions_available(final_df, location_type):
     """
-    Displays a popup table listing valid region values based on location_type.
-    Only 'Community' table includes a No. column for row numbering.
+    Displays a searchable popup table listing valid region values based on location_type and
+    waits for the user to pick one. Typing in the search box filters the list by prefix (name or
+    code for communities), and rows are inserted in batches as the list is scrolled so the window
+    opens instantly at any list size. Only 'Community' table includes a No. column for row numbering.
 
     Parameters:
         final_df (pd.dataframe): DataFrame with merged dataset.
         location_type (str): 'Community', 'Ward Number', or 'Sector'
 
     Returns:
-        Opens a tk window to display a list or table of the available regions that can be entered in.
+        (str): the community name, ward number or sector picked (double click or Enter), or None if
+               the window was closed without picking one
     """
-    # filter based on the conditions of no nan values and removing duplicates, dependent on location type
-    if location_type == 'Community':
-        region_df = final_df[['Community Code', 'Community']].dropna()
-        region_df = region_df.drop_duplicates().sort_values('Community')
-        columns = ('No.', 'Community Code', 'Community')
-        headings = ['No.', 'Code', 'Community']
-        values = region_df[['Community Code', 'Community']].values.tolist()
-
-    elif location_type == 'Ward Number':
-        region_df = final_df[['Ward Number']].dropna()
-        region_df = region_df[region_df['Ward Number'].apply(lambda x: str(x).isdigit())]
-        region_df['Ward Number'] = region_df['Ward Number'].astype(int)
-        region_df = region_df.drop_duplicates().sort_values('Ward Number')
-        columns = ('Ward Number',)
-        headings = ['Ward Number']
-        values = region_df.values.tolist()
-
-    elif location_type == 'Sector':
-        region_df = final_df[['Sector']].dropna()
-        region_df = region_df.drop_duplicates().sort_values('Sector')
-        columns = ('Sector',)
-        headings = ['Sector']
-        values = region_df.values.tolist()
+    try:
+        index = get_region_index(final_df, location_type)
+    except KeyError as e:
+        print(e.args[0])
+        return None
 
-    else:
-        print(f"Invalid location type: {location_type}")
-        return
-    
     # Create Toplevel window
-    window = tk.Toplevel()
+    window = tk.Toplevel(_tk_root())
     window.title(f"Valid {location_type}s")
     window.geometry("800x400")
     window.attributes("-topmost", True)
 
+    # Search box for type-ahead filtering
+    search_text = tk.StringVar()
+    search_frame = tk.Frame(window)
+    search_frame.pack(fill='x')
+    tk.Label(search_frame, text="Search (double click or press Enter to select):").pack(side='left')
+    search_entry = tk.Entry(search_frame, textvariable=search_text)
+    search_entry.pack(side='left', fill='x', expand=True)
+
     # Frame to contain Treeview and Scrollbar
     frame = tk.Frame(window)
     frame.pack(fill='both', expand=True)
@@ -63,26 +85,57 @@ def show_regions_available(final_df, location_type):
     frame.grid_columnconfigure(0, weight=1)
 
     # Create Treeview
-    tree = ttk.Treeview(frame, columns=columns, show='headings')
-    for col, heading in zip(columns, headings):
+    tree = ttk.Treeview(frame, columns=index.columns, show='headings', selectmode='browse')
+    for col, heading in zip(index.columns, index.headings):
         tree.heading(col, text=heading)
         tree.column(col, anchor='w')
 
-    for idx, row in enumerate(values, start=1):
-        if location_type == 'Community':
-            tree.insert('', 'end', values=(idx, *row))
-        else:
-            tree.insert('', 'end', values=(row[0],))
+    # rows matching the current search and how many of them have been inserted so far
+    state = {'matches': index.search(''), 'inserted': 0, 'selected': None}
+
+    def insert_batch():
+        # lazily insert the next batch of matching rows
+        start = state['inserted']
+        for row in state['matches'][start:start + PICKER_BATCH_SIZE]:
+            tree.insert('', 'end', iid=str(row), values=index.rows[row])
+        state['inserted'] = min(len(state['matches']), start + PICKER_BATCH_SIZE)
+
+    def on_scroll(first, last):
+        scrollbar.set(first, last)
+        # load more rows when the view gets close to the end of the inserted rows
+        if float(last) > 0.9 and state['inserted'] < len(state['matches']):
+            insert_batch()
+
+    def on_search(*args):
+        tree.delete(*tree.get_children())
+        state['matches'] = index.search(search_text.get())
+        state['inserted'] = 0
+        insert_batch()
+
+    def on_select(event=None):
+        chosen = tree.focus() or (tree.get_children()[0] if len(state['matches']) == 1 else '')
+        if chosen:
+            state['selected'] = index.values[int(chosen)]
+            window.destroy()
 
     # Scrollbar and placement
     scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
+    tree.configure(yscrollcommand=on_scroll)
 
     tree.grid(row=0, column=0, sticky='nsew')
     scrollbar.grid(row=0, column=1, sticky='ns')
 
-    # Keeps window open and program to continue
-    window.after(100, lambda: None)
+    search_text.trace_add('write', on_search)
+    tree.bind('<Double-1>', on_select)
+    tree.bind('<Return>', on_select)
+    search_entry.bind('<Return>', on_select)
+    insert_batch()
+
+    # Waits for the user to pick a region or close the window
+    search_entry.focus_set()
+    window.grab_set()
+    window.wait_window()
+    return state['selected']
 
 
 def show_maps():
@@ -112,48 +165,110 @@ def show_maps():
     plt.show(block = False)
     
 
-def plot_crime_category(final_df, location, year, location_type):
+def new_figure(**kwargs):
     """
-    Creates two subplots: total crime count per category for the specified location and year, 
-    and a line plot of total crime count for all categories per year in Calgary. Also prints 
-    out a pivot table in the console showing crime category counts by month
+    Creates a Figure outside of pyplot with its own Agg canvas, so a plot can be drawn in a worker
+    thread. show_figure() hands it to pyplot on the main thread.
+
+    Parameters:
+        **kwargs: keyword arguments passed on to matplotlib.figure.Figure, e.g. figsize
+
+    Returns:
+        (Figure): the new, empty figure
+    """
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def show_figure(fig):
+    """
+    Opens a window for a figure from new_figure() and makes it the current pyplot figure, so
+    plt.gcf() (used by save_plot) and plt.close() act on it. Must be called on the main thread.
+
+    Parameters:
+        fig (Figure): figure drawn by one of the figure_* functions
+
+    Returns:
+        Opens a plt window displaying the figure.
+    """
+    try:
+        plt.figure(fig)
+    except (TypeError, ValueError):
+        # pyplot adopts a figure it did not create only from matplotlib 3.10 on, older versions get a
+        # window for it from the backend directly
+        num = max(plt.get_fignums(), default=0) + 1
+        manager = plt._get_backend_mod().new_figure_manager_given_figure(num, fig)
+        _pylab_helpers.Gcf._set_new_active_manager(manager)
+    plt.show(block=False)
+
+
+def _plot_lines(ax, table, marker='o'):
+    """
+    Draws one line per column of a table against its index, labelled with the column name.
+    """
+    for column in table.columns:
+        ax.plot(table.index, table[column], marker=marker, label=str(column))
+
+
+def prepare_crime_category(final_df, location, year, location_type, category_group=None):
+    """
+    Computes the data behind plot_crime_category without drawing or printing anything, so it can run
+    in a worker thread ahead of time.
 
     Parameters:
         final_df (DataFrame): The DataFrame containing the cleaned and merged data.
         location (str): The specific location (community, ward, or sector) to filter the data.
         year (int): The year to filter the data.
         location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
-        
+        category_group (str): Optional category group from categoryHierarchy, only its categories are used.
+
     Returns:
-        Opens a plt window displaying the plots and prints a pivot table to the console
+        (dict): 'crime_by_category' totals for the location and year, 'pivot_table_year' city totals by
+                year and category, 'renamed_pivot' monthly pivot with numbered columns, 'category_map',
+                'crime_by_group' totals per category group of all categories and 'category_group'
     """
-    # Create 2 subplots for Figure 1
-    fig, axes = plt.subplots(nrows=2, ncols=1, figsize=(10, 9))
+    location_rows = ((final_df[location_type] == location) & (final_df['Year'] == year)).to_numpy()
 
-    # ----- PLOT 1.1: TOTAL CRIME COUNT PER CATEGORY FOR SPECIFIED COMMUNITY AND YEAR -----
-    subset = final_df[(final_df[location_type] == location) & (final_df['Year'] == year)]
-    crime_by_category = subset.groupby('Category')['Crime Count'].sum().reset_index()
-    crime_by_category = crime_by_category.sort_values(by='Crime Count', ascending=False)
+    # group totals count every category, so they are rolled up before the rows are narrowed to the chosen group
+    crime_by_group = None
+    if hierarchy_available():
+        crime_by_group = group_rollup(final_df, [], rows=location_rows).iloc[0]
 
-    axes[0].bar(crime_by_category['Category'], crime_by_category['Crime Count'])
-    axes[0].set_title(f'Total Crime by Category in {location_type} {location} ({year})')
-    axes[0].set_xlabel('Crime Category')
-    axes[0].set_ylabel('Total Crime Count')
-    axes[0].tick_params(axis='x', rotation=45)
-    axes[0].grid(axis='y')
+    if category_group is not None:
+        in_group = group_mask(final_df, category_group)
+        final_df, location_rows = final_df[in_group], location_rows[in_group]
 
-    # ----- PLOT 1.2: LINE PLOT TOTAL CRIME COUNT PER YEAR ALL CATEGORIES -----
+    # ----- DATA 1.1: TOTAL CRIME COUNT PER CATEGORY FOR SPECIFIED COMMUNITY AND YEAR -----
+    subset = final_df[location_rows]
+
+    # ----- DATA 1.2: TOTAL CRIME COUNT PER YEAR ALL CATEGORIES -----
     total_crime_category = final_df.groupby(['Category', 'Year'])['Crime Count'].sum().reset_index()
-    pivot_table_year = total_crime_category.pivot(index='Year', columns='Category', values='Crime Count')
 
-    pivot_table_year.plot(ax=axes[1], marker='o')
-    axes[1].set_title('Total Crime Count Per Year (For all of Calgary)')
-    axes[1].set_xlabel('Year')
-    axes[1].set_ylabel('Total Crime Count')
-    axes[1].grid(True)
-    axes[1].legend(title='Crime Category', bbox_to_anchor=(1, 1), loc='upper left')
+    return crime_category_tables(subset, total_crime_category, category_group, crime_by_group)
 
-    # --- PRINT PIVOT TABLE OF CATEGORY BY MONTH ---
+
+def crime_category_tables(subset, total_crime_category, category_group=None, crime_by_group=None):
+    """
+    Builds the tables of prepare_crime_category from already filtered rows, so other data sources
+    (e.g. sqliteStore.SqliteStore) can produce the same result from pre-aggregated rows.
+
+    Parameters:
+        subset (DataFrame): rows of the chosen location and year with 'Month', 'Category' and 'Crime Count'
+        total_crime_category (DataFrame): city 'Crime Count' per 'Category' and 'Year'
+        category_group (str): category group the rows were filtered to, None for all categories
+        crime_by_group (pd.Series): crime count per category group of the location and year over all
+                                    categories, None if there is no category config
+
+    Returns:
+        (dict): see prepare_crime_category()
+    """
+    crime_by_category = subset.groupby('Category')['Crime Count'].sum().reset_index()
+    crime_by_category = crime_by_category.sort_values(by='Crime Count', ascending=False)
+
+    pivot_table_year = total_crime_category.pivot(index='Year', columns='Category', values='Crime Count')
+
+    # --- PIVOT TABLE OF CATEGORY BY MONTH ---
 
     # Pivot table: Months as index, numbered category columns as values
     pivot = subset.pivot_table(index='Month', columns='Category', values='Crime Count', aggfunc='sum', fill_value=0)
@@ -175,49 +290,182 @@ def plot_crime_category(final_df, location, year, location_type):
     total_row.index = ['Total']
     renamed_pivot = pd.concat([renamed_pivot, total_row])
 
+    return {
+        'crime_by_category': crime_by_category,
+        'pivot_table_year': pivot_table_year,
+        'renamed_pivot': renamed_pivot,
+        'category_map': category_map,
+        'crime_by_group': crime_by_group,
+        'category_group': category_group,
+    }
+
+
+def figure_crime_category(prepared, location, year, location_type):
+    """
+    Draws the two crime category subplots of plot_crime_category() into a new figure without using
+    pyplot, so it can run in a worker thread.
+
+    Parameters:
+        prepared (dict): result of prepare_crime_category()
+        location (str): The specific location (community, ward, or sector) chosen.
+        year (int): The year chosen.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+
+    Returns:
+        (Figure): the drawn figure
+    """
+    crime_by_category = prepared['crime_by_category']
+    pivot_table_year = prepared['pivot_table_year']
+    group_label = _group_label(prepared)
+
+    # Create 2 subplots for Figure 1
+    fig = new_figure(figsize=(10, 9))
+    axes = fig.subplots(nrows=2, ncols=1)
+
+    # ----- PLOT 1.1: TOTAL CRIME COUNT PER CATEGORY FOR SPECIFIED COMMUNITY AND YEAR -----
+    axes[0].bar(crime_by_category['Category'], crime_by_category['Crime Count'])
+    axes[0].set_title(f'Total{group_label} Crime by Category in {location_type} {location} ({year})')
+    axes[0].set_xlabel('Crime Category')
+    axes[0].set_ylabel('Total Crime Count')
+    axes[0].tick_params(axis='x', rotation=45)
+    axes[0].grid(axis='y')
+
+    # ----- PLOT 1.2: LINE PLOT TOTAL CRIME COUNT PER YEAR ALL CATEGORIES -----
+    _plot_lines(axes[1], pivot_table_year)
+    axes[1].set_title(f'Total{group_label} Crime Count Per Year (For all of Calgary)')
+    axes[1].set_xlabel('Year')
+    axes[1].set_ylabel('Total Crime Count')
+    axes[1].grid(True)
+    axes[1].legend(title='Crime Category', bbox_to_anchor=(1, 1), loc='upper left')
+
+    # Layout fix
+    fig.tight_layout()
+    return fig
+
+
+def plot_crime_category(final_df, location, year, location_type, prepared=None, figure=None):
+    """
+    Creates two subplots: total crime count per category for the specified location and year, 
+    and a line plot of total crime count for all categories per year in Calgary. Also prints 
+    out a pivot table in the console showing crime category counts by month
+
+    Parameters:
+        final_df (DataFrame): The DataFrame containing the cleaned and merged data.
+        location (str): The specific location (community, ward, or sector) to filter the data.
+        year (int): The year to filter the data.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        prepared (dict): Optional result of prepare_crime_category(), computed here if not given.
+        figure (Figure): Optional result of figure_crime_category(), drawn here if not given.
+        
+    Returns:
+        Opens a plt window displaying the plots and prints a pivot table to the console
+    """
+    if prepared is None:
+        prepared = prepare_crime_category(final_df, location, year, location_type)
+    if figure is None:
+        figure = figure_crime_category(prepared, location, year, location_type)
+
+    # --- PRINT PIVOT TABLE OF CATEGORY BY MONTH ---
     print(f"\nMonthly Crime Count Table for {location_type} {location} ({year}):")
-    print(renamed_pivot)
+    print(prepared['renamed_pivot'])
 
     # Prints numeric column headers legend
     print("\nCategory Legend:")
-    for category, number in category_map.items():
+    for category, number in prepared['category_map'].items():
         print(f" {number}: {category}")
+
+    # Prints totals of each category group over all categories, a category can be in more than one group
+    if prepared.get('crime_by_group') is not None:
+        print("\nCategory Group Totals (all categories):")
+        for group, total in prepared['crime_by_group'].items():
+            chosen = " (chosen group)" if group == prepared.get('category_group') else ""
+            print(f" {group}: {total:,.0f}{chosen}")
     print()
 
-    # Layout fix
-    plt.tight_layout()
-    plt.show(block=False)
+    show_figure(figure)
 
 
-def plot_crime_count(final_df, location, year, location_type):
+def prepare_crime_count(final_df, location, year, location_type, category_group=None):
     """
-    Creates two subplots: total crime count per month for the specified location and year, 
-    and a line plot of total crime per month across all years in Calgary.
+    Computes the data behind plot_crime_count without drawing anything, so it can run in a worker thread.
 
     Parameters:
         final_df (DataFrame): The DataFrame containing the cleaned and merged data.
         location (str): The specific location (community, ward, or sector) to filter the data.
         year (int): The year to filter the data.
         location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
-        
+        category_group (str): Optional category group from categoryHierarchy, only its categories are counted.
+
     Returns:
-        Opens a plt window displaying the plots.
+        (dict): 'monthly_crime' totals per month for the location and year, 'pivot_table' city totals
+                with months as rows and years as columns, and 'category_group'
     """
-    # ----- PLOT 2.1: TOTAL CRIME COUNT PER MONTH -----
+    final_df = filter_group(final_df, category_group)
 
-    # Create 2 subplots for Figure 2
-    fig, axes = plt.subplots(nrows=2, ncols=1, figsize=(10, 9))  
+    # ----- DATA 2.1: TOTAL CRIME COUNT PER MONTH -----
 
     # Filter data frame
     subset = final_df[(final_df[location_type] == location) & (final_df['Year'] == year)]
 
+    # ----- DATA 2.2: CRIME TREND BY MONTH ACROSS YEARS -----
+
+    # Group by Year and Month, then sum Crime Count
+    crime_month = final_df.groupby(['Year', 'Month'])['Crime Count'].sum().reset_index()
+
+    return crime_count_tables(subset, crime_month, category_group)
+
+
+def crime_count_tables(subset, crime_month, category_group=None):
+    """
+    Builds the tables of prepare_crime_count from already filtered rows, so other data sources
+    (e.g. sqliteStore.SqliteStore) can produce the same result from pre-aggregated rows.
+
+    Parameters:
+        subset (DataFrame): rows of the chosen location and year with 'Month' and 'Crime Count'
+        crime_month (DataFrame): city 'Crime Count' per 'Year' and 'Month'
+        category_group (str): category group the rows were filtered to, None for all categories
+
+    Returns:
+        (dict): see prepare_crime_count()
+    """
     # Group by Month and sum Crime Count
     monthly_crime = subset.groupby('Month')['Crime Count'].sum().reset_index()
     monthly_crime = monthly_crime.sort_values(by='Month')
 
+    # Pivot table so rows = Month, columns = Year
+    pivot_table = crime_month.pivot(index='Month', columns='Year', values='Crime Count')
+    pivot_table = pivot_table.replace(0, np.nan).dropna(axis=1, how='all')
+
+    return {'monthly_crime': monthly_crime, 'pivot_table': pivot_table, 'category_group': category_group}
+
+
+def figure_crime_count(prepared, location, year, location_type):
+    """
+    Draws the two crime count subplots of plot_crime_count() into a new figure without using pyplot,
+    so it can run in a worker thread.
+
+    Parameters:
+        prepared (dict): result of prepare_crime_count()
+        location (str): The specific location (community, ward, or sector) chosen.
+        year (int): The year chosen.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+
+    Returns:
+        (Figure): the drawn figure
+    """
+    monthly_crime = prepared['monthly_crime']
+    pivot_table = prepared['pivot_table']
+    group_label = _group_label(prepared)
+
+    # ----- PLOT 2.1: TOTAL CRIME COUNT PER MONTH -----
+
+    # Create 2 subplots for Figure 2
+    fig = new_figure(figsize=(10, 9))
+    axes = fig.subplots(nrows=2, ncols=1)
+
     # Plot on first subplot
     axes[0].bar(monthly_crime['Month'], monthly_crime['Crime Count'])
-    axes[0].set_title(f'Total Crime Count per Month in {location_type} {location} ({year})')
+    axes[0].set_title(f'Total{group_label} Crime Count per Month in {location_type} {location} ({year})')
     axes[0].set_xlabel('Month')
     axes[0].set_ylabel('Total Crime Count')
     axes[0].set_xticks(range(1, 13))
@@ -225,145 +473,539 @@ def plot_crime_count(final_df, location, year, location_type):
 
     # ----- PLOT 2.2: CRIME TREND BY MONTH ACROSS YEARS -----
 
-    # Group by Year and Month, then sum Crime Count
-    crime_month = final_df.groupby(['Year', 'Month'])['Crime Count'].sum().reset_index()
-
-    # Pivot table so rows = Month, columns = Year
-    pivot_table = crime_month.pivot(index='Month', columns='Year', values='Crime Count')
-    pivot_table = pivot_table.replace(0, np.nan).dropna(axis=1, how='all')
-
     # Plot on second subplot
-    pivot_table.plot(kind='line', marker='o', ax=axes[1])
+    _plot_lines(axes[1], pivot_table)
 
-    axes[1].set_title('Total Crime Per Month by Year (For all of Calgary)')
+    axes[1].set_title(f'Total{group_label} Crime Per Month by Year (For all of Calgary)')
     axes[1].set_xlabel('Month')
     axes[1].set_ylabel('Total Crime Count')
     axes[1].set_xticks(range(1, 13))
     axes[1].grid(True)
     axes[1].legend(title='Year', bbox_to_anchor=(1.05, 1), loc='upper left')
 
-    # Plot
-    plt.tight_layout()
-    plt.show(block=False)
+    fig.tight_layout()
+    return fig
 
 
-def plot_cc_vs_mdv(final_df, location, year, location_type):
+def plot_crime_count(final_df, location, year, location_type, prepared=None, figure=None):
     """
-    Creates a scatter plot of median assessed values versus crime per capita for the specified location and year.
+    Creates two subplots: total crime count per month for the specified location and year, 
+    and a line plot of total crime per month across all years in Calgary.
 
     Parameters:
         final_df (DataFrame): The DataFrame containing the cleaned and merged data.
         location (str): The specific location (community, ward, or sector) to filter the data.
         year (int): The year to filter the data.
         location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        prepared (dict): Optional result of prepare_crime_count(), computed here if not given.
+        figure (Figure): Optional result of figure_crime_count(), drawn here if not given.
         
     Returns:
-        Opens a plt window displaying the scatter plot.
+        Opens a plt window displaying the plots.
     """
+    if figure is None:
+        if prepared is None:
+            prepared = prepare_crime_count(final_df, location, year, location_type)
+        figure = figure_crime_count(prepared, location, year, location_type)
+    show_figure(figure)
 
-    # ----- PLOT 3: MEDIAN ASSESSED VALUES VERSUS CRIME PER CAPITA -----
 
-    # Filter data for the selected year
-    filtered_df = final_df[final_df['Year'] == year]
+def prepare_crime_forecast(final_df, location, year, location_type, model='linear_trend', category_group=None):
+    """
+    Computes the monthly crime history of the location and its forecast for the following months
+    without drawing anything, so it can run in a worker thread.
+
+    Parameters:
+        final_df (DataFrame): The DataFrame containing the cleaned and merged data.
+        location (str): The specific location (community, ward, or sector) to forecast.
+        year (int): The year chosen, highlighted in the history.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        model (str): forecast model name from crimeForecast.FORECAST_MODELS
+        category_group (str): Optional category group from categoryHierarchy, only its categories are forecast.
+
+    Returns:
+        (dict): see crime_forecast_tables()
+    """
+    # the history runs to the last month of the whole dataset, so the forecast starts right after it
+    periods = dataset_periods(final_df)
+    final_df = filter_group(final_df, category_group)
+    subset = final_df[final_df[location_type] == location]
+    monthly = subset.groupby(['Year', 'Month'])['Crime Count'].sum().reset_index()
+    return crime_forecast_tables(monthly, model, category_group, periods)
+
+
+def crime_forecast_tables(monthly, model='linear_trend', category_group=None, periods=None):
+    """
+    Fits the forecast of one location from its monthly crime counts, so other data sources
+    (e.g. sqliteStore.SqliteStore) can produce the same result from pre-aggregated rows.
+
+    Parameters:
+        monthly (DataFrame): 'Year', 'Month' and 'Crime Count' of the location
+        model (str): forecast model name from crimeForecast.FORECAST_MODELS
+        category_group (str): category group the rows were filtered to, None for all categories
+        periods (tuple): (first, last) month of the whole dataset from crimeForecast.dataset_periods(), months
+                         of the location without crime count zero. Defaults to the location's own range.
+
+    Returns:
+        (dict): 'history' with Date and Crime Count per month, 'forecast' with Date, Forecast, Lower and
+                Upper for the next months (empty if there is too little history), 'model' and 'category_group'
+    """
+    _, first_period, matrix = monthly_matrix(monthly, periods=periods)
+    periods = first_period + np.arange(matrix.shape[1])
+    history = pd.DataFrame({'Date': _period_dates(periods), 'Crime Count': matrix[0] if len(matrix) else []})
+
+    fits = fit_forecasts(matrix, first_period, HORIZON, [model]) if len(matrix) else {}
+    if model in fits:
+        future = first_period + matrix.shape[1] + np.arange(HORIZON)
+        forecast, lower, upper = (values[0] for values in fits[model])
+        forecast = pd.DataFrame({'Date': _period_dates(future), 'Forecast': forecast, 'Lower': lower, 'Upper': upper})
+    else:
+        forecast = pd.DataFrame(columns=['Date', 'Forecast', 'Lower', 'Upper'])
+    return {'history': history, 'forecast': forecast, 'model': model, 'category_group': category_group}
+
+
+def _group_label(prepared):
+    """
+    Returns ' <group>' for titles of plots filtered to a category group, '' otherwise.
+    """
+    return f" {prepared['category_group']}" if prepared.get('category_group') else ''
 
-    # Group by Community
-    agg_dict = {
-        'Community Code': 'first',
-        'Median Assessed Value': 'first',
-        'Crime per Capita 1000': 'first',
-    }
 
-    if location_type not in ['Community']:
-        agg_dict[location_type] = 'first'
+def _period_dates(periods):
+    """
+    Converts year * 12 + month - 1 periods to month start dates for plotting.
+    """
+    return pd.to_datetime({'year': periods // 12, 'month': periods % 12 + 1, 'day': 1})
 
-    scatter_df = filtered_df.groupby(['Community']).agg(agg_dict).reset_index()
+
+def figure_crime_forecast(prepared, location, year, location_type):
+    """
+    Draws the monthly crime count and forecast plot of plot_crime_forecast() into a new figure without
+    using pyplot, so it can run in a worker thread.
+
+    Parameters:
+        prepared (dict): result of prepare_crime_forecast()
+        location (str): The specific location (community, ward, or sector) chosen.
+        year (int): The year to highlight.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+
+    Returns:
+        (Figure): the drawn figure
+    """
+    # ----- PLOT 2.3: CRIME COUNT PER MONTH WITH FORECAST -----
+    history = prepared['history']
+    forecast = prepared['forecast']
+
+    fig = new_figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.plot(history['Date'], history['Crime Count'], marker='o', markersize=3, label='Crime Count')
+    if not forecast.empty:
+        # forecast line starts at the last observed month so it reads as a continuation
+        dates = pd.concat([history['Date'].tail(1), forecast['Date']])
+        values = np.concatenate([history['Crime Count'].tail(1), forecast['Forecast']])
+        ax.plot(dates, values, color='tab:orange', linestyle='--', marker='o', markersize=3,
+                label=f"Forecast ({prepared['model'].replace('_', ' ')})")
+        ax.fill_between(forecast['Date'], forecast['Lower'], forecast['Upper'], color='tab:orange', alpha=0.2,
+                        label='95% prediction interval')
+    ax.axvspan(pd.Timestamp(f"{year}-01-01"), pd.Timestamp(f"{year}-12-31"), color='grey', alpha=0.15, label=str(year))
+
+    ax.set_title(f'{_group_label(prepared).strip()} Crime Count per Month and 12 Month Forecast in {location_type} {location}'.strip())
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Total Crime Count')
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def plot_crime_forecast(final_df, location, year, location_type, prepared=None, figure=None):
+    """
+    Creates a line plot of the monthly crime count of the specified location across all years, continued
+    with the forecast of the next 12 months and its prediction interval. The chosen year is shaded.
+
+    Parameters:
+        final_df (DataFrame): The DataFrame containing the cleaned and merged data.
+        location (str): The specific location (community, ward, or sector) to filter the data.
+        year (int): The year to highlight.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        prepared (dict): Optional result of prepare_crime_forecast(), computed here if not given.
+        figure (Figure): Optional result of figure_crime_forecast(), drawn here if not given.
+
+    Returns:
+        Opens a plt window displaying the plot.
+    """
+    if figure is None:
+        if prepared is None:
+            prepared = prepare_crime_forecast(final_df, location, year, location_type)
+        figure = figure_crime_forecast(prepared, location, year, location_type)
+    show_figure(figure)
+
+
+def prepare_scatter(final_df, location, year, location_type, annual_df=None):
+    """
+    Selects the per community rows used by plot_cc_vs_mdv and plot_cc_vs_bc for the chosen year,
+    without drawing anything, so it can run in a worker thread.
+
+    Parameters:
+        final_df (DataFrame): The DataFrame containing the cleaned and merged data.
+        location (str): The specific location (community, ward, or sector) to highlight.
+        year (int): The year to filter the data.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        annual_df (DataFrame): Optional per community and year fact table from create_annual_facts(),
+                               built from final_df if not given.
+
+    Returns:
+        (dict): 'scatter_df' with one row per community for the year, 'highlight' with the rows
+                belonging to the chosen location, and 'fits' with the OLS fit across all communities
+                for each relationship in dataAnalytics.RELATIONSHIPS
+    """
+    if annual_df is None:
+        annual_df = create_annual_facts(final_df)
+
+    # Fact table already has one row per community, filter for the selected year
+    scatter_df = annual_df[annual_df['Year'] == year]
+    highlight = scatter_df[scatter_df[location_type] == location]
+
+    # line of best fit across all communities for each scatter plot
+    fits = {name: fit_line(scatter_df[x_col], scatter_df[y_col]) for name, (x_col, y_col) in RELATIONSHIPS.items()}
+    return {'scatter_df': scatter_df, 'highlight': highlight, 'fits': fits}
+
+
+def draw_fit_line(ax, fit, x_values):
+    """
+    Overlays an OLS fit from dataAnalytics.fit_line() on a scatter plot.
+
+    Parameters:
+        ax (Axes): axes of the scatter plot
+        fit (dict): 'slope', 'intercept' and 'r' of the fit, nothing is drawn if None
+        x_values (pd.Series): x values of the scatter, used for the extent of the line
+
+    Returns:
+        Draws the line on ax.
+    """
+    if fit is None:
+        return
+    x_values = pd.to_numeric(x_values, errors='coerce').replace([np.inf, -np.inf], np.nan).dropna()
+    x_line = np.linspace(x_values.min(), x_values.max(), 2)
+    ax.plot(x_line, fit['intercept'] + fit['slope'] * x_line, color='black', linestyle='--',
+            label=f"OLS fit (r = {fit['r']:.2f}, n = {fit['n']})")
+
+
+def figure_cc_vs_mdv(prepared, location, year, location_type):
+    """
+    Draws the scatter plot of plot_cc_vs_mdv() into a new figure without using pyplot, so it can run
+    in a worker thread.
+
+    Parameters:
+        prepared (dict): result of prepare_scatter()
+        location (str): The specific location (community, ward, or sector) to highlight.
+        year (int): The year chosen.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+
+    Returns:
+        (Figure): the drawn figure
+    """
+    # ----- PLOT 3: MEDIAN ASSESSED VALUES VERSUS CRIME PER CAPITA -----
+    scatter_df = prepared['scatter_df']
+    highlight = prepared['highlight']
 
     # Scatter plot, plotting all communities
-    plt.figure(figsize=(10, 6))
-    plt.scatter(scatter_df['Median Assessed Value'],
-                scatter_df['Crime per Capita 1000'],
-                alpha=0.5, label='Other Communities')
+    fig = new_figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.scatter(scatter_df['Median Assessed Value'],
+               scatter_df['Crime per Capita 1000'],
+               alpha=0.5, label='Other Communities')
+    draw_fit_line(ax, prepared['fits']['cc_vs_mdv'], scatter_df['Median Assessed Value'])
 
     # Highlight the specified community or communities if multiple apply
-    highlight = scatter_df[scatter_df[location_type] == location]
     if not highlight.empty:
-        plt.scatter(highlight['Median Assessed Value'], 
-                    highlight['Crime per Capita 1000'],
-                    color='red', s=100, label=f"{location_type}: {location}",
-                    edgecolor='black')
+        ax.scatter(highlight['Median Assessed Value'], 
+                   highlight['Crime per Capita 1000'],
+                   color='red', s=100, label=f"{location_type}: {location}",
+                   edgecolor='black')
         # Add labels (community codes)
         for _, row in highlight.iterrows():
-            plt.text(row['Median Assessed Value'],
+            ax.text(row['Median Assessed Value'],
                     row['Crime per Capita 1000'] + 0.2,
                     row['Community Code'],
                     fontsize=10, ha='center', color='red')
 
     # Plot labels
-    plt.title(f'Median Assessed Value vs. Crime per Capita by Community ({year})')
-    plt.xlabel('Community Median Assessed Value ($)')
-    plt.ylabel('Crime per Capita 1000')
-    plt.grid(True)
-    plt.legend()
-    plt.tight_layout()
-    plt.show(block=False)
+    ax.set_title(f'Median Assessed Value vs. Annual Crime per Capita by Community ({year})')
+    ax.set_xlabel('Community Median Assessed Value ($)')
+    ax.set_ylabel('Crime per Capita 1000')
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    return fig
 
 
-def plot_cc_vs_bc(final_df, location, year, location_type):
+def plot_cc_vs_mdv(final_df, location, year, location_type, annual_df=None, prepared=None, figure=None):
     """
-    Creates a scatter plot of total crime count versus total business count for the specified location and year.
+    Creates a scatter plot of median assessed values versus annual crime per capita for the specified location and year.
 
     Parameters:
         final_df (DataFrame): The DataFrame containing the cleaned and merged data.
         location (str): The specific location (community, ward, or sector) to filter the data.
         year (int): The year to filter the data.
         location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        annual_df (DataFrame): Optional per community and year fact table from create_annual_facts(),
+                               built from final_df if not given.
+        prepared (dict): Optional result of prepare_scatter(), computed here if not given.
+        figure (Figure): Optional result of figure_cc_vs_mdv(), drawn here if not given.
         
     Returns:
         Opens a plt window displaying the scatter plot.
     """
-    # ----- PLOT 4: TOTAL CRIME COUNT VERSUS TOTAL BUSINESS COUNT ----- 
+    if figure is None:
+        if prepared is None:
+            prepared = prepare_scatter(final_df, location, year, location_type, annual_df)
+        figure = figure_cc_vs_mdv(prepared, location, year, location_type)
+    show_figure(figure)
 
-    # filter to a specific year
-    filtered_df = final_df[final_df['Year'] == year]
 
-    # Group by Community
-    agg_dict = {
-        'Community Code': 'first',
-        'Community Businesses Opened TD Total': 'first',
-        'Crime Count': 'sum'
-    }
+def figure_cc_vs_bc(prepared, location, year, location_type):
+    """
+    Draws the scatter plot of plot_cc_vs_bc() into a new figure without using pyplot, so it can run
+    in a worker thread.
 
-    # Only add location_type if it is not the groupby column to avoid conflict
-    if location_type not in ['Community']:
-        agg_dict[location_type] = 'first'
+    Parameters:
+        prepared (dict): result of prepare_scatter()
+        location (str): The specific location (community, ward, or sector) to highlight.
+        year (int): The year chosen.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
 
-    scatter_df = filtered_df.groupby(['Community']).agg(agg_dict).reset_index()
+    Returns:
+        (Figure): the drawn figure
+    """
+    # ----- PLOT 4: TOTAL CRIME COUNT VERSUS TOTAL BUSINESS COUNT ----- 
+    scatter_df = prepared['scatter_df']
+    highlight = prepared['highlight']
 
     # Create the scatter plot
-    plt.figure(figsize=(10, 6))
+    fig = new_figure(figsize=(10, 6))
+    ax = fig.subplots()
 
     # Plot all communities
-    plt.scatter(scatter_df['Community Businesses Opened TD Total'],
-                scatter_df['Crime Count'],
-                alpha=0.5, label='Other Communities')
+    ax.scatter(scatter_df['Community Businesses Opened TD Total'],
+               scatter_df['Crime Count'],
+               alpha=0.5, label='Other Communities')
+    draw_fit_line(ax, prepared['fits']['cc_vs_bc'], scatter_df['Community Businesses Opened TD Total'])
     # Highlight the specified community or communities if multiple apply
-    highlight = scatter_df[scatter_df[location_type] == location]
     if not highlight.empty:
-        plt.scatter(highlight['Community Businesses Opened TD Total'],
-                    highlight['Crime Count'],
-                    color='red', s=100, edgecolor='black', label=f"{location_type}: {location}")
+        ax.scatter(highlight['Community Businesses Opened TD Total'],
+                   highlight['Crime Count'],
+                   color='red', s=100, edgecolor='black', label=f"{location_type}: {location}")
         # Add labels (community codes)
         for _, row in highlight.iterrows():
-            plt.text(row['Community Businesses Opened TD Total'],
+            ax.text(row['Community Businesses Opened TD Total'],
                     row['Crime Count'] + 100,
                     row['Community Code'],
                     fontsize=9, ha='center', color='red')
 
     # Plot labels
-    plt.title(f'Total Crime Count vs. Business Count by Communities ({year})')
-    plt.xlabel(f'Community Businesses Opened TD Total')
-    plt.ylabel('Total Crime Count')
-    plt.grid(True)
-    plt.legend()
-    plt.tight_layout()
-    plt.show(block=False)
\ No newline at end of file
+    ax.set_title(f'Total Crime Count vs. Business Count by Communities ({year})')
+    ax.set_xlabel(f'Community Businesses Opened TD Total')
+    ax.set_ylabel('Total Crime Count')
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def plot_cc_vs_bc(final_df, location, year, location_type, annual_df=None, prepared=None, figure=None):
+    """
+    Creates a scatter plot of total crime count versus total business count for the specified location and year.
+
+    Parameters:
+        final_df (DataFrame): The DataFrame containing the cleaned and merged data.
+        location (str): The specific location (community, ward, or sector) to filter the data.
+        year (int): The year to filter the data.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        annual_df (DataFrame): Optional per community and year fact table from create_annual_facts(),
+                               built from final_df if not given.
+        prepared (dict): Optional result of prepare_scatter(), computed here if not given.
+        figure (Figure): Optional result of figure_cc_vs_bc(), drawn here if not given.
+        
+    Returns:
+        Opens a plt window displaying the scatter plot.
+    """
+    if figure is None:
+        if prepared is None:
+            prepared = prepare_scatter(final_df, location, year, location_type, annual_df)
+        figure = figure_cc_vs_bc(prepared, location, year, location_type)
+    show_figure(figure)
+
+
+def choropleth_values(annual_df, year, location_type, metric):
+    """
+    Computes the value of a choropleth metric for every community in a year. For wards and sectors
+    the metric is computed for the whole region and given to each of its member communities, so the
+    map shows the regions dissolved from their communities.
+
+    Parameters:
+        annual_df (DataFrame): per community and year fact table from create_annual_facts()
+        year (str): year to compute the metric for
+        location_type (str): 'Community', 'Ward Number', or 'Sector'
+        metric (str): one of CHOROPLETH_METRICS
+
+    Returns:
+        (Series): metric value indexed by upper case Community Code
+    """
+    year_df = annual_df[annual_df['Year'] == year]
+    sums = ['Crime Count', 'Population Household', 'Community Businesses Opened TD Total']
+    if location_type == 'Community':
+        regions = year_df[sums]
+    else:
+        # rates of a region are computed from the totals of its communities, as in the summary table
+        regions = year_df.groupby(location_type, observed=True)[sums].sum(min_count=1) \
+                         .reindex(year_df[location_type]).set_axis(year_df.index)
+
+    # regions without residents get nan instead of inf
+    population = regions['Population Household'].where(regions['Population Household'] > 0)
+    if metric == 'Crime Count':
+        values = regions['Crime Count']
+    elif metric == 'Crime per Capita 1000':
+        values = regions['Crime Count'] / population * 1000
+    elif metric == 'Business Density':
+        values = regions['Community Businesses Opened TD Total'] / population * 1000
+    else:
+        raise KeyError(f"Invalid metric: {metric}")
+
+    values = pd.Series(values.to_numpy(), index=year_df['Community Code'].astype(str).str.upper())
+    return values[~values.index.duplicated()]
+
+
+def prepare_choropleth(final_df, location, year, location_type, annual_df=None, metric='Crime Count'):
+    """
+    Computes the data behind plot_choropleth without drawing anything, so it can run in a worker thread.
+
+    Parameters:
+        final_df (DataFrame): The DataFrame containing the cleaned and merged data.
+        location (str): The specific location (community, ward, or sector) to outline.
+        year (str): The year to shade the map for.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        annual_df (DataFrame): Optional per community and year fact table from create_annual_facts(),
+                               built from final_df if not given.
+        metric (str): one of CHOROPLETH_METRICS
+
+    Returns:
+        (dict): 'annual_df' fact table, 'values' metric per community code, 'highlight_codes' codes of
+                the communities in the chosen location and 'metric'
+    """
+    if annual_df is None:
+        annual_df = create_annual_facts(final_df)
+    members = annual_df[annual_df[location_type].astype(str) == str(location)]
+    highlight_codes = set(members['Community Code'].astype(str).str.upper())
+    return {
+        'annual_df': annual_df,
+        'values': choropleth_values(annual_df, year, location_type, metric),
+        'highlight_codes': highlight_codes,
+        'metric': metric,
+    }
+
+
+class ChoroplethMap:
+    """
+    Community choropleth drawn on one matplotlib axes. The boundary paths are added once as a single
+    PathCollection; update() only replaces the face colour values and outlines, so switching the
+    year or metric does not touch the geometry.
+
+    Instance variables:
+        boundaries (CommunityBoundaries): projected community paths
+        ax (Axes): axes the map is drawn on
+        collection (PathCollection): one path per community, coloured by its value
+    """
+
+    def __init__(self, boundaries, ax, cmap='OrRd'):
+        self.boundaries = boundaries
+        self.ax = ax
+        # communities without a value are drawn in grey
+        colormap = plt.get_cmap(cmap).with_extremes(bad='lightgrey')
+        self.collection = PathCollection(boundaries.paths, cmap=colormap, edgecolors='white', linewidths=0.3)
+        ax.add_collection(self.collection)
+        min_x, min_y, max_x, max_y = boundaries.bounds
+        ax.set_xlim(min_x, max_x)
+        ax.set_ylim(min_y, max_y)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        self.colorbar = ax.figure.colorbar(self.collection, ax=ax, shrink=0.8)
+
+    def update(self, values, highlight_codes=(), title=''):
+        """
+        Shades every community by its value and outlines the highlighted ones.
+
+        Parameters:
+            values (Series): value per upper case community code, communities not in it are grey
+            highlight_codes (set): community codes outlined in black
+            title (str): axes title and colour bar label
+        """
+        codes = self.boundaries.codes
+        array = values.reindex(codes).to_numpy(dtype=float)
+        self.collection.set_array(np.ma.masked_invalid(array))
+        if np.isfinite(array).any():
+            self.collection.set_clim(np.nanmin(array), np.nanmax(array))
+
+        highlighted = np.array([code in highlight_codes for code in codes], dtype=bool)
+        self.collection.set_edgecolors(np.where(highlighted[:, None], [[0, 0, 0, 1]], [[1, 1, 1, 1]]))
+        self.collection.set_linewidths(np.where(highlighted, 1.5, 0.3))
+
+        self.ax.set_title(title)
+        self.colorbar.set_label(title.split(' by Community')[0])
+        self.ax.figure.canvas.draw_idle()
+
+
+def plot_choropleth(final_df, location, year, location_type, annual_df=None, prepared=None, data_dir='data'):
+    """
+    Creates a map of every community shaded by crime count, crime per capita or business density for
+    the chosen year, with the communities of the chosen location outlined. Wards and sectors are
+    shaded by their region totals. Left and right arrow keys change the year and 'm' changes the metric,
+    only the colours are updated.
+
+    Parameters:
+        final_df (DataFrame): The DataFrame containing the cleaned and merged data.
+        location (str): The specific location (community, ward, or sector) to outline.
+        year (str): The year to shade the map for.
+        location_type (str): The type of location (e.g., 'Community', 'Ward', or 'Sector').
+        annual_df (DataFrame): Optional per community and year fact table from create_annual_facts(),
+                               built from final_df if not given.
+        prepared (dict): Optional result of prepare_choropleth(), computed here if not given.
+        data_dir (str): directory containing the community boundary GeoJSON file
+
+    Returns:
+        Opens a plt window displaying the map.
+    """
+    # ----- PLOT 5: CHOROPLETH MAP OF THE CHOSEN METRIC -----
+    if prepared is None:
+        prepared = prepare_choropleth(final_df, location, year, location_type, annual_df)
+    annual_df = prepared['annual_df']
+    years = sorted(annual_df['Year'].dropna().unique())
+    state = {'year': year, 'metric': prepared['metric']}
+
+    fig, ax = plt.subplots(figsize=(9, 9))
+    choropleth = ChoroplethMap(load_boundaries(data_dir), ax)
+
+    def redraw(values):
+        choropleth.update(values, prepared['highlight_codes'],
+                          f"{state['metric']} by Community ({state['year']}), outlined: {location_type} {location}")
+
+    def on_key(event):
+        if event.key in ('left', 'right') and state['year'] in years:
+            step = -1 if event.key == 'left' else 1
+            state['year'] = years[(years.index(state['year']) + step) % len(years)]
+        elif event.key == 'm':
+            state['metric'] = CHOROPLETH_METRICS[(CHOROPLETH_METRICS.index(state['metric']) + 1) % len(CHOROPLETH_METRICS)]
+        else:
+            return
+        redraw(choropleth_values(annual_df, state['year'], location_type, state['metric']))
+
+    redraw(prepared['values'])
+    # the default handler would also move the navigation history on left/right, it now skips the map's keys
+    manager = fig.canvas.manager
+    if manager is not None and manager.key_press_handler_id is not None:
+        fig.canvas.mpl_disconnect(manager.key_press_handler_id)
+        manager.key_press_handler_id = fig.canvas.mpl_connect(
+            'key_press_event', lambda event: None if event.key in CHOROPLETH_KEYS else key_press_handler(event))
+    fig.canvas.mpl_connect('key_press_event', on_key)
+    fig.text(0.01, 0.01, "Left/Right: change year, M: change metric", fontsize=8)
+    plt.show(block=False)
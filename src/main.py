@@ -15,18 +15,81 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dataLoader import create_dataframe, load_dimensions, export_to_excel
+from dataPrintAndSave import describe_dataframe, print_describe, save_plot
+from dataVisualizer import show_maps, plot_choropleth
+from communityBoundaries import boundaries_available
+from visualizerSession import VisualizerSession
+from userInputs import get_location, get_year, get_category_group
+from dataValidator import print_validation_summary
+from dataRefresh import DataRefresher, DatasetHolder, DatasetSnapshot, source_signature
+from regionIndex import clear_region_cache
+from categoryHierarchy import clear_category_cache
+
+# plot name in visualizerSession.PLOTS and the message printed before it is shown, in display order
+PLOT_MESSAGES = [
+    # plot for crime category and their total count for the chosen year and location
+    # also prints out a pivot table of the crime category count by month
+    ('crime_category', "\nHere is a plot showing the crime category and their total count for the chosen year and location: \
+              \nBelow is a pivot table for the same data but separated by month"),
+    # plot comparing the amount of crime per month for the chosen year and location
+    ('crime_count', "\nHere is a plot comparing the amount of crime per month for the chosen year and location:\n"),
+    # plot of the monthly crime of the location across all years continued with a 12 month forecast
+    ('crime_forecast', "\nHere is a plot of the monthly crime for the chosen location across all years and a forecast of the next 12 months:\n"),
+    # plot comparing Crime per capita 1000 vs a locations communities, median assessed value
+    ('cc_vs_mdv', "\nHere is a plot comparing Crime per capita 1000 vs a locations communities, median assessed value: \
+              \nNote: If the point is not highlighted, there is no information on median assessed value for this location\n"),
+    # plot comparing Crime Count vs a locations communities business count to date total
+    ('cc_vs_bc', "\nHere is a plot comparing Crime Count vs a locations communities business count to date total: \
+              \nNote: If the point is not highlighted, there is no information on business count to date for this location\n"),
+]
+
+def start_refresher(df, signature, validation_report=None):
+    """
+    Starts watching the /data folder, a changed source file is rebuilt in the background and swapped in
+    between queries.
+
+    Parameters:
+        df (pd.DataFrame): merged DataFrame currently in use
+        signature (tuple): source_signature() read before df was loaded
+        validation_report (dict): dataValidator report of df
+
+    Returns:
+        (DatasetHolder): holder of the current dataset
+        (DataRefresher): the started refresher thread
+    """
+    holder = DatasetHolder(DatasetSnapshot(df, signature=signature, validation_report=validation_report))
+    # region lists built from the previous DataFrame are no longer needed after a swap
+    holder.add_swap_listener(lambda snapshot: clear_region_cache())
+    # so are the category encodings
+    holder.add_swap_listener(lambda snapshot: clear_category_cache())
+    refresher = DataRefresher(holder)
+    refresher.start()
+    return holder, refresher
 
-from dataLoader import create_dataframe, export_to_excel
-from dataPrintAndSave import print_describe, location_year_summary, save_plot
-from dataVisualizer import show_maps, plot_crime_category, plot_crime_count, plot_cc_vs_mdv, plot_cc_vs_bc
-from userInputs import get_location, get_year
 
 def main():     
 
     print("\nStarting up Calgary Crime Statistics Visualizer... \
-          \nCreating dataframe...\n")
-    # Load data from CSV files and perform initial cleaning    
-    df = create_dataframe()       
+          \nLoading region list...\n")
+    # Only the small region and year tables are needed for the prompts, they are loaded first
+    signature = source_signature()
+    dimensions = load_dimensions()
+    # Load data from CSV files and perform initial cleaning in the background while the user is prompted,
+    # the describe statistics are computed right after it in the same worker
+    loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='loader')
+    # the validation report is kept next to the DataFrame instead of in its attrs
+    load_future = loader.submit(create_dataframe, return_report=True)
+    df_future = loader.submit(lambda: load_future.result()[0])
+    # Session computing summaries and plots in worker threads, the per community and year fact table
+    # shared by the summary and scatter plots is built in the background as soon as the data is loaded
+    session = VisualizerSession(df_future)
+    # the describe statistics use the session's fact table for the population of each community
+    describe_future = loader.submit(lambda: describe_dataframe(df_future.result(), session.annual_df))
+    # Watches the /data folder once the data is loaded, see start_refresher()
+    holder, refresher, version = None, None, 0
 
     print(" --------- Start Calgary Crime Statistics Visualizer ---------")
     print("\nWelcome to Calgary Crime Statistic Visualizer!\n" \
@@ -35,15 +98,32 @@ def main():
     "\ntype and quantity of crime, crime per month, crime per capita 1000 vs median assessed value of the region," \
     "\nand crime count vs the number of existing businesses of the region.")
 
-    print("\nBased On current entire existing dataset, the following values have also been observed:\n")
-
-    # Prints describe table summarizing entire dataset indexed by month
-    print_describe(df)
+    print("\nThe full dataset is loading in the background, overall statistics of the dataset will be shown with your first results.")
 
     print("\n\nTo begin the visualizer, first select the region type.")
 
     # Loop for if user wishes to visualize different regions and/or years
+    first_query = True
     while True:
+        # the refresher starts once the background load has finished
+        if holder is None and df_future.done() and df_future.exception() is None:
+            df, report = load_future.result()
+            holder, refresher = start_refresher(df, signature, report)
+
+        # failed background rebuilds are reported here, between prompts
+        if refresher is not None:
+            for error in refresher.pop_errors():
+                print(f"\nData refresh failed, keeping the current data: {error}")
+
+        # take the latest fully built dataset for this query
+        if holder is not None:
+            snapshot = holder.current()
+            if snapshot.version != version:
+                version = snapshot.version
+                session.set_data(snapshot.df, snapshot.annual_df)
+                dimensions = load_dimensions()
+                print("\nNew data was found in the /data folder and has been loaded.")
+
         # prompt to bring up Sector/Ward/Community reference maps
         map = input("\nIf you would like a map to see what sectors, wards, and communities you may see the map png files " \
         "\nfound in the /data folder or if you wish to see the images from here, enter (Y/N) (Note: this process is slow): ").strip().upper()
@@ -51,59 +131,67 @@ def main():
             show_maps()
         
         # get user desired location and year
-        location_type, location = get_location(df)
-        year = get_year(df)
+        location_type, location = get_location(dimensions)
+        year = get_year(dimensions)
+        # optional crime category group the category, count and forecast plots are narrowed to
+        category_group = get_category_group()
 
         print("\nYou have chosen the following region and year | ", location_type, ": ", location, " for the year ", year)
+        if category_group is not None:
+            print("Crime category group | ", category_group)
+
+        # start computing the summary and all plots in the background while results are shown
+        query = session.submit(location_type, location, year, category_group)
+
+        # the first results wait for the background load, which is usually finished by now
+        if first_query and not df_future.done():
+            print("\nFinishing loading the dataset...")
 
         print("\nBased on these chosen fields, the following statistics can be seen:\n")
         
         # printing short summary table ot useful statistics for the chosen location and year
-        location_year_summary(df, location, year, location_type)
+        print(query.summary.result())
+
+        # the dataset wide statistics follow the selection's summary, they are not needed to show it
+        if first_query:
+            first_query = False
+            df = df_future.result()
+            print_validation_summary(load_future.result()[1])
+            print("\nBased On current entire existing dataset, the following values have also been observed:\n")
+            # Prints describe table summarizing entire dataset indexed by month
+            print_describe(df, describe_future.result())
 
         ## Beginning of displayed plotted results
-        # plot for crime category and their total count for the chosen year and location
-        print("\nHere is a plot showing the crime category and their total count for the chosen year and location: \
-              \nBelow is a pivot table for the same data but separated by month")
-        # also prints out a pivot table of the crime category count by month
-        plot_crime_category(df, location, year, location_type)
-        # prompt user if they wish to save plot as png or not (repeated for each of the 4 plots, this and 3 below)
-        save0 = input("Would you like to save this plot as a png? (stored in /images) (Y/N): ").strip().upper()
-        if (save0 == 'Y'):
-            save_plot(location_type, year, "Crime_Category_Count", location)
-        plt.close()
-        
-        # plot comparing the amount of crime per month for the chosen year and location
-        print("\nHere is a plot comparing the amount of crime per month for the chosen year and location:\n")
-        plot_crime_count(df, location, year, location_type)
-        save1 = input("Would you like to save this plot as a png? (stored in /images) (Y/N): ").strip().upper()
-        if (save1 == 'Y'):
-            save_plot(location_type, year, "Crime_Count_by_Month", location)
-        plt.close()
-
-        # plot comparing Crime per capita 1000 vs a locations communities, median assessed value
-        print("\nHere is a plot comparing Crime per capita 1000 vs a locations communities, median assessed value: \
-              \nNote: If the point is not highlighted, there is no information on median assessed value for this location\n")
-        plot_cc_vs_mdv(df, location, year, location_type)
-        save2 = input("Would you like to save this plot as a png? (stored in /images) (Y/N): ").strip().upper()
-        if (save2 == 'Y'):
-            save_plot(location_type, year, "Crime_per_Capita_vs__med_Assessed_Value", location)
-        plt.close()
-
-        # plot comparing Crime Count vs a locations communities business count to date total
-        print("\nHere is a plot comparing Crime Count vs a locations communities business count to date total: \
-              \nNote: If the point is not highlighted, there is no information on business count to date for this location\n")
-        plot_cc_vs_bc(df, location, year, location_type)
-        save3 = input("Would you like to save this plot as a png? (stored in /images) (Y/N): ").strip().upper()
-        if (save3 == 'Y'):
-            save_plot(location_type, year, "Crime_Count_vs_Business_Count", location)
-        plt.close()
+        for name, message in PLOT_MESSAGES:
+            print(message)
+            query.show(name)
+            # prompt user if they wish to save plot as png or not (repeated for each of the plots)
+            save = input("Would you like to save this plot as a png? (stored in /images) (Y/N): ").strip().upper()
+            if (save == 'Y'):
+                save_plot(location_type, year, query.plot_file_name(name), location)
+            plt.close()
+
+        # map of every community shaded for the chosen year, only if the boundary GeoJSON is in /data
+        if boundaries_available():
+            print("\nHere is a map of every community shaded by crime count for the chosen year, with the chosen location outlined: \
+              \nUse the left/right arrow keys on the map to change the year and 'M' to change the shaded statistic\n")
+            plot_choropleth(query.df, location, year, location_type, query.annual_df)
+            save = input("Would you like to save this plot as a png? (stored in /images) (Y/N): ").strip().upper()
+            if (save == 'Y'):
+                save_plot(location_type, year, 'Crime_Choropleth_Map', location)
+            plt.close()
 
         # prompt utilizing loop to ask for new location/region and year if desired
         final = input("\nWould you like to visualize data for another location and/or time? Hit 'ENTER' to continue" \
         ", otherwise enter 'Q' to quit: ").strip().upper()
         if(final == 'Q'):
             break
+
+    if refresher is not None:
+        refresher.stop()
+    session.close()
+    loader.shutdown(wait=True)
+    df = holder.current().df if holder is not None else df_future.result()
     
     # saves indexed csv merged datafram to an excel if desired
     final_save = input("\nWould you like to export the indexed crime dataframe to an excel?" \
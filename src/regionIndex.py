@@ -0,0 +1,130 @@
+"""
+regionIndex.py
+
+Precomputed, sorted region lists with a prefix index for type-ahead search.
+
+A RegionIndex is built once per DataFrame and location type and cached, so opening the region picker
+does not scan the merged DataFrame again. Searching a prefix is two binary searches over sorted
+upper case keys, so filtering stays fast at any list size.
+"""
+import weakref
+from bisect import bisect_left, bisect_right
+
+import pandas as pd
+
+# (id of DataFrame, location type) -> (weak reference to the DataFrame, RegionIndex), an entry is
+# removed when its DataFrame is freed
+_REGION_CACHE = {}
+
+
+class RegionIndex:
+    """
+    Sorted list of the valid regions of one location type with a prefix search index.
+
+    Instance variables:
+        location_type (str): 'Community', 'Ward Number', or 'Sector'
+        columns (tuple): column names of each row, used as the picker table columns
+        headings (list): column headings shown by the picker
+        rows (list): sorted list of row tuples, one per region
+        values (list): value returned for each row when it is selected (community name, ward number or sector)
+    """
+
+    def __init__(self, final_df, location_type):
+        self.location_type = location_type
+
+        # filter based on the conditions of no nan values and removing duplicates, dependent on location type
+        if location_type == 'Community':
+            region_df = final_df[['Community Code', 'Community']].dropna()
+            region_df = region_df.astype(str).drop_duplicates().sort_values('Community')
+            self.columns = ('No.', 'Community Code', 'Community')
+            self.headings = ['No.', 'Code', 'Community']
+            self.rows = [(idx, code, name) for idx, (code, name) in
+                         enumerate(region_df[['Community Code', 'Community']].itertuples(index=False), start=1)]
+            self.values = region_df['Community'].tolist()
+            # communities can be searched by either their name or their code
+            search_keys = [(name, i) for i, name in enumerate(self.values)]
+            search_keys += [(code, i) for i, code in enumerate(region_df['Community Code'])]
+
+        elif location_type == 'Ward Number':
+            wards = final_df['Ward Number'].dropna().astype(str)
+            wards = pd.Series(wards[wards.str.isdigit()].unique())
+            wards = wards.iloc[wards.astype(int).argsort()]
+            self.columns = ('Ward Number',)
+            self.headings = ['Ward Number']
+            self.rows = [(ward,) for ward in wards]
+            self.values = wards.tolist()
+            search_keys = [(ward, i) for i, ward in enumerate(self.values)]
+
+        elif location_type == 'Sector':
+            sectors = sorted(final_df['Sector'].dropna().astype(str).unique())
+            self.columns = ('Sector',)
+            self.headings = ['Sector']
+            self.rows = [(sector,) for sector in sectors]
+            self.values = sectors
+            search_keys = [(sector, i) for i, sector in enumerate(self.values)]
+
+        else:
+            raise KeyError(f"Invalid location type: {location_type}")
+
+        # prefix index: upper case keys in sorted order with the row each key belongs to
+        search_keys = sorted((str(key).upper(), row) for key, row in search_keys)
+        self._keys = [key for key, _ in search_keys]
+        self._key_rows = [row for _, row in search_keys]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def search(self, prefix):
+        """
+        Returns the rows whose name (or code for communities) starts with a prefix, case insensitive.
+
+        Parameters:
+            prefix (str): text typed so far, an empty prefix matches every row
+
+        Returns:
+            (list): matching row positions in list order
+        """
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return list(range(len(self.rows)))
+        start = bisect_left(self._keys, prefix)
+        # every key starting with the prefix sorts before prefix + the largest character
+        end = bisect_right(self._keys, prefix + '\uffff', lo=start)
+        return sorted(set(self._key_rows[start:end]))
+
+
+def get_region_index(final_df, location_type):
+    """
+    Returns the cached RegionIndex for a DataFrame and location type, building it on first use.
+
+    Parameters:
+        final_df (pd.DataFrame): DataFrame with merged dataset.
+        location_type (str): 'Community', 'Ward Number', or 'Sector'
+
+    Returns:
+        (RegionIndex): sorted, searchable region list
+    """
+    key = (id(final_df), location_type)
+    cached = _REGION_CACHE.get(key)
+    # the weak reference guards against a new DataFrame reusing the id of a freed one
+    if cached is not None and cached[0]() is final_df:
+        return cached[1]
+    index = RegionIndex(final_df, location_type)
+    _REGION_CACHE[key] = (weakref.ref(final_df, lambda ref: _drop_region_index(key, ref)), index)
+    return index
+
+
+def _drop_region_index(key, ref):
+    """
+    Removes the cached index of a freed DataFrame, unless the entry already belongs to a newer one.
+    """
+    cached = _REGION_CACHE.get(key)
+    if cached is not None and cached[0] is ref:
+        del _REGION_CACHE[key]
+
+
+def clear_region_cache():
+    """
+    Removes every cached RegionIndex, e.g. after the dataset has been reloaded.
+    """
+    _REGION_CACHE.clear()
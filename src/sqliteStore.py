@@ -0,0 +1,412 @@
+"""
+sqliteStore.py
+
+Optional indexed SQLite backend for the merged crime dataset and its rollups.
+
+write_sqlite_store() saves the merged DataFrame, its dimension tables, the per community and year
+fact table and a monthly crime rollup for every location level into one local SQLite file. A
+SqliteStore then answers the summary and plot queries with parameterized SQL over a small pool of
+connections, reading only the rows a selection needs, so a cold query does not have to load or
+rebuild the full dataset. The file can also be opened by any other tool that reads SQLite.
+
+Tables:
+    crime           merged rows from create_dataframe()
+    dimensions      one row per Community Code, Community, Sector, Ward Number and Year
+    annual_facts    create_annual_facts() rows
+    crime_rollup    Crime Count summed per level, location, Year, Month and Category, where level is
+                    'Community', 'Sector', 'Ward Number' or 'City'
+
+Example:
+    write_sqlite_store(create_dataframe())
+    ...
+    with SqliteStore() as store:
+        print(store.summarize('CENTRE', '2020', 'Sector'))
+        plot_crime_count(None, 'CENTRE', '2020', 'Sector', prepared=store.prepare('crime_count', 'Sector', 'CENTRE', '2020'))
+"""
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from dataLoader import create_dataframe, create_annual_facts
+from dataPrintAndSave import summarize_location_year
+from categoryHierarchy import export_group_rollup, group_rollup, hierarchy_available, load_category_hierarchy
+from dataVisualizer import crime_category_tables, crime_count_tables, crime_forecast_tables, prepare_scatter
+
+DB_FILE = 'data/calgary_crime.sqlite'
+
+# location columns of the crime table
+LOCATION_TYPES = ('Community', 'Sector', 'Ward Number')
+# location levels of the rollup table, 'City' rows hold the totals of all of Calgary
+ROLLUP_LEVELS = LOCATION_TYPES + ('City',)
+CITY_LOCATION = 'CALGARY'
+
+DIMENSION_COLUMNS = ['Community Code', 'Community', 'Sector', 'Ward Number', 'Year']
+
+# index name -> (table, indexed columns)
+INDEXES = {
+    'idx_rollup_level_location': ('crime_rollup', ['level', 'location', 'Year', 'Month', 'Category']),
+    'idx_rollup_level_year': ('crime_rollup', ['level', 'Year', 'Month']),
+    'idx_crime_community': ('crime', ['Community', 'Year', 'Month', 'Category']),
+    'idx_crime_sector': ('crime', ['Sector', 'Year', 'Month', 'Category']),
+    'idx_crime_ward': ('crime', ['Ward Number', 'Year', 'Month', 'Category']),
+    'idx_annual_year': ('annual_facts', ['Year', 'Community']),
+}
+
+
+def _quote(name):
+    """
+    Returns a column or table name quoted for SQL, the dataset column names contain spaces.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_crime_rollup(final_df):
+    """
+    Sums the crime count per location, year, month and category for every level in ROLLUP_LEVELS.
+
+    Parameters:
+        final_df (pd.DataFrame): merged DataFrame returned by create_dataframe()
+
+    Returns:
+        (pd.DataFrame): columns level, location, Year, Month, Category, Crime Count
+    """
+    crime = final_df.dropna(subset=['Year', 'Month', 'Category'])
+    rollups = []
+    for level in ROLLUP_LEVELS:
+        if level == 'City':
+            grouped = crime.groupby(['Year', 'Month', 'Category'], observed=True)['Crime Count'].sum().reset_index()
+            grouped.insert(0, 'location', CITY_LOCATION)
+        else:
+            grouped = crime.groupby([level, 'Year', 'Month', 'Category'], observed=True)['Crime Count'].sum().reset_index()
+            grouped = grouped.rename(columns={level: 'location'})
+            grouped['location'] = grouped['location'].astype(str)
+        grouped.insert(0, 'level', level)
+        rollups.append(grouped)
+    return pd.concat(rollups, ignore_index=True)
+
+
+def write_sqlite_store(final_df, annual_df=None, db_file=DB_FILE):
+    """
+    Writes the merged DataFrame, dimension tables, annual facts and crime rollups to a SQLite file
+    and creates the composite indexes in INDEXES. The database is written to a temporary file first
+    and then renamed into place, so readers never see a partially written database.
+
+    Parameters:
+        final_df (pd.DataFrame): merged DataFrame returned by create_dataframe()
+        annual_df (pd.DataFrame): fact table from create_annual_facts(), built from final_df if not given
+        db_file (str): path of the database file, replaced if it already exists
+
+    Returns:
+        (str): the path of the written database
+    """
+    if annual_df is None:
+        annual_df = create_annual_facts(final_df)
+    dimensions = final_df[DIMENSION_COLUMNS].dropna(subset=['Community', 'Year']).drop_duplicates()
+
+    tmp_file = db_file + '.tmp'
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    directory = os.path.dirname(db_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        tables = {
+            'crime': final_df,
+            'dimensions': dimensions,
+            'annual_facts': annual_df,
+            'crime_rollup': build_crime_rollup(final_df),
+        }
+        for table, frame in tables.items():
+            # categorical and string dimension columns are stored as TEXT
+            frame.astype({col: object for col in frame.columns if not pd.api.types.is_numeric_dtype(frame[col])}) \
+                 .to_sql(table, conn, index=False, chunksize=50000)
+        for index, (table, columns) in INDEXES.items():
+            conn.execute(f"CREATE INDEX {index} ON {table} ({', '.join(_quote(col) for col in columns)})")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_file, db_file)
+    return db_file
+
+
+class SqliteStore:
+    """
+    Read-only access to a database written by write_sqlite_store(). Connections are opened lazily and
+    kept in a pool, so the store can be shared by the worker threads of a VisualizerSession.
+
+    Instance variables:
+        db_file (str): path of the database file
+        pool_size (int): maximum number of open connections
+    """
+
+    def __init__(self, db_file=DB_FILE, pool_size=4):
+        if not os.path.exists(db_file):
+            raise FileNotFoundError(f"SQLite store not found: {db_file}. Create it with write_sqlite_store().")
+        self.db_file = db_file
+        self.pool_size = pool_size
+        self._pool = queue.Queue(maxsize=pool_size)
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._categories = None
+        self._dataset_periods = None
+
+    def _connect(self):
+        """
+        Opens a new read-only connection that may be used from any thread.
+        """
+        uri = 'file:' + os.path.abspath(self.db_file).replace('\\', '/') + '?mode=ro'
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a pooled connection, opening a new one while fewer than pool_size exist and otherwise
+        waiting for one to be returned.
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.pool_size
+                if can_open:
+                    self._opened += 1
+            conn = self._connect() if can_open else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def query(self, sql, params=()):
+        """
+        Runs a parameterized query on a pooled connection.
+
+        Parameters:
+            sql (str): SQL text with ? placeholders
+            params (tuple): values of the placeholders
+
+        Returns:
+            (pd.DataFrame): the result rows
+        """
+        with self.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def dimensions(self):
+        """
+        Returns the region and year combinations in the data, enough for the region picker and the
+        location and year prompts without loading the crime rows.
+
+        Returns:
+            (pd.DataFrame): columns Community Code, Community, Sector, Ward Number, Year
+        """
+        return self.query("SELECT * FROM dimensions")
+
+    def annual_facts(self, year=None):
+        """
+        Returns the annual fact table, optionally only for one year.
+
+        Parameters:
+            year (str): year to select, every year if None
+
+        Returns:
+            (pd.DataFrame): rows of create_annual_facts()
+        """
+        if year is None:
+            return self.query("SELECT * FROM annual_facts")
+        return self.query("SELECT * FROM annual_facts WHERE Year = ?", (str(year),))
+
+    def rows(self, location_type, location, year):
+        """
+        Returns the merged crime rows of one location and year.
+
+        Parameters:
+            location_type (str): 'Community', 'Ward Number', or 'Sector'
+            location (str): name of the specific location/region chosen
+            year (str): year chosen
+
+        Returns:
+            (pd.DataFrame): rows of create_dataframe() for the selection
+        """
+        # the crime table has no 'City' column, only the rollup has city rows
+        self._check_level(location_type, LOCATION_TYPES)
+        return self.query(f"SELECT * FROM crime WHERE {_quote(location_type)} = ? AND Year = ?",
+                          (str(location), str(year)))
+
+    def rollup(self, location_type, location, year, category_group=None):
+        """
+        Returns the monthly crime count per category of one location and year from the rollup table.
+
+        Parameters:
+            location_type (str): 'Community', 'Ward Number', 'Sector' or 'City'
+            location (str): name of the specific location/region chosen
+            year (str): year chosen
+            category_group (str): optional category group, only its categories are returned
+
+        Returns:
+            (pd.DataFrame): columns Month, Category, Crime Count
+        """
+        self._check_level(location_type)
+        group_sql, group_params = self._group_clause(category_group)
+        return self.query("SELECT Month, Category, \"Crime Count\" FROM crime_rollup "
+                          "WHERE level = ? AND location = ? AND Year = ?" + group_sql,
+                          (location_type, str(location), str(year)) + group_params)
+
+    def community_rollup(self):
+        """
+        Returns the monthly crime count per category of every community from the rollup table.
+
+        Returns:
+            (pd.DataFrame): columns Community, Year, Month, Category, Crime Count
+        """
+        return self.query("SELECT location AS Community, Year, Month, Category, \"Crime Count\" FROM crime_rollup "
+                          "WHERE level = 'Community'")
+
+    def summarize(self, location, year, location_type, category_group=None):
+        """
+        Builds the summary table text of dataPrintAndSave.summarize_location_year() from the annual
+        facts and the category rollup of the chosen year only.
+
+        Parameters:
+            location (str): name of the specific location/region chosen
+            year (str): year chosen
+            location_type (str): 'Community', 'Ward Number', or 'Sector'
+            category_group (str): optional category group ranked against the other locations
+
+        Returns:
+            (str): the summary table text
+        """
+        group_totals = None
+        if hierarchy_available():
+            self._check_level(location_type, LOCATION_TYPES)
+            categories = self.query("SELECT location, Category, SUM(\"Crime Count\") AS \"Crime Count\" FROM crime_rollup "
+                                    "WHERE level = ? AND Year = ? GROUP BY location, Category", (location_type, str(year)))
+            group_totals = group_rollup(categories, ['location'], cache=False).rename(columns={'location': location_type})
+        return summarize_location_year(None, location, year, location_type, self.annual_facts(year),
+                                       category_group, group_totals)
+
+    def prepare(self, name, location_type, location, year, category_group=None):
+        """
+        Computes the data dict of one plot, the same as the prepare_* function in dataVisualizer
+        would return for the full DataFrame.
+
+        Parameters:
+            name (str): 'crime_category', 'crime_count', 'crime_forecast', 'cc_vs_mdv' or 'cc_vs_bc'
+            location_type (str): 'Community', 'Ward Number', or 'Sector'
+            location (str): name of the specific location/region chosen
+            year (str): year chosen
+            category_group (str): optional category group for the crime category, count and forecast plots
+
+        Returns:
+            (dict): data passed as prepared= to the matching plot function
+        """
+        group_sql, group_params = self._group_clause(category_group)
+        if name == 'crime_category':
+            city = self.query("SELECT Category, Year, SUM(\"Crime Count\") AS \"Crime Count\" FROM crime_rollup "
+                              "WHERE level = 'City'" + group_sql + " GROUP BY Category, Year ORDER BY Category, Year",
+                              group_params)
+            rollup = self.rollup(location_type, location, year)
+            # group totals count every category of the location, before narrowing to the chosen group
+            crime_by_group = group_rollup(rollup, [], cache=False).iloc[0] if hierarchy_available() else None
+            if category_group is not None:
+                rollup = self.rollup(location_type, location, year, category_group)
+            return crime_category_tables(rollup, city, category_group, crime_by_group)
+        elif name == 'crime_count':
+            city = self.query("SELECT Year, Month, SUM(\"Crime Count\") AS \"Crime Count\" FROM crime_rollup "
+                              "WHERE level = 'City'" + group_sql + " GROUP BY Year, Month ORDER BY Year, Month",
+                              group_params)
+            return crime_count_tables(self.rollup(location_type, location, year, category_group), city, category_group)
+        elif name == 'crime_forecast':
+            self._check_level(location_type)
+            monthly = self.query("SELECT Year, Month, SUM(\"Crime Count\") AS \"Crime Count\" FROM crime_rollup "
+                                 "WHERE level = ? AND location = ?" + group_sql + " GROUP BY Year, Month",
+                                 (location_type, str(location)) + group_params)
+            return crime_forecast_tables(monthly, category_group=category_group, periods=self._periods())
+        elif name in ('cc_vs_mdv', 'cc_vs_bc'):
+            return prepare_scatter(None, location, year, location_type, self.annual_facts(year))
+        raise KeyError(f"Invalid plot name: {name}")
+
+    def _periods(self):
+        """
+        Returns the first and last month of the dataset as crimeForecast.dataset_periods() would.
+        """
+        if self._dataset_periods is None:
+            self._dataset_periods = tuple(int(p) for p in self.query(
+                "SELECT MIN(CAST(Year AS INTEGER) * 12 + CAST(Month AS INTEGER) - 1) AS first, "
+                "MAX(CAST(Year AS INTEGER) * 12 + CAST(Month AS INTEGER) - 1) AS last "
+                "FROM crime_rollup WHERE level = 'City'").iloc[0])
+        return self._dataset_periods
+
+    def _group_clause(self, category_group):
+        """
+        Returns the SQL condition and parameters limiting rollup rows to the categories of a group.
+        """
+        if category_group is None:
+            return '', ()
+        if self._categories is None:
+            self._categories = self.query("SELECT DISTINCT Category FROM crime_rollup")['Category'].tolist()
+        # the group bitmask picks the matching category names once, the index does the rest
+        hierarchy = load_category_hierarchy()
+        masks = hierarchy.category_masks(self._categories)
+        members = [c for c, mask in zip(self._categories, masks) if mask & hierarchy.bit(category_group)]
+        if not members:
+            return ' AND 0', ()
+        return f" AND Category IN ({', '.join('?' * len(members))})", tuple(members)
+
+    def _check_level(self, location_type, levels=ROLLUP_LEVELS):
+        # location_type is placed in the SQL text, so only known column names are accepted
+        if location_type not in levels:
+            raise KeyError(f"Invalid location type: {location_type}")
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self._opened = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    """
+    Command line entry point, builds the database or prints a summary from it.
+    """
+    parser = argparse.ArgumentParser(description='Build or query the SQLite store of the merged crime dataset.')
+    parser.add_argument('--build', action='store_true', help='load the source files and write the database')
+    parser.add_argument('--data-dir', default='data', help='directory of the source files used by --build')
+    parser.add_argument('--db', default=DB_FILE, help='database file')
+    parser.add_argument('--summary', nargs=3, metavar=('LOCATION_TYPE', 'LOCATION', 'YEAR'),
+                        help="print the summary table, e.g. --summary Sector CENTRE 2020")
+    parser.add_argument('--category-groups', metavar='CSV',
+                        help='save the crime count per category group of every community and month to a csv file')
+    args = parser.parse_args()
+
+    if args.build:
+        print(f"Written {write_sqlite_store(create_dataframe(data_dir=args.data_dir), db_file=args.db)}")
+    if args.summary:
+        location_type, location, year = args.summary
+        with SqliteStore(args.db) as store:
+            print(store.summarize(location.upper(), year, location_type))
+    if args.category_groups:
+        with SqliteStore(args.db) as store:
+            export_group_rollup(store.community_rollup(), filename=args.category_groups)
+
+
+if __name__ == "__main__":
+    main()
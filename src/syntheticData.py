@@ -0,0 +1,351 @@
+"""
+syntheticData.py
+
+Synthetic large-city dataset generator for scale testing.
+
+Writes schema-faithful synthetic versions of every input CSV read by create_dataframe() (crime
+statistics, census 2016/2017/2019/2021, assessments, wards and business licences) into a directory,
+using the same file names as dataLoader.DATA_FILES, plus a GeoJSON of square community boundaries
+for the choropleth map. The number of communities, wards, crime rows and
+business licences grows with the scale factor (scale=1 is roughly the size of the Calgary data), and
+the random seed makes each dataset reproducible. Community codes and names are shared by every file,
+so the merges in create_dataframe() behave as they do with the real data.
+
+Usage (from the project root):
+    python src/syntheticData.py --scale 10 --seed 1 --out data/synthetic
+    python src/syntheticData.py --benchmark 1 2 5 10
+"""
+import argparse
+import itertools
+import json
+import os
+import string
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataLoader import DATA_FILES, YEAR_RANGE, create_dataframe, create_annual_facts
+from communityBoundaries import BOUNDARY_FILE
+
+# Sizes of the real Calgary data at scale=1
+BASE_COMMUNITIES = 300
+BASE_WARDS = 14
+BASE_BUSINESSES = 20000
+
+SECTORS = ['CENTRE', 'EAST', 'NORTH', 'NORTHEAST', 'NORTHWEST', 'SOUTH', 'SOUTHEAST', 'WEST']
+CATEGORIES = [
+    'Assault (Non-domestic)', 'Break & Enter - Commercial', 'Break & Enter - Dwelling',
+    'Break & Enter - Other Premises', 'Commercial Robbery', 'Street Robbery',
+    'Theft FROM Vehicle', 'Theft OF Vehicle', "Violence\xa0 'Other' (Non-domestic)",
+]
+# relative frequency of each category, in the same order as CATEGORIES
+CATEGORY_WEIGHTS = np.array([1.3, 1.4, 0.9, 0.8, 0.25, 0.37, 2.2, 1.7, 1.1])
+# (CLASS, CLASS_CODE, probability) of the community classes in the wards and census files
+CLASSES = [('Residential', 1, 0.71), ('Industrial', 2, 0.14), ('Major Park', 3, 0.01), ('Residual Sub Area', 4, 0.14)]
+SRGS = ['ESTABLISHED', 'DEVELOPING', 'FUTURE', 'COMPLETE', 'BUILT-OUT']
+STRUCTURES = ['1950s', '1960s/1970s', '1980s/1990s', '2000s', 'INNER CITY', 'EMPLOYMENT', 'UNDEVELOPED']
+LICENCE_TYPES = ['RETAIL DEALER - PREMISES', 'COMMERCIAL CLASS B', 'HOME OCCUPATION - CLASS 1',
+                 'FOOD SERVICE - PREMISES', 'CONTRACTOR', 'PERSONAL SERVICE']
+JOB_STATUSES = ['Licensed', 'Renewal Licensed', 'Renewal Notification Sent']
+
+
+def generate_synthetic_dataset(out_dir, scale=1.0, seed=0, first_year=YEAR_RANGE[0], last_year=YEAR_RANGE[1],
+                               unmatched_rate=0.0):
+    """
+    Generates and writes every input CSV for create_dataframe() into out_dir.
+
+    Parameters:
+        out_dir (str): directory to write the CSV files to, created if needed
+        scale (float): size multiplier, 1.0 is roughly the size of the Calgary data
+        seed (int): random seed, the same seed and scale always give the same files
+        first_year (int): first year of crime data, not before dataLoader.YEAR_RANGE since create_dataframe()
+                          drops earlier years (the census data starts in 2016)
+        last_year (int): last year of crime data, not after dataLoader.YEAR_RANGE
+        unmatched_rate (float): fraction of crime communities renamed so they do not match the wards file,
+                                to exercise the validation stage
+
+    Returns:
+        (dict): file key from DATA_FILES -> number of rows written
+    """
+    if not YEAR_RANGE[0] <= first_year <= last_year <= YEAR_RANGE[1]:
+        raise ValueError(f"Crime years must lie within {YEAR_RANGE[0]}-{YEAR_RANGE[1]}, the years create_dataframe() "
+                         f"keeps, got {first_year}-{last_year}")
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    communities = _make_communities(rng, max(1, round(BASE_COMMUNITIES * scale)), max(1, round(BASE_WARDS * scale)))
+    population = _make_population(rng, communities)
+
+    tables = {
+        'wards': _make_wards(communities),
+        'census2016': _make_city_census(communities, population, 2016),
+        'census2017': _make_city_census(communities, population, 2017),
+        'census2019': _make_city_census(communities, population, 2019),
+        'census2021': _make_federal_census(rng, communities, population),
+        'assessment': _make_assessments(rng, communities),
+        'business': _make_business(rng, communities, max(1, round(BASE_BUSINESSES * scale)), last_year),
+        'crime': _make_crime(rng, communities, population, first_year, last_year, unmatched_rate),
+    }
+
+    for key, table in tables.items():
+        table.to_csv(os.path.join(out_dir, DATA_FILES[key]), index=False)
+    with open(os.path.join(out_dir, BOUNDARY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(_make_boundaries(communities), f)
+    return {key: len(table) for key, table in tables.items()}
+
+
+def benchmark_pipeline(scales, seed=0, out_dir='data/synthetic'):
+    """
+    Generates a dataset for each scale and times create_dataframe() and create_annual_facts() on it.
+
+    Parameters:
+        scales (list): scale factors to benchmark
+        seed (int): random seed used for every generated dataset
+        out_dir (str): parent directory, each scale is written to its own sub directory
+
+    Returns:
+        (pd.DataFrame): one row per scale with input row counts, merged row count and timings in seconds
+    """
+    results = []
+    for scale in scales:
+        scale_dir = os.path.join(out_dir, f"scale_{scale:g}")
+        counts = generate_synthetic_dataset(scale_dir, scale=scale, seed=seed)
+
+        start = time.perf_counter()
+        final_df = create_dataframe(data_dir=scale_dir)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        create_annual_facts(final_df)
+        facts_seconds = time.perf_counter() - start
+
+        results.append({
+            'Scale': scale,
+            'Crime Rows': counts['crime'],
+            'Business Rows': counts['business'],
+            'Merged Rows': len(final_df),
+            'create_dataframe (s)': round(load_seconds, 3),
+            'create_annual_facts (s)': round(facts_seconds, 3),
+        })
+        print(f"Scale {scale:g}: {len(final_df):,} merged rows in {load_seconds:.2f}s")
+    return pd.DataFrame(results)
+
+
+# -------------------- Table builders --------------------
+
+def _make_communities(rng, n_communities, n_wards):
+    """
+    Builds the community dimension shared by every file: code, name, sector, ward and class.
+    """
+    codes = _community_codes(n_communities)
+    classes = rng.choice(len(CLASSES), size=n_communities, p=[c[2] for c in CLASSES])
+    return pd.DataFrame({
+        'COMM_CODE': codes,
+        'NAME': [f"SYNTHETIC {code}" for code in codes],
+        'SECTOR': rng.choice(SECTORS, size=n_communities),
+        'WARD_NUM': rng.integers(1, n_wards + 1, size=n_communities),
+        'CLASS': [CLASSES[c][0] for c in classes],
+        'CLASS_CODE': [CLASSES[c][1] for c in classes],
+        'SRG': rng.choice(SRGS, size=n_communities),
+        'COMM_STRUCTURE': rng.choice(STRUCTURES, size=n_communities),
+    })
+
+
+def _community_codes(n_communities):
+    """
+    Returns n unique upper case community codes, three letters long while they fit like the real codes.
+    """
+    length = 3
+    while len(string.ascii_uppercase) ** length < n_communities:
+        length += 1
+    combos = itertools.product(string.ascii_uppercase, repeat=length)
+    return [''.join(combo) for combo in itertools.islice(combos, n_communities)]
+
+
+def _make_population(rng, communities):
+    """
+    Returns a (communities x census year) DataFrame of populations with a per community growth trend.
+    Only residential communities have residents, as in the real census files.
+    """
+    residential = (communities['CLASS_CODE'] == 1).to_numpy()
+    base = np.where(residential, rng.lognormal(mean=8.2, sigma=0.9, size=len(communities)), 0)
+    growth = rng.normal(0.01, 0.03, size=len(communities))
+    years = [2016, 2017, 2019, 2021]
+    values = {year: np.round(base * (1 + growth) ** (year - 2016)).astype(int) for year in years}
+    return pd.DataFrame(values, index=communities['COMM_CODE'])
+
+
+def _make_wards(communities):
+    """
+    Communities_by_Ward file.
+    """
+    return communities[['COMM_CODE', 'CLASS', 'CLASS_CODE', 'NAME', 'SECTOR', 'SRG', 'COMM_STRUCTURE', 'WARD_NUM']]
+
+
+def _make_city_census(communities, population, year):
+    """
+    Census_by_Community file for 2016, 2017 or 2019.
+    """
+    residents = population[year].to_numpy()
+    return pd.DataFrame({
+        'CLASS': communities['CLASS'],
+        'CLASS_CODE': communities['CLASS_CODE'],
+        'COMM_CODE': communities['COMM_CODE'],
+        'NAME': communities['NAME'],
+        'SECTOR': communities['SECTOR'],
+        'SRG': communities['SRG'],
+        'COMM_STRUCTURE': communities['COMM_STRUCTURE'],
+        'CNSS_YR': year,
+        'FOIP_IND': np.where(residents == 0, 'Y', ''),
+        'RES_CNT': residents,
+        'DWELL_CNT': np.round(residents / 2.4).astype(int),
+    })
+
+
+def _make_federal_census(rng, communities, population):
+    """
+    2021_Federal_Census_Population_and_Dwellings_by_Community file.
+    """
+    total = population[2021].to_numpy()
+    shares = rng.dirichlet([3, 12, 3, 0.5], size=len(total))
+    ages = np.floor(shares * total[:, None]).astype(int)
+    return pd.DataFrame({
+        'COMMUNITY_CODE': communities['COMM_CODE'],
+        'COMMUNITY_NAME': communities['NAME'],
+        'TOTAL_POP_HOUSEHOLD': total,
+        'POP_AGE_0_TO_14': ages[:, 0],
+        'POP_AGE_15_TO_64': ages[:, 1],
+        'POP_AGE_65_TO_84': ages[:, 2],
+        'POP_AGE_85_AND_OVER': ages[:, 3],
+    })
+
+
+def _make_assessments(rng, communities):
+    """
+    Assessments_by_Community file, with a row per residential community for 2016 and 2017.
+    """
+    residential = communities[communities['CLASS_CODE'] == 1]
+    value = rng.lognormal(mean=13.1, sigma=0.4, size=len(residential))
+    accounts = rng.integers(50, 6000, size=len(residential))
+    years = []
+    for year, change in [(2016, 1.0), (2017, 1.02)]:
+        years.append(pd.DataFrame({
+            'date': year,
+            'Community name': residential['NAME'].str.title(),
+            'COMM_CODE': residential['COMM_CODE'],
+            'Number of taxable accounts': np.round(accounts * change).astype(int),
+            'Median assessed value': np.round(value * change, -3).astype(int),
+        }))
+    return pd.concat(years, ignore_index=True)
+
+
+def _make_business(rng, communities, n_businesses, last_year):
+    """
+    Calgary_Business_Licences file, with issue dates spread from 1990 to the last year of data.
+    """
+    weights = rng.lognormal(mean=0, sigma=1.0, size=len(communities))
+    which = rng.choice(len(communities), size=n_businesses, p=weights / weights.sum())
+    start = np.datetime64('1990-01-01')
+    days = (np.datetime64(f"{last_year}-12-31") - start).astype(int)
+    issued = start + rng.integers(0, days, size=n_businesses).astype('timedelta64[D]')
+    expires = issued + rng.integers(365, 3 * 365, size=n_businesses).astype('timedelta64[D]')
+    ids = np.arange(n_businesses)
+    return pd.DataFrame({
+        'GETBUSID': [f"{i:06d}-{i % 97:02d}" for i in ids],
+        'TRADENAME': [f"SYNTHETIC BUSINESS {i}" for i in ids],
+        'HOMEOCCIND': rng.choice(['Y', 'N'], size=n_businesses, p=[0.3, 0.7]),
+        'ADDRESS': [f"{i % 9999 + 1} SYNTHETIC ST" for i in ids],
+        'COMDISTCD': communities['COMM_CODE'].to_numpy()[which],
+        'COMDISTNM': communities['NAME'].to_numpy()[which],
+        'LICENCETYPES': rng.choice(LICENCE_TYPES, size=n_businesses),
+        'FIRST_ISS_DT': pd.to_datetime(issued).strftime('%Y/%m/%d'),
+        'EXP_DT': pd.to_datetime(expires).strftime('%Y/%m/%d'),
+        'JOBSTATUSDESC': rng.choice(JOB_STATUSES, size=n_businesses),
+        'POINT': [f"POINT (-114.{i % 1000:03d} 51.{(i * 7) % 1000:03d})" for i in ids],
+        'GLOBALID': [f"{{{i:08X}-0000-0000-0000-000000000000}}" for i in ids],
+    })
+
+
+def _make_boundaries(communities):
+    """
+    Returns a GeoJSON FeatureCollection laying the communities out as a grid of squares around Calgary.
+    """
+    side = int(np.ceil(np.sqrt(len(communities))))
+    # roughly 1 km squares at Calgary's latitude
+    step_lon, step_lat = 0.014, 0.009
+    features = []
+    for idx, code in enumerate(communities['COMM_CODE']):
+        lon = -114.3 + (idx % side) * step_lon
+        lat = 50.85 + (idx // side) * step_lat
+        ring = [[lon, lat], [lon + step_lon, lat], [lon + step_lon, lat + step_lat], [lon, lat + step_lat], [lon, lat]]
+        features.append({'type': 'Feature', 'properties': {'comm_code': code},
+                         'geometry': {'type': 'Polygon', 'coordinates': [ring]}})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def _make_crime(rng, communities, population, first_year, last_year, unmatched_rate):
+    """
+    Community_Crime_Statistics file. Counts are Poisson with a per community rate that grows with
+    population, a per category weight and a mild seasonal cycle; zero count cells are left out like the
+    real extract.
+    """
+    n_comm = len(communities)
+    years = np.arange(first_year, last_year + 1)
+    months = np.arange(1, 13)
+
+    # expected count for every community x year x month x category cell
+    size = population[2019].to_numpy() / 5000 + 0.2
+    community_rate = rng.lognormal(mean=-0.9, sigma=0.9, size=n_comm) * size
+    season = 1 + 0.15 * np.sin((months - 4) / 12 * 2 * np.pi)
+    weights = CATEGORY_WEIGHTS / CATEGORY_WEIGHTS.mean()
+    rate = (community_rate[:, None, None, None] * np.ones(len(years))[None, :, None, None]
+            * season[None, None, :, None] * weights[None, None, None, :])
+    counts = rng.poisson(rate)
+
+    # keep only cells with at least one crime
+    c_idx, y_idx, m_idx, k_idx = np.nonzero(counts)
+    names = communities['NAME'].to_numpy().astype(object)
+    if unmatched_rate > 0:
+        renamed = rng.random(n_comm) < unmatched_rate
+        names = np.where(renamed, [f"{name} UNMATCHED" for name in names], names)
+
+    crime = pd.DataFrame({
+        'Community': names[c_idx],
+        'Category': np.array(CATEGORIES, dtype=object)[k_idx],
+        'Crime Count': counts[c_idx, y_idx, m_idx, k_idx],
+        'Year': years[y_idx],
+        'Month': months[m_idx],
+    })
+    # the real extract is not ordered
+    return crime.sample(frac=1.0, random_state=int(rng.integers(2**31))).reset_index(drop=True)
+
+
+def main():
+    """
+    Command line entry point, generates one dataset or runs the scaling benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Generate synthetic Calgary style input CSVs for scale testing.')
+    parser.add_argument('--scale', type=float, default=1.0, help='size multiplier (1 = Calgary size)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--out', default='data/synthetic', help='output directory')
+    parser.add_argument('--first-year', type=int, default=YEAR_RANGE[0],
+                        help=f'first year of crime data, {YEAR_RANGE[0]} or later')
+    parser.add_argument('--unmatched-rate', type=float, default=0.0,
+                        help='fraction of crime communities that do not match the wards file')
+    parser.add_argument('--benchmark', type=float, nargs='+', metavar='SCALE',
+                        help='generate each scale and time the load pipeline instead')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(benchmark_pipeline(args.benchmark, seed=args.seed, out_dir=args.out).to_string(index=False))
+        return
+
+    counts = generate_synthetic_dataset(args.out, scale=args.scale, seed=args.seed,
+                                        first_year=args.first_year, unmatched_rate=args.unmatched_rate)
+    for key, rows in counts.items():
+        print(f"{DATA_FILES[key]:<75} {rows:>10,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from dataVisualizer import show_regions_available
+from categoryHierarchy import hierarchy_available, load_category_hierarchy
 
 def get_location(df):
     """
@@ -39,14 +40,18 @@ def get_community(df):
         (str): name of the specific community chosen
     """
     table = input(f"Would you like to view a list of valid Communities? (Y/N): ").strip().upper()
+    selected = None
     if table == 'Y':
-        show_regions_available(df, 'Community')
+        # a community picked from the list is used directly instead of being retyped
+        selected = show_regions_available(df, 'Community')
 
     while True:
         # formating input to be case insensitive and ignore spaces at beginning and end
-        community = input("Please enter a community by name or 3 character code to analyze data on: ").strip().upper()
-        df['Community Code'] = df['Community Code'].str.upper()
-        df['Community'] = df['Community'].str.upper()
+        if selected is not None:
+            community, selected = str(selected).strip().upper(), None
+        else:
+            community = input("Please enter a community by name or 3 character code to analyze data on: ").strip().upper()
+        # names and codes are upper cased at load time, df itself is never changed here
         try:
             if (community not in df['Community Code'].values) and (community not in df['Community'].values):
                 raise KeyError('\nThis community was not found in the data. Please try again.\n')
@@ -90,12 +95,17 @@ def get_ward(df):
         (str): the specific ward number chosen
     """
     table = input(f"Would you like to view a list of valid Wards? (Y/N): ").strip().upper()
+    selected = None
     if table == 'Y':
-        show_regions_available(df, 'Ward Number')
+        # a ward picked from the list is used directly instead of being retyped
+        selected = show_regions_available(df, 'Ward Number')
 
     while True:
         # formating input to be case insensitive and ignore spaces at beginning and end
-        ward = input("Please enter the city ward to analyze data on (i.e. 1-14): ")
+        if selected is not None:
+            ward, selected = str(selected), None
+        else:
+            ward = input("Please enter the city ward to analyze data on (i.e. 1-14): ")
         try:
             if (ward not in df['Ward Number'].values):
                 raise KeyError('\nThis city ward was not found in the data. Please try again.\n')
@@ -117,13 +127,17 @@ def get_sector(df):
         (str): name of the city sector chosen
     """
     table = input(f"Would you like to view a list of valid Sectors? (Y/N): ").strip().upper()
+    selected = None
     if table == 'Y':
-        show_regions_available(df, 'Sector')
+        # a sector picked from the list is used directly instead of being retyped
+        selected = show_regions_available(df, 'Sector')
 
     while True:
         # formating input to be case insensitive and ignore spaces at beginning and end
-        sector = input("Please enter the city sector to analyze data on: ").strip().upper().replace(" ", "")
-        df['Sector'] = df['Sector'].str.upper()
+        if selected is not None:
+            sector, selected = str(selected).strip().upper().replace(" ", ""), None
+        else:
+            sector = input("Please enter the city sector to analyze data on: ").strip().upper().replace(" ", "")
         try:
             if sector in df['Sector'].values:
                 return df.loc[df['Sector'] == sector, 'Sector'].iloc[0]
@@ -133,3 +147,25 @@ def get_sector(df):
                 raise KeyError('\nThis city sector was not found in the data. Please try again.\n')
         except KeyError as e:
             print(e.args[0])
+
+
+def get_category_group():
+    """
+    Prompts the user to choose a crime category group from the category config, ENTER keeps every category.
+    
+    Returns:
+        (str): name of the category group chosen, None for all categories or if there is no category config
+    """
+    if not hierarchy_available():
+        return None
+    hierarchy = load_category_hierarchy()
+
+    while True:
+        group = input(f"Please enter a crime category group ({', '.join(hierarchy.groups)}) " \
+                      "or hit 'ENTER' for all categories: ").strip()
+        if group == '':
+            return None
+        try:
+            return hierarchy.group_name(group)
+        except KeyError:
+            print('\nThis category group was not found in the config. Please try again.\n')
@@ -0,0 +1,276 @@
+"""
+visualizerSession.py
+
+Prompt-free scripting API for the visualizer pipeline.
+
+A VisualizerSession holds the merged DataFrame and a worker pool. Submitting a selection returns a
+VisualizerQuery whose summary table and plots are computed concurrently in the pool, while the
+caller (the CLI in main.py, a notebook, or a batch script) is free to do something else. The workers
+also draw every plot into its own Agg backed matplotlib Figure without touching pyplot, which is not
+thread safe; showing a finished plot on the calling thread only hands the figure to a window, and the
+console tables of the plots are printed there too. A session can also be
+backed by a sqliteStore.SqliteStore instead of an in-memory DataFrame, then every query reads only
+the rows it needs from the database.
+
+Example:
+    with VisualizerSession(df) as session:
+        query = session.submit('Sector', 'CENTRE', '2020')
+        print(query.summary.result())
+        query.show('crime_count')
+
+    with VisualizerSession(store=SqliteStore()) as session:
+        ...
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from dataLoader import create_annual_facts
+from dataAnalytics import relationship_report
+from dataPrintAndSave import summarize_location_year
+from dataVisualizer import (prepare_crime_category, prepare_crime_count, prepare_crime_forecast, prepare_scatter,
+                            figure_crime_category, figure_crime_count, figure_crime_forecast, figure_cc_vs_mdv,
+                            figure_cc_vs_bc, plot_crime_category, plot_crime_count, plot_crime_forecast,
+                            plot_cc_vs_mdv, plot_cc_vs_bc)
+
+# plot name -> (function computing its data, function drawing its figure in a worker,
+#               function showing it, file name used by save_plot)
+PLOTS = {
+    'crime_category': (prepare_crime_category, figure_crime_category, plot_crime_category, 'Crime_Category_Count'),
+    'crime_count': (prepare_crime_count, figure_crime_count, plot_crime_count, 'Crime_Count_by_Month'),
+    'crime_forecast': (prepare_crime_forecast, figure_crime_forecast, plot_crime_forecast, 'Crime_Count_Forecast'),
+    'cc_vs_mdv': (prepare_scatter, figure_cc_vs_mdv, plot_cc_vs_mdv, 'Crime_per_Capita_vs__med_Assessed_Value'),
+    'cc_vs_bc': (prepare_scatter, figure_cc_vs_bc, plot_cc_vs_bc, 'Crime_Count_vs_Business_Count'),
+}
+
+# plots whose data comes from the per community annual fact table
+ANNUAL_PLOTS = ('cc_vs_mdv', 'cc_vs_bc')
+
+# plots that can be filtered to one category group of categoryHierarchy
+GROUP_PLOTS = ('crime_category', 'crime_count', 'crime_forecast')
+
+
+class VisualizerSession:
+    """
+    Runs visualizer queries against one merged DataFrame in a pool of worker threads. The annual fact
+    table is built once in the background when the session starts and shared by every query. The merged
+    DataFrame may also be given as a Future while it is still loading, queries can then be submitted
+    right away and each result waits only for the data it needs. The data can be replaced with
+    set_data() (e.g. by a dataRefresh.DatasetHolder swap listener); queries that were already
+    submitted keep using the data they started with.
+
+    Instance variables:
+        executor (ThreadPoolExecutor): worker pool computing summaries, plot data and figures
+    """
+
+    def __init__(self, df=None, annual_df=None, max_workers=4, store=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='visualizer')
+        if store is not None:
+            self.set_store(store)
+        else:
+            self.set_data(df, annual_df)
+
+    def set_data(self, df, annual_df=None):
+        """
+        Replaces the data used by queries submitted from now on.
+
+        Parameters:
+            df (pd.DataFrame): merged DataFrame returned by create_dataframe(), or a Future of it while it
+                               is still loading in the background
+            annual_df (pd.DataFrame): per community and year fact table, built in the background if not given
+        """
+        df_future = _as_future(df)
+        if annual_df is None:
+            annual_future = self.executor.submit(lambda: create_annual_facts(df_future.result()))
+        else:
+            annual_future = _as_future(annual_df)
+        # DataFrame, fact table and store are replaced together in one assignment
+        self._data = (df_future, annual_future, None)
+
+    def set_store(self, store):
+        """
+        Makes queries submitted from now on read from a SQLite store instead of an in-memory DataFrame.
+        df then holds only the region and year dimensions, enough for the location and year prompts.
+
+        Parameters:
+            store (sqliteStore.SqliteStore): store opened on a database from write_sqlite_store()
+        """
+        annual_future = self.executor.submit(store.annual_facts)
+        self._data = (_as_future(store.dimensions()), annual_future, store)
+
+    @property
+    def df(self):
+        """
+        Merged DataFrame used by new queries, or the dimensions of the store if the session uses one.
+        Waits for the background load if it is not finished yet.
+        """
+        return self._data[0].result()
+
+    @property
+    def annual_df(self):
+        """
+        Per community and year fact table, waiting for the background build if it is not ready yet.
+        """
+        return self._data[1].result()
+
+    def submit(self, location_type, location, year, category_group=None):
+        """
+        Starts computing the summary table, the data and the figures of all plots for a selection.
+
+        Parameters:
+            location_type (str): 'Community', 'Ward Number', or 'Sector'
+            location (str): name of the specific location/region chosen
+            year (str): year chosen (2018-2024)
+            category_group (str): optional category group, the crime category, crime count and forecast
+                                  plots then only count the categories of that group
+
+        Returns:
+            (VisualizerQuery): query holding one future per result
+        """
+        df_future, annual_future, store = self._data
+        if store is not None:
+            # each result reads only the rows of the selection from the database
+            summary = self.executor.submit(store.summarize, location, year, location_type, category_group)
+            plots = {name: self.executor.submit(store.prepare, name, location_type, location, year,
+                                                category_group if name in GROUP_PLOTS else None) for name in PLOTS}
+            return VisualizerQuery(df_future, None, location_type, location, year, summary, plots,
+                                   self._submit_figures(plots, location_type, location, year))
+
+        # every task waits only for the inputs it needs, so plots of the merged DataFrame can start
+        # while the fact table is still being built
+        summary = self.executor.submit(lambda: summarize_location_year(
+            df_future.result(), location, year, location_type, annual_future.result(), category_group))
+
+        plots = {}
+        for name, (prepare, _, _, _) in PLOTS.items():
+            if name in ANNUAL_PLOTS:
+                plots[name] = self.executor.submit(lambda prepare=prepare: prepare(
+                    df_future.result(), location, year, location_type, annual_future.result()))
+            elif name in GROUP_PLOTS:
+                plots[name] = self.executor.submit(lambda prepare=prepare: prepare(
+                    df_future.result(), location, year, location_type, category_group=category_group))
+            else:
+                plots[name] = self.executor.submit(lambda prepare=prepare: prepare(
+                    df_future.result(), location, year, location_type))
+
+        return VisualizerQuery(df_future, annual_future, location_type, location, year, summary, plots,
+                               self._submit_figures(plots, location_type, location, year))
+
+    def _submit_figures(self, plots, location_type, location, year):
+        """
+        Starts drawing the figure of every plot from its data. The figure tasks are queued after every
+        data task of the query, so a worker waiting on plot data never holds up the task computing it.
+
+        Returns:
+            (dict): plot name -> Future of its matplotlib Figure
+        """
+        return {name: self.executor.submit(lambda figure=PLOTS[name][1], prepared=prepared: figure(
+                    prepared.result(), location, year, location_type)) for name, prepared in plots.items()}
+
+    def submit_relationship_report(self, **kwargs):
+        """
+        Starts computing the correlation and regression report for every relationship, level and year.
+
+        Parameters:
+            **kwargs: keyword arguments passed on to dataAnalytics.relationship_report()
+
+        Returns:
+            (Future): future of the report DataFrame
+        """
+        annual_future = self._data[1]
+        return self.executor.submit(lambda: relationship_report(annual_future.result(), **kwargs))
+
+    def close(self):
+        """
+        Shuts the worker pool down, waiting for running work to finish.
+        """
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class VisualizerQuery:
+    """
+    Results of one VisualizerSession.submit() call. Every result is a concurrent.futures.Future.
+
+    Instance variables:
+        location_type (str): 'Community', 'Ward Number', or 'Sector'
+        location (str): name of the specific location/region chosen
+        year (str): year chosen
+        summary (Future): text of the location and year summary table
+        plots (dict): plot name (see PLOTS) -> Future of the data dict for that plot
+        figures (dict): plot name (see PLOTS) -> Future of the matplotlib Figure drawn from that data
+    """
+
+    def __init__(self, df, annual_df, location_type, location, year, summary, plots, figures):
+        self._df = _as_future(df)
+        self._annual_df = _as_future(annual_df)
+        self.location_type = location_type
+        self.location = location
+        self.year = year
+        self.summary = summary
+        self.plots = plots
+        self.figures = figures
+
+    @property
+    def df(self):
+        """
+        Merged DataFrame the query was computed from (dimensions for a store session).
+        """
+        return self._df.result()
+
+    @property
+    def annual_df(self):
+        """
+        Annual fact table the query was computed from, None for a store session.
+        """
+        return self._annual_df.result()
+
+    def done(self):
+        """
+        Returns True once the summary and every plot figure have finished computing.
+        """
+        return self.summary.done() and all(future.done() for future in self.figures.values())
+
+    def show(self, name):
+        """
+        Shows the figure of one plot drawn by the workers, waiting for it if needed, and prints its
+        console tables. Must be called on the main thread.
+
+        Parameters:
+            name (str): plot name, one of the keys of PLOTS
+
+        Returns:
+            Opens a plt window displaying the plot.
+        """
+        _, _, plot, _ = PLOTS[name]
+        prepared, figure = self.plots[name].result(), self.figures[name].result()
+        if name in ANNUAL_PLOTS:
+            plot(self.df, self.location, self.year, self.location_type, self.annual_df, prepared=prepared, figure=figure)
+        else:
+            plot(self.df, self.location, self.year, self.location_type, prepared=prepared, figure=figure)
+
+    def plot_file_name(self, name):
+        """
+        Returns the plot_name used by save_plot() for a plot.
+
+        Parameters:
+            name (str): plot name, one of the keys of PLOTS
+
+        Returns:
+            (str): short file name part, e.g. 'Crime_Count_by_Month'
+        """
+        return PLOTS[name][3]
+
+
+def _as_future(value):
+    """
+    Returns value if it is already a Future, otherwise a finished Future holding it.
+    """
+    if isinstance(value, Future):
+        return value
+    future = Future()
+    future.set_result(value)
+    return future
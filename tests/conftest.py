@@ -0,0 +1,52 @@
+"""
+Shared fixtures of the test suite.
+
+The modules in src/ import each other by plain module name and read their inputs from a relative
+'data' folder, so src/ is put on the import path and tests that need the input files run from a
+project folder holding a small synthetic dataset.
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+# the plots are drawn without a window
+import matplotlib
+matplotlib.use('Agg')
+
+from syntheticData import generate_synthetic_dataset
+from dataLoader import create_dataframe, create_annual_facts
+
+
+@pytest.fixture(scope='session')
+def project_dir(tmp_path_factory):
+    """
+    Folder with a 'data' folder holding a small synthetic dataset and the category group config.
+    """
+    project = tmp_path_factory.mktemp('project')
+    generate_synthetic_dataset(str(project / 'data'), scale=0.2, seed=7)
+    shutil.copy(os.path.join(os.path.dirname(SRC_DIR), 'data', 'category_groups.json'), project / 'data')
+    return project
+
+
+@pytest.fixture
+def in_project(project_dir, monkeypatch):
+    """
+    Runs the test from the synthetic project folder, so relative 'data/...' paths resolve.
+    """
+    monkeypatch.chdir(project_dir)
+    return project_dir
+
+
+@pytest.fixture(scope='session')
+def final_df(project_dir):
+    return create_dataframe(data_dir=str(project_dir / 'data'))
+
+
+@pytest.fixture(scope='session')
+def annual_df(final_df):
+    return create_annual_facts(final_df)
@@ -0,0 +1,82 @@
+import gc
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import categoryHierarchy
+from categoryHierarchy import (CategoryHierarchy, encode_categories, group_mask, group_rollup, filter_group,
+                               load_category_hierarchy, _ENCODING_CACHE)
+from dataVisualizer import prepare_crime_category, prepare_crime_forecast
+
+
+@pytest.fixture
+def hierarchy(in_project):
+    return load_category_hierarchy()
+
+
+def _members(hierarchy, df, group):
+    keys = {categoryHierarchy._category_key(c) for c in hierarchy.members[group]}
+    return df['Category'].map(lambda c: categoryHierarchy._category_key(c) in keys if pd.notna(c) else False)
+
+
+def test_group_mask_matches_isin(final_df, hierarchy):
+    for group in hierarchy.groups:
+        assert (group_mask(final_df, group, hierarchy) == _members(hierarchy, final_df, group).to_numpy()).all()
+
+
+def test_group_names_are_case_insensitive(hierarchy):
+    assert hierarchy.group_name('violent') == 'Violent'
+    with pytest.raises(KeyError):
+        hierarchy.bit('no such group')
+
+
+def test_group_rollup_matches_groupby(final_df, hierarchy):
+    rollup = group_rollup(final_df, ['Community', 'Year'], hierarchy=hierarchy).set_index(['Community', 'Year'])
+    for group in hierarchy.groups:
+        expected = final_df[_members(hierarchy, final_df, group)].groupby(['Community', 'Year'])['Crime Count'].sum()
+        assert np.allclose(rollup[group].reindex(expected.index), expected)
+
+
+def test_group_rollup_rows_mask(final_df, hierarchy):
+    rows = (final_df['Year'] == '2020').to_numpy()
+    expected = group_rollup(final_df[rows], [], hierarchy=hierarchy, cache=False)
+    pd.testing.assert_frame_equal(group_rollup(final_df, [], hierarchy=hierarchy, rows=rows), expected)
+
+
+def test_reloaded_config_is_not_served_stale_masks(tmp_path):
+    df = pd.DataFrame({'Category': ['A', 'B', 'A'], 'Crime Count': [1.0, 2.0, 3.0]})
+    config = tmp_path / 'groups.json'
+    for i, (members, expected) in enumerate([(['A'], [True, False, True]), (['B'], [False, True, False]),
+                                             (['A'], [True, False, True]), (['B'], [False, True, False])]):
+        config.write_text(json.dumps({'groups': {'G': members}}))
+        # every rewrite gets a distinct modified time, so the config is parsed again
+        os.utime(config, ns=(0, (i + 1) * 10 ** 9))
+        # no reference to the previous hierarchy is kept, as in the CLI, so its id may be reused
+        assert list(group_mask(df, 'G', load_category_hierarchy(str(config)))) == expected
+
+
+def test_encoding_dropped_when_dataframe_is_freed():
+    hierarchy = CategoryHierarchy({'G': ['A']})
+    df = pd.DataFrame({'Category': ['A', 'B'], 'Crime Count': [1.0, 2.0]})
+    encode_categories(df, hierarchy)
+    assert len(_ENCODING_CACHE[hierarchy]) == 1
+    del df
+    gc.collect()
+    assert len(_ENCODING_CACHE[hierarchy]) == 0
+
+
+def test_category_group_totals_use_all_categories(final_df, hierarchy):
+    community = final_df['Community'].iloc[0]
+    all_categories = prepare_crime_category(final_df, community, '2020', 'Community')
+    violent = prepare_crime_category(final_df, community, '2020', 'Community', category_group='Violent')
+    pd.testing.assert_series_equal(violent['crime_by_group'], all_categories['crime_by_group'])
+    # the plotted categories are still narrowed to the group
+    assert set(violent['crime_by_category']['Category']) <= set(filter_group(final_df, 'Violent')['Category'])
+
+
+def test_forecast_model_stays_positional(final_df, in_project):
+    community = final_df['Community'].iloc[0]
+    assert prepare_crime_forecast(final_df, community, '2020', 'Community', 'seasonal_naive')['model'] == 'seasonal_naive'
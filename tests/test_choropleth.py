@@ -0,0 +1,117 @@
+import json
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.backend_bases import KeyEvent
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+
+import dataVisualizer
+from communityBoundaries import load_boundaries
+from dataVisualizer import choropleth_values, plot_choropleth
+
+
+def _annual():
+    return pd.DataFrame({
+        'Community Code': ['aaa', 'BBB', 'CCC', 'DDD'],
+        'Year': '2020',
+        'Sector': ['NORTH', 'NORTH', 'SOUTH', 'SOUTH'],
+        'Ward Number': ['1', '1', '1', '2'],
+        'Crime Count': [10.0, 30.0, 5.0, 8.0],
+        'Population Household': [1000.0, 3000.0, 0.0, 0.0],
+        'Community Businesses Opened TD Total': [4.0, 6.0, 2.0, 1.0],
+    })
+
+
+def test_region_levels_shade_members_with_the_region_value():
+    sector = choropleth_values(_annual(), '2020', 'Sector', 'Crime per Capita 1000')
+    assert sector['AAA'] == sector['BBB'] == pytest.approx(40 / 4000 * 1000)
+
+    ward = choropleth_values(_annual(), '2020', 'Ward Number', 'Crime Count')
+    assert ward.to_dict() == {'AAA': 45.0, 'BBB': 45.0, 'CCC': 45.0, 'DDD': 8.0}
+    ward_density = choropleth_values(_annual(), '2020', 'Ward Number', 'Business Density')
+    assert ward_density['CCC'] == pytest.approx(12 / 4000 * 1000)
+
+
+def test_zero_population_is_nan_not_inf():
+    for location_type in ('Community', 'Sector', 'Ward Number'):
+        values = choropleth_values(_annual(), '2020', location_type, 'Crime per Capita 1000')
+        assert not np.isinf(values).any()
+    assert np.isnan(choropleth_values(_annual(), '2020', 'Community', 'Crime per Capita 1000')['CCC'])
+    assert np.isnan(choropleth_values(_annual(), '2020', 'Sector', 'Business Density')['DDD'])
+
+
+def _square(lon, lat, size, clockwise=False):
+    ring = [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+    return ring[::-1] if clockwise else ring
+
+
+def _write_geojson(path, features):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {'comm_code': code}, 'geometry': geometry} for code, geometry in features]}, f)
+
+
+def test_boundaries_are_parsed_once_per_file_version(tmp_path):
+    file_name = 'boundaries.geojson'
+    _write_geojson(tmp_path / file_name, [('AAA', {'type': 'Polygon', 'coordinates': [_square(-114, 51, 0.01)]})])
+    first = load_boundaries(str(tmp_path), file_name)
+    assert load_boundaries(str(tmp_path), file_name) is first and first.codes == ['AAA']
+
+    _write_geojson(tmp_path / file_name, [('bbb', {'type': 'Polygon', 'coordinates': [_square(-114, 51, 0.01)]})])
+    os.utime(tmp_path / file_name, ns=(0, os.stat(tmp_path / file_name).st_mtime_ns + 10**9))
+    second = load_boundaries(str(tmp_path), file_name)
+    assert second is not first and second.codes == ['BBB']
+
+
+def test_holes_stay_unfilled_whatever_their_winding(tmp_path):
+    # the hole has the same winding as the exterior, and a second polygon of the same code is merged in
+    polygon = [_square(-114, 51, 1.0), _square(-113.6, 51.4, 0.2)]
+    _write_geojson(tmp_path / 'holes.geojson', [
+        ('AAA', {'type': 'MultiPolygon', 'coordinates': [polygon]}),
+        ('AAA', {'type': 'Polygon', 'coordinates': [_square(-110, 51, 0.1, clockwise=True)]}),
+    ])
+    boundaries = load_boundaries(str(tmp_path), 'holes.geojson')
+    assert boundaries.codes == ['AAA']
+    # Path.contains_point ignores holes, so the path is drawn the way the map fills it and pixels are read
+    fig = Figure(figsize=(4, 4), dpi=50)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.add_collection(PathCollection(boundaries.paths, facecolors='black', edgecolors='none'))
+    min_x, min_y, max_x, max_y = boundaries.bounds
+    ax.set_xlim(min_x, max_x)
+    ax.set_ylim(min_y, max_y)
+    ax.axis('off')
+    fig.canvas.draw()
+    pixels = np.asarray(fig.canvas.buffer_rgba())
+
+    def filled(x, y):
+        column, row = ax.transData.transform((x, y))
+        return pixels[int(pixels.shape[0] - row), int(column), 0] < 128
+
+    exterior = boundaries.paths[0].vertices[:5]
+    (left, bottom), (right, top) = exterior.min(axis=0), exterior.max(axis=0)
+    assert not filled((left + right) / 2, (bottom + top) / 2)
+    assert filled(left + 0.1 * (right - left), bottom + 0.1 * (top - bottom))
+    # the polygon of the second feature is filled too
+    square = boundaries.paths[0].vertices[-6:-1]
+    assert filled(*square.mean(axis=0))
+
+def test_arrow_keys_step_the_year_only(final_df, annual_df, project_dir, monkeypatch):
+    defaults = []
+    monkeypatch.setattr(dataVisualizer, 'key_press_handler', lambda event: defaults.append(event.key))
+    community = annual_df['Community'].iloc[0]
+    plt.close('all')
+    plot_choropleth(final_df, community, '2020', 'Community', annual_df, data_dir=str(project_dir / 'data'))
+    fig = plt.gcf()
+
+    for key in ('right', 'h'):
+        fig.canvas.callbacks.process('key_press_event', KeyEvent('key_press_event', fig.canvas, key))
+    assert '(2021)' in fig.axes[0].get_title()
+    # the default bindings still get every other key, but not the map's
+    assert defaults == ['h']
+    plt.close('all')
@@ -0,0 +1,56 @@
+import mmap
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SRC_DIR
+from columnarStore import ColumnarStore, write_columnar_store
+
+
+def _is_memory_mapped(values):
+    # follows the chain of base arrays down to the mapped file
+    while values is not None:
+        if isinstance(values, (np.memmap, mmap.mmap)):
+            return True
+        values = getattr(values, 'base', None)
+    return False
+
+
+def _backing_array(series):
+    return series.array.codes if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+
+
+@pytest.fixture(scope='module')
+def store(final_df, tmp_path_factory):
+    return ColumnarStore(write_columnar_store(final_df, str(tmp_path_factory.mktemp('columnar') / 'store')))
+
+
+def test_round_trip(store, final_df):
+    frame = store.frame()
+    assert list(frame.columns) == list(final_df.columns)
+    for col in final_df.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            # string columns come back as categoricals of the same values
+            assert frame[col].astype(object).fillna('<NA>').tolist() == \
+                final_df[col].astype(object).fillna('<NA>').tolist(), col
+        else:
+            np.testing.assert_array_equal(frame[col].to_numpy(), final_df[col].to_numpy(dtype=float), err_msg=col)
+
+
+def test_columns_are_memory_mapped(store):
+    for col in store.columns:
+        assert _is_memory_mapped(_backing_array(store.column(col))), col
+    frame = store.frame()
+    for col in frame.columns:
+        assert _is_memory_mapped(_backing_array(frame[col])), col
+
+
+def test_build_command(project_dir, tmp_path):
+    out = tmp_path / 'store'
+    subprocess.run([sys.executable, os.path.join(SRC_DIR, 'columnarStore.py'), '--build',
+                    '--data-dir', str(project_dir / 'data'), '--store', str(out)], check=True, capture_output=True)
+    assert ColumnarStore(str(out)).n_rows > 0
@@ -0,0 +1,61 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from crimeDiff import diff_extracts, update_annual_facts
+from dataLoader import DATA_FILES, create_annual_facts, create_dataframe
+
+
+@pytest.fixture(scope='module')
+def extracts(project_dir):
+    old = pd.read_csv(project_dir / 'data' / DATA_FILES['crime'])
+    new = old.copy()
+    new.loc[0, 'Crime Count'] += 5                                  # revised
+    new = new.drop(index=1)                                         # removed
+    added = old.loc[[2]].assign(Year=2017)                          # added, a year that is not in the old extract
+    new = pd.concat([new, added], ignore_index=True)
+    # order, case and padding of the names do not count as changes
+    new['Community'] = ' ' + new['Community'].str.lower() + ' '
+    new = new.sample(frac=1, random_state=0).reset_index(drop=True)
+    return old, new
+
+
+def _status(report, row):
+    partitions = report['partitions']
+    match = (partitions['Community'] == row['Community'].strip().upper()) & (partitions['Category'] == row['Category']) \
+            & (partitions['Year'] == row['Year']) & (partitions['Month'] == row['Month'])
+    return partitions.loc[match, 'Status'].tolist()
+
+
+def test_diff_finds_each_changed_partition(extracts):
+    old, new = extracts
+    report = diff_extracts(old, new)
+    assert (report['added'], report['removed'], report['revised']) == (1, 1, 1)
+    assert report['unchanged'] == len(old) - 2
+    assert _status(report, old.iloc[0]) == ['revised']
+    assert _status(report, old.iloc[1]) == ['removed']
+    assert _status(report, old.iloc[2].to_dict() | {'Year': 2017}) == ['added']
+    assert (2017, int(old.loc[2, 'Month'])) in report['months']
+
+
+def test_identical_extracts_have_no_changes(extracts):
+    old, _ = extracts
+    report = diff_extracts(old, old.iloc[::-1])
+    assert report['unchanged'] == len(old) and report['partitions'].empty
+
+
+def test_update_matches_a_full_rebuild(project_dir, tmp_path, annual_df, extracts):
+    old, _ = extracts
+    # revised counts only, an added or removed partition of a year outside 2018-2024 is not in the merged data
+    new = old.copy()
+    new.loc[new.index[:40:4], 'Crime Count'] += 3
+    data_dir = tmp_path / 'data'
+    shutil.copytree(project_dir / 'data', data_dir)
+    new.to_csv(data_dir / DATA_FILES['crime'], index=False)
+
+    new_final = create_dataframe(data_dir=str(data_dir))
+    report = diff_extracts(old, new)
+    assert report['revised'] == 10
+    updated = update_annual_facts(annual_df, new_final, report)
+    pd.testing.assert_frame_equal(updated, create_annual_facts(new_final), check_dtype=False)
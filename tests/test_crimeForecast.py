@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SRC_DIR
+from crimeForecast import (FORECAST_MODELS, HORIZON, dataset_periods, fit_forecasts, forecast_all, monthly_matrix)
+from dataVisualizer import prepare_crime_forecast
+
+
+def _monthly(years, months, counts):
+    return pd.DataFrame({'Year': [str(y) for y in years], 'Month': np.asarray(months, dtype=float),
+                         'Crime Count': np.asarray(counts, dtype=float)})
+
+
+def test_monthly_matrix_fills_missing_months_and_aligns_to_dataset():
+    monthly = _monthly([2020, 2020], [1, 3], [5, 7])
+    _, first, matrix = monthly_matrix(monthly)
+    assert first == 2020 * 12 and matrix.tolist() == [[5, 0, 7]]
+
+    # aligned to a dataset running to December, the last months count zero
+    _, first, matrix = monthly_matrix(monthly, periods=(2020 * 12, 2020 * 12 + 11))
+    assert matrix.shape == (1, 12) and matrix[0, 3:].sum() == 0
+
+
+def test_linear_trend_matches_per_series_lstsq():
+    rng = np.random.default_rng(0)
+    matrix = rng.poisson(20, size=(4, 36)).astype(float) + np.arange(36)
+    forecast, lower, upper = fit_forecasts(matrix, 2019 * 12, models=['linear_trend'])['linear_trend']
+    months = np.arange(36) % 12
+    design = np.column_stack([np.ones(36), np.arange(36), np.eye(12)[months][:, 1:]])
+    future = np.column_stack([np.ones(HORIZON), 35 + np.arange(1, HORIZON + 1), np.eye(12)[np.arange(HORIZON) % 12][:, 1:]])
+    for row in range(4):
+        coefs = np.linalg.lstsq(design, matrix[row], rcond=None)[0]
+        assert np.allclose(forecast[row], np.clip(future @ coefs, 0, None))
+    assert (lower <= forecast).all() and (forecast <= upper).all()
+
+
+def test_intervals_are_clipped_consistently():
+    # a falling series forecasts below zero, every bound is clipped at zero
+    matrix = np.linspace(50, 0, 36)[None, :]
+    for forecast, lower, upper in fit_forecasts(matrix, 2019 * 12).values():
+        assert (forecast >= 0).all() and (lower >= 0).all() and (upper >= 0).all()
+        assert (lower <= upper).all()
+
+
+def test_sparse_location_forecast_starts_after_dataset_end(final_df):
+    last = dataset_periods(final_df)[1]
+    # a community whose crime stops a year before the end of the dataset
+    community = final_df['Community'].iloc[0]
+    last_year = str(last // 12)
+    sparse = final_df[~((final_df['Community'] == community) & (final_df['Year'] == last_year))]
+    prepared = prepare_crime_forecast(sparse, community, '2020', 'Community')
+
+    first_forecast = prepared['forecast']['Date'].iloc[0]
+    assert (first_forecast.year, first_forecast.month) == ((last + 1) // 12, (last + 1) % 12 + 1)
+    assert prepared['history']['Crime Count'].tail(12).sum() == 0
+
+
+def test_forecast_all_starts_after_dataset_end(final_df):
+    last = dataset_periods(final_df)[1]
+    forecasts = forecast_all(final_df, levels=['Community', 'City'], category_group=None)
+    assert set(forecasts['Model']) == set(FORECAST_MODELS)
+    periods = forecasts['Year'].astype(int) * 12 + forecasts['Month'] - 1
+    assert periods.min() == last + 1 and periods.max() == last + HORIZON
+    assert (forecasts[['Forecast', 'Lower', 'Upper']] >= 0).all().all()
+
+
+def test_command_line_forecasts_every_level(project_dir, final_df, tmp_path):
+    out = tmp_path / 'forecasts.csv'
+    subprocess.run([sys.executable, os.path.join(SRC_DIR, 'crimeForecast.py'), '--data-dir', str(project_dir / 'data'),
+                    '--out', str(out), '--models', 'linear_trend'], cwd=project_dir, check=True, capture_output=True)
+    exported = pd.read_csv(out, dtype={'Location': str})
+
+    for level in ('Community', 'Sector', 'Ward Number'):
+        locations = final_df[level].dropna().astype(str)
+        expected = set(locations[locations.str.strip() != ''])
+        assert set(exported.loc[exported['Level'] == level, 'Location']) == expected
+    assert (exported.groupby(['Level', 'Location']).size() == HORIZON).all()
+    assert set(exported['Model']) == {'linear_trend'} and (exported['Lower'] >= 0).all()
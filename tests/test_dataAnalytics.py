@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataAnalytics import relationship_report, fit_line, community_residuals, RELATIONSHIPS
+
+
+@pytest.fixture(scope='module')
+def report(annual_df):
+    return relationship_report(annual_df, n_boot=500, seed=1)
+
+
+def test_city_statistics_match_numpy_and_pandas(report, annual_df):
+    x_col, y_col = RELATIONSHIPS['cc_vs_bc']
+    year = annual_df[annual_df['Year'] == '2020']
+    pairs = year[[x_col, y_col]].apply(pd.to_numeric, errors='coerce').replace([np.inf, -np.inf], np.nan).dropna()
+    row = report[(report['Relationship'] == 'cc_vs_bc') & (report['Level'] == 'City') & (report['Year'] == '2020')].iloc[0]
+
+    assert row['n'] == len(pairs)
+    assert row['Pearson r'] == pytest.approx(np.corrcoef(pairs[x_col], pairs[y_col])[0, 1])
+    assert row['Spearman rho'] == pytest.approx(np.corrcoef(pairs[x_col].rank(), pairs[y_col].rank())[0, 1])
+    slope, intercept = np.polyfit(pairs[x_col], pairs[y_col], 1)
+    assert row['Slope'] == pytest.approx(slope)
+    assert row['Intercept'] == pytest.approx(intercept)
+    assert row['Pearson r CI Low'] <= row['Pearson r'] <= row['Pearson r CI High']
+
+
+def test_bootstrap_is_reproducible(annual_df):
+    first = relationship_report(annual_df, levels=['City'], n_boot=200, seed=3)
+    second = relationship_report(annual_df, levels=['City'], n_boot=200, seed=3)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_fit_line_needs_min_points():
+    assert fit_line([1, 2], [1, 2]) is None
+    fit = fit_line([1, 2, 3, np.nan], [2, 4, 6, 8])
+    assert fit['slope'] == pytest.approx(2) and fit['n'] == 3
+
+
+def test_residuals_sum_to_zero_per_group(annual_df):
+    residuals = community_residuals(annual_df, 'cc_vs_mdv', 'Sector')
+    sums = residuals.groupby(['Location', 'Year'])['Residual'].sum()
+    assert np.allclose(sums, 0, atol=1e-6 * residuals['Crime per Capita 1000'].abs().max())
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from dataLoader import asof_join, load_dimensions
+
+
+def _dimension():
+    return pd.DataFrame({'COMM_CODE': ['AAA', 'AAA', 'BBB'], 'Year': [2019, 2021, 2020],
+                         'Value': [100.0, 200.0, 50.0]})
+
+
+def _facts():
+    return pd.DataFrame({'COMM_CODE': ['AAA', 'AAA', 'AAA', 'BBB', None, 'CCC'],
+                         'Year': [2018, 2020, 2021, 2022, 2020, 2020],
+                         'Month': [6, 12, 1, 3, 1, 1]})
+
+
+def test_asof_join_takes_the_latest_row_in_effect():
+    joined = asof_join(_facts(), _dimension(), 'COMM_CODE', ['Value'])
+    # row order is kept, rows before the first dimension row get the first one
+    assert joined['COMM_CODE'].tolist() == _facts()['COMM_CODE'].tolist()
+    np.testing.assert_array_equal(joined['Value'], [100.0, 100.0, 200.0, 50.0, np.nan, np.nan])
+
+
+def test_asof_join_without_fill_and_with_effective_month():
+    joined = asof_join(_facts(), _dimension(), 'COMM_CODE', ['Value'], fill_before_first=False)
+    assert np.isnan(joined.loc[0, 'Value']) and joined.loc[1, 'Value'] == 100.0
+
+    dimension = _dimension().assign(Month=[1, 2, 1])
+    joined = asof_join(_facts(), dimension, 'COMM_CODE', ['Value'], dim_month_col='Month')
+    # the 2021 value only takes effect in February
+    assert joined.loc[2, 'Value'] == 100.0
+
+
+def test_asof_join_keeps_a_missing_value_in_effect():
+    # the 2021 assessment of AAA has no value, later months must not look ahead to 2023
+    dimension = pd.DataFrame({'COMM_CODE': ['AAA', 'AAA', 'AAA'], 'Year': [2019, 2021, 2023],
+                              'Value': [100.0, np.nan, 300.0]})
+    facts = pd.DataFrame({'COMM_CODE': ['AAA', 'AAA', 'AAA'], 'Year': [2018, 2021, 2022], 'Month': [1, 6, 12]})
+    joined = asof_join(facts, dimension, 'COMM_CODE', ['Value'])
+    np.testing.assert_array_equal(joined['Value'], [100.0, np.nan, np.nan])
+    assert '_effective' not in joined.columns
+
+
+def test_dimensions_match_the_merged_data(project_dir, final_df):
+    dimensions = load_dimensions(str(project_dir / 'data'))
+
+    def values(df, column):
+        values = df[column].dropna().astype(str)
+        return set(values[values.str.strip() != ''])
+
+    for column in ('Community Code', 'Community', 'Sector', 'Ward Number', 'Year'):
+        assert values(dimensions, column) == values(final_df, column), column
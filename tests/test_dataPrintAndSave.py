@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from dataPrintAndSave import describe_dataframe
+
+
+def test_describe_rate_uses_the_annual_population(final_df, annual_df):
+    stats = describe_dataframe(final_df, annual_df)
+
+    # every category row of a community and month counts towards its rate, not only the first one
+    monthly = final_df.groupby(['Year', 'Month', 'Community'], as_index=False)['Crime Count'].sum()
+    monthly = monthly.merge(annual_df[['Community', 'Year', 'Population Household']], on=['Community', 'Year'])
+    population = monthly['Population Household'].where(monthly['Population Household'] > 0)
+    monthly['rate'] = monthly['Crime Count'] / population * 1000
+    expected = monthly.groupby(['Year', 'Month'])['rate'].mean()
+
+    assert stats.loc['mean', 'Crime per Capita 1000'] == pytest.approx(expected.mean())
+    assert stats.loc['max', 'Crime per Capita 1000'] == pytest.approx(expected.max())
+    assert np.isfinite(stats['Crime per Capita 1000'].astype(float)).all()
+    # twelve monthly rates add up to the annual rate of the fact table
+    community = monthly[(monthly['Year'] == '2020') & (monthly['Population Household'] > 0)]['Community'].iloc[0]
+    annual_rate = annual_df.loc[(annual_df['Community'] == community) & (annual_df['Year'] == '2020'),
+                                'Crime per Capita 1000'].iloc[0]
+    rates = monthly.loc[(monthly['Community'] == community) & (monthly['Year'] == '2020'), 'rate']
+    assert rates.sum() == pytest.approx(annual_rate)
+
+
+def test_describe_builds_the_fact_table_when_not_given(final_df, annual_df):
+    assert describe_dataframe(final_df).equals(describe_dataframe(final_df, annual_df))
@@ -0,0 +1,60 @@
+import shutil
+
+import pytest
+
+from dataLoader import DATA_FILES, resolve_data_files
+from dataRefresh import DataRefresher, DatasetHolder, DatasetSnapshot, source_signature
+
+
+@pytest.fixture
+def data_dir(project_dir, tmp_path):
+    data = tmp_path / 'data'
+    shutil.copytree(project_dir / 'data', data)
+    return data
+
+
+def _holder(final_df, annual_df, data_dir):
+    snapshot = DatasetSnapshot(df=final_df, annual_df=annual_df, signature=source_signature(str(data_dir)))
+    return DatasetHolder(snapshot, data_dir=str(data_dir))
+
+
+def test_newer_stamped_extract_is_picked_up(final_df, annual_df, data_dir):
+    holder = _holder(final_df, annual_df, data_dir)
+    newer = 'Community_Crime_Statistics_20250711.csv'
+    shutil.copy(data_dir / DATA_FILES['crime'], data_dir / newer)
+
+    assert resolve_data_files(str(data_dir))['crime'] == newer
+    assert any(name == newer for name, _, _ in source_signature(str(data_dir)))
+    assert DataRefresher(holder).check_now()
+    assert holder.current().version == 1
+
+
+def test_failed_rebuild_is_queued_not_printed(final_df, annual_df, data_dir, capsys):
+    holder = _holder(final_df, annual_df, data_dir)
+    (data_dir / 'Community_Crime_Statistics_20250711.csv').write_text('not,a\ncrime,extract\n')
+
+    refresher = DataRefresher(holder)
+    assert not refresher.check_now()
+    assert capsys.readouterr().out == ''
+    assert len(refresher.pop_errors()) == 1
+    assert refresher.pop_errors() == []
+    assert holder.current().df is final_df
+
+
+
+def test_failed_rebuild_keeps_the_previous_snapshot(final_df, annual_df, data_dir):
+    holder = _holder(final_df, annual_df, data_dir)
+    refresher = DataRefresher(holder)
+    newer = data_dir / 'Community_Crime_Statistics_20250711.csv'
+    shutil.copy(data_dir / DATA_FILES['crime'], newer)
+    assert refresher.check_now()
+    previous = holder.current()
+
+    # a broken extract with a later stamp fails, the snapshot built from the good one keeps serving
+    (data_dir / 'Community_Crime_Statistics_20250811.csv').write_text('not,a\ncrime,extract\n')
+    assert not refresher.check_now()
+    errors = refresher.pop_errors()
+    assert len(errors) == 1 and refresher.last_error is errors[0]
+    assert holder.current() is previous and holder.current().version == 1
+    # the same failing files are not rebuilt, or reported, again
+    assert not refresher.check_now() and refresher.pop_errors() == []
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataLoader import create_dataframe
+from dataRefresh import build_snapshot
+from dataValidator import DataValidationError, validate_dataframe
+
+
+def _frame():
+    # two communities, the second is missing a month of 2020 and has a blank sector and a zero population
+    rows = [('AAA', 'ALPHA', '2020', float(month), 'NORTH', 'A', 3, 100.0) for month in range(1, 13)]
+    rows += [('BBB', 'BETA', '2020', float(month), 'SOUTH', 'A', 2, 50.0) for month in range(1, 12)]
+    df = pd.DataFrame(rows, columns=['Community Code', 'Community', 'Year', 'Month', 'Sector', 'Category',
+                                     'Crime Count', 'Population Household'])
+    df.loc[0, 'Sector'] = ' '
+    df.loc[12, 'Population Household'] = 0.0
+    df['Crime per Capita 1000'] = df['Crime Count'] / df['Population Household'] * 1000
+    return df
+
+
+def _rule(report, name):
+    return next(result for result in report['rules'] if result['name'] == name)
+
+
+def test_rules_measure_the_merged_frame():
+    df = _frame()
+    source_keys = {'crime_community': pd.Series(['ALPHA', 'BETA', 'GAMMA']), 'wards_name': pd.Series(['ALPHA', 'BETA'])}
+    report = validate_dataframe(df, source_keys, {'census_rows': 10, 'census_rows_complete': 8})
+
+    coverage = _rule(report, 'crime_communities_in_wards')
+    assert coverage['value'] == pytest.approx(2 / 3, abs=1e-4) and coverage['passed'] is False
+    assert coverage['details']['unmatched_examples'] == ['GAMMA']
+    assert _rule(report, 'census_rows_kept_after_dropna')['value'] == 0.8
+    # a blank string counts as missing
+    assert _rule(report, 'sector_null_rate')['details']['missing_rows'] == 1
+    assert _rule(report, 'crime_per_capita_inf_rate')['details']['inf_rows'] == 1
+    assert _rule(report, 'crime_with_zero_population')['details']['flagged_rows'] == 1
+    completeness = _rule(report, 'community_month_completeness')
+    assert completeness['details'] == {'community_years': 2, 'incomplete': 1, 'incomplete_examples': ['BETA 2020']}
+    # rules whose source or column is missing are skipped, not failed
+    assert _rule(report, 'business_communities_in_wards')['passed'] is None
+    assert report['skipped'] > 0 and report['errors'] == 1 and not report['passed']
+
+
+def test_strict_raises_with_the_report():
+    with pytest.raises(DataValidationError) as error:
+        validate_dataframe(_frame(), {'crime_community': ['GAMMA'], 'wards_name': ['ALPHA']}, strict=True)
+    assert error.value.report['strict'] and not error.value.report['passed']
+
+
+def test_report_is_not_copied_into_derived_frames(project_dir):
+    data_dir = str(project_dir / 'data')
+    df, report = create_dataframe(data_dir=data_dir, return_report=True)
+    assert report['rows'] == len(df)
+    assert df.attrs == {}
+    assert df[df['Year'] == '2020'].attrs == {}
+    assert build_snapshot(data_dir).validation_report['rows'] == len(df)
@@ -0,0 +1,46 @@
+import gc
+
+import pandas as pd
+
+import regionIndex
+from regionIndex import RegionIndex, get_region_index
+
+
+def _regions():
+    return pd.DataFrame({
+        'Community Code': ['BEL', 'BRI', 'ABB', 'ABB', None],
+        'Community': ['BELTLINE', 'BRIDGELAND/RIVERSIDE', 'ABBEYDALE', 'ABBEYDALE', 'UNKNOWN'],
+        'Sector': ['CENTRE', 'CENTRE', 'EAST', 'EAST', 'NORTH'],
+        'Ward Number': ['7', '10', '9', '9', ''],
+    })
+
+
+def test_community_prefix_by_name_or_code_case_insensitive():
+    index = RegionIndex(_regions(), 'Community')
+    assert index.values == ['ABBEYDALE', 'BELTLINE', 'BRIDGELAND/RIVERSIDE']
+    assert [index.values[i] for i in index.search('b')] == ['BELTLINE', 'BRIDGELAND/RIVERSIDE']
+    assert [index.values[i] for i in index.search(' bri')] == ['BRIDGELAND/RIVERSIDE']
+    # 'abb' matches the code and the name of the same community once
+    assert [index.values[i] for i in index.search('Abb')] == ['ABBEYDALE']
+    assert index.search('bel') == index.search('BEL') == [1]
+    assert index.search('x') == [] and index.search('') == [0, 1, 2]
+
+
+def test_wards_are_in_numeric_order():
+    index = RegionIndex(_regions(), 'Ward Number')
+    assert index.values == ['7', '9', '10']
+    assert [index.values[i] for i in index.search('1')] == ['10']
+
+
+def test_cache_returns_the_same_index_and_drops_freed_frames():
+    regions = _regions()
+    index = get_region_index(regions, 'Sector')
+    assert get_region_index(regions, 'Sector') is index
+    assert index.values == ['CENTRE', 'EAST', 'NORTH']
+    assert get_region_index(regions, 'Community') is not index
+
+    key = (id(regions), 'Sector')
+    assert key in regionIndex._REGION_CACHE
+    del regions, index
+    gc.collect()
+    assert key not in regionIndex._REGION_CACHE
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from conftest import SRC_DIR
+from sqliteStore import SqliteStore, write_sqlite_store
+from categoryHierarchy import filter_group
+from dataPrintAndSave import summarize_location_year
+from dataVisualizer import prepare_crime_category, prepare_crime_count, prepare_crime_forecast, prepare_scatter
+
+
+@pytest.fixture(scope='module')
+def store(final_df, annual_df, tmp_path_factory):
+    db_file = str(tmp_path_factory.mktemp('store') / 'crime.sqlite')
+    write_sqlite_store(final_df, annual_df, db_file)
+    with SqliteStore(db_file) as store:
+        yield store
+
+
+def _first_location(final_df, location_type):
+    locations = final_df[location_type].dropna().astype(str)
+    return locations[locations.str.strip() != ''].sort_values().iloc[0]
+
+
+@pytest.mark.parametrize('location_type', ['Community', 'Sector', 'Ward Number'])
+@pytest.mark.parametrize('category_group', [None, 'Violent'])
+def test_summary_matches_in_memory(store, final_df, annual_df, in_project, location_type, category_group):
+    location, year = _first_location(final_df, location_type), '2020'
+    summary = store.summarize(location, year, location_type, category_group)
+    assert summary == summarize_location_year(final_df, location, year, location_type, annual_df, category_group)
+    assert 'Violent Crime' in summary
+
+
+@pytest.mark.parametrize('location_type', ['Community', 'Sector', 'Ward Number'])
+@pytest.mark.parametrize('category_group', [None, 'Property'])
+def test_plots_match_in_memory(store, final_df, annual_df, in_project, location_type, category_group):
+    location, year = _first_location(final_df, location_type), '2020'
+    category = store.prepare('crime_category', location_type, location, year, category_group)
+    expected = prepare_crime_category(final_df, location, year, location_type, category_group)
+    assert (category['renamed_pivot'].to_numpy() == expected['renamed_pivot'].to_numpy()).all()
+    pd.testing.assert_series_equal(category['crime_by_group'], expected['crime_by_group'])
+
+    count = store.prepare('crime_count', location_type, location, year, category_group)
+    expected = prepare_crime_count(final_df, location, year, location_type, category_group)
+    assert (count['monthly_crime'].to_numpy() == expected['monthly_crime'].to_numpy()).all()
+
+    forecast = store.prepare('crime_forecast', location_type, location, year, category_group)
+    expected = prepare_crime_forecast(final_df, location, year, location_type, category_group=category_group)
+    pd.testing.assert_frame_equal(forecast['forecast'], expected['forecast'])
+
+    assert store.prepare('cc_vs_mdv', location_type, location, year)['fits'] == \
+        prepare_scatter(final_df, location, year, location_type, annual_df)['fits']
+
+
+def test_rows_rejects_city(store):
+    with pytest.raises(KeyError):
+        store.rows('City', 'CALGARY', '2020')
+
+
+def test_rows_of_location(store, final_df):
+    community = _first_location(final_df, 'Community')
+    rows = store.rows('Community', community, '2020')
+    assert len(rows) == ((final_df['Community'] == community) & (final_df['Year'] == '2020')).sum()
+
+
+def test_build_runs_without_display(project_dir, tmp_path):
+    # the command line build must not need a Tk display
+    env = {key: value for key, value in os.environ.items() if key != 'DISPLAY'}
+    db_file = tmp_path / 'crime.sqlite'
+    subprocess.run([sys.executable, os.path.join(SRC_DIR, 'sqliteStore.py'), '--build',
+                    '--data-dir', str(project_dir / 'data'), '--db', str(db_file)],
+                   cwd=project_dir, env=env, check=True, capture_output=True)
+    assert db_file.exists()
+
+
+def test_category_group_export(store, final_df, in_project, tmp_path):
+    out = tmp_path / 'groups.csv'
+    subprocess.run([sys.executable, os.path.join(SRC_DIR, 'sqliteStore.py'), '--db', store.db_file,
+                    '--category-groups', str(out)], cwd=in_project, check=True, capture_output=True)
+    exported = pd.read_csv(out)
+    assert list(exported.columns[:3]) == ['Community', 'Year', 'Month']
+    assert exported['Violent'].sum() == pytest.approx(filter_group(final_df, 'Violent')['Crime Count'].sum())
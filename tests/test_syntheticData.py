@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from dataLoader import DATA_FILES
+from syntheticData import generate_synthetic_dataset
+
+
+def _read(data_dir, key):
+    return pd.read_csv(data_dir / DATA_FILES[key])
+
+
+def test_every_crime_community_is_in_the_other_tables(project_dir):
+    data_dir = project_dir / 'data'
+    wards = _read(data_dir, 'wards')
+    crime = _read(data_dir, 'crime')
+    codes = wards.set_index('NAME')['COMM_CODE']
+
+    crime_communities = crime['Community'].unique()
+    assert pd.Index(crime_communities).isin(codes.index).all()
+    crime_codes = set(codes[crime_communities])
+    for key in ('census2016', 'census2017', 'census2019'):
+        assert crime_codes <= set(_read(data_dir, key)['COMM_CODE'])
+    assert crime_codes <= set(_read(data_dir, 'census2021')['COMMUNITY_CODE'])
+    # like the real extract, only residential communities are assessed
+    residential = set(wards.loc[wards['CLASS_CODE'] == 1, 'COMM_CODE'])
+    assert crime_codes & residential == set(_read(data_dir, 'assessment')['COMM_CODE']) & crime_codes
+    assert set(_read(data_dir, 'assessment')['COMM_CODE']) <= residential
+
+
+def test_unmatched_rate_renames_that_share_of_communities(tmp_path):
+    generate_synthetic_dataset(str(tmp_path), scale=1.0, seed=3, unmatched_rate=0.2)
+    wards = _read(tmp_path, 'wards')
+    communities = pd.Series(_read(tmp_path, 'crime')['Community'].unique())
+    unmatched = ~communities.isin(wards['NAME'])
+    assert unmatched.mean() == pytest.approx(0.2, abs=0.06)
+    assert communities[unmatched].str.endswith(' UNMATCHED').all()
+
+
+def test_years_the_loader_drops_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        generate_synthetic_dataset(str(tmp_path), scale=0.05, first_year=1995)
+    with pytest.raises(ValueError):
+        generate_synthetic_dataset(str(tmp_path), scale=0.05, last_year=2030)
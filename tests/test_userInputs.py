@@ -0,0 +1,24 @@
+import pytest
+
+import userInputs
+
+
+@pytest.mark.parametrize('get_location', [userInputs.get_community, userInputs.get_sector])
+def test_prompts_do_not_change_the_dataframe(final_df, monkeypatch, get_location):
+    column = 'Community' if get_location is userInputs.get_community else 'Sector'
+    name = final_df[column].dropna().iloc[0]
+    answers = iter(['N', f'  {name.lower()} '])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    before = final_df[['Community Code', 'Community', 'Sector']].copy()
+
+    chosen = get_location(final_df)
+    assert name in (chosen if isinstance(chosen, tuple) else (chosen,))
+    assert final_df[['Community Code', 'Community', 'Sector']].equals(before)
+    assert (final_df[column].dropna() == final_df[column].dropna().str.upper()).all()
+
+
+def test_community_code_is_matched_case_insensitive(final_df, monkeypatch):
+    row = final_df.dropna(subset=['Community Code']).iloc[0]
+    answers = iter(['N', row['Community Code'].lower()])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    assert userInputs.get_community(final_df) == ('Community', row['Community'])
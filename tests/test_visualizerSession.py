@@ -0,0 +1,50 @@
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from visualizerSession import PLOTS, VisualizerSession
+
+
+@pytest.fixture
+def query(final_df, annual_df, in_project):
+    plt.close('all')
+    with VisualizerSession(final_df, annual_df) as session:
+        query = session.submit('Sector', final_df['Sector'].dropna().iloc[0], '2020', 'Violent')
+        for future in query.figures.values():
+            future.result()
+        yield query
+    plt.close('all')
+
+
+def test_figures_are_drawn_in_the_workers(query):
+    assert set(query.figures) == set(PLOTS)
+    for future in query.figures.values():
+        figure = future.result()
+        assert isinstance(figure, Figure) and isinstance(figure.canvas, FigureCanvasAgg)
+        assert figure.axes and figure.axes[0].has_data()
+    # nothing was handed to pyplot from a worker thread
+    assert plt.get_fignums() == []
+
+
+def test_show_hands_the_drawn_figure_to_pyplot(query, capsys):
+    query.show('crime_category')
+    assert plt.gcf() is query.figures['crime_category'].result()
+    assert 'Category Legend:' in capsys.readouterr().out
+    plt.close()
+    assert plt.get_fignums() == []
+
+
+def test_show_attaches_the_figure_without_pyplot_adoption(query, monkeypatch):
+    # matplotlib before 3.10 rejects a Figure passed to plt.figure()
+    def figure(num=None, *args, **kwargs):
+        if isinstance(num, Figure):
+            raise TypeError("int() argument must be a string, a bytes-like object or a real number, not 'Figure'")
+        return pyplot_figure(num, *args, **kwargs)
+
+    pyplot_figure = plt.figure
+    monkeypatch.setattr(plt, 'figure', figure)
+    query.show('crime_count')
+    assert plt.gcf() is query.figures['crime_count'].result()
+    plt.close()
+    assert plt.get_fignums() == []